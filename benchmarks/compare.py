@@ -0,0 +1,52 @@
+"""Compare two benchmark reports and flag regressions.
+
+    python -m benchmarks.compare base.json new.json [--threshold 0.1]
+
+Results are matched by name and compared on their median. The exit status
+is 1 when any result got slower by more than the threshold.
+"""
+
+import argparse
+import json
+import sys
+
+
+def load(path: str) -> dict:
+    with open(path) as f:
+        return {result["name"]: result for result in json.load(f)["results"]}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.compare", description=__doc__
+    )
+    parser.add_argument("base")
+    parser.add_argument("new")
+    parser.add_argument(
+        "--threshold", type=float, default=0.1, help="relative slowdown to flag"
+    )
+    args = parser.parse_args(argv)
+
+    base, new = load(args.base), load(args.new)
+    regressions = 0
+    width = max((len(name) for name in new), default=0)
+    for name, result in new.items():
+        if name not in base:
+            print(f"{name:<{width}}  (new)")
+            continue
+        before, after = base[name]["median"], result["median"]
+        change = after / before - 1 if before else 0.0
+        flag = ""
+        if change > args.threshold:
+            flag = "  REGRESSION"
+            regressions += 1
+        elif change < -args.threshold:
+            flag = "  faster"
+        print(f"{name:<{width}}  {before:.6f}s -> {after:.6f}s  {change:+.1%}{flag}")
+    for name in base.keys() - new.keys():
+        print(f"{name:<{width}}  (missing)")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
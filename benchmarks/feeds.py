@@ -0,0 +1,78 @@
+import random
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+# newest entry of every generated feed; entries go back one hour each
+LATEST = datetime(2024, 6, 1, 12, 0, 0, tzinfo=timezone.utc)
+
+BODY_SIZES = {"small": 200, "large": 4000}
+
+_WORDS = (
+    "feed entry update release server client cache parser storage worker "
+    "network latency batch index stream event queue shard lease metric"
+).split()
+
+
+def _text(rng: random.Random, size: int) -> str:
+    words = []
+    length = 0
+    while length < size:
+        word = rng.choice(_WORDS)
+        words.append(word)
+        length += len(word) + 1
+    return " ".join(words)
+
+
+def entry_dates(entries: int):
+    """Publish dates of the entries, newest first."""
+    return [LATEST - timedelta(hours=i) for i in range(entries)]
+
+
+def make_rss(entries: int, body: str = "small", seed: int = 0) -> bytes:
+    """An RSS 2.0 document with `entries` items, newest first."""
+    rng = random.Random(seed)
+    size = BODY_SIZES[body]
+    items = []
+    for i, published in enumerate(entry_dates(entries)):
+        items.append(
+            f"<item><title>Entry {i}</title>"
+            f"<link>https://example.com/posts/{i}</link>"
+            f'<guid isPermaLink="false">urn:scoutrss:bench:{i}</guid>'
+            f"<pubDate>{format_datetime(published)}</pubDate>"
+            f"<description>{_text(rng, size)}</description></item>"
+        )
+    return (
+        '<?xml version="1.0" encoding="utf-8"?>\n'
+        '<rss version="2.0"><channel><title>Benchmark</title>'
+        "<link>https://example.com/</link><description>Synthetic feed</description>"
+        f"<lastBuildDate>{format_datetime(LATEST)}</lastBuildDate>"
+        + "".join(items)
+        + "</channel></rss>"
+    ).encode()
+
+
+def make_atom(entries: int, body: str = "small", seed: int = 0) -> bytes:
+    """An Atom 1.0 document with `entries` entries, newest first."""
+    rng = random.Random(seed)
+    size = BODY_SIZES[body]
+    items = []
+    for i, published in enumerate(entry_dates(entries)):
+        stamp = published.isoformat().replace("+00:00", "Z")
+        items.append(
+            f"<entry><title>Entry {i}</title>"
+            f'<link href="https://example.com/posts/{i}"/>'
+            f"<id>urn:scoutrss:bench:{i}</id>"
+            f"<published>{stamp}</published><updated>{stamp}</updated>"
+            f'<content type="html">{_text(rng, size)}</content></entry>'
+        )
+    return (
+        '<?xml version="1.0" encoding="utf-8"?>\n'
+        '<feed xmlns="http://www.w3.org/2005/Atom"><title>Benchmark</title>'
+        '<id>urn:scoutrss:bench</id><link href="https://example.com/"/>'
+        f"<updated>{LATEST.isoformat().replace('+00:00', 'Z')}</updated>"
+        + "".join(items)
+        + "</feed>"
+    ).encode()
+
+
+FORMATS = {"rss": make_rss, "atom": make_atom}
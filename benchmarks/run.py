@@ -0,0 +1,354 @@
+"""Run the benchmark suites and print (or save) the results as JSON.
+
+    python -m benchmarks                        # every suite
+    python -m benchmarks --quick -o base.json   # a fast subset
+    python -m benchmarks check --entries 1000   # one suite
+
+Every result has a ``median`` in seconds per ``unit`` (lower is better);
+compare two runs with ``python -m benchmarks.compare base.json new.json``.
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List
+
+from scoutrss import ScoutPool, ScoutRSS, __version__
+from scoutrss.fetch import Fetcher
+from scoutrss.storage import (
+    CachedStorage,
+    FileStorage,
+    MemoryStorage,
+    SqliteStorage,
+    StorageAdapter,
+)
+
+from .feeds import FORMATS, LATEST, entry_dates
+from .server import FeedServer
+
+OLD = datetime(2000, 1, 1, tzinfo=timezone.utc)
+
+
+def _stats(samples: List[float]) -> dict:
+    return {
+        "median": statistics.median(samples),
+        "min": min(samples),
+        "mean": statistics.mean(samples),
+        "runs": len(samples),
+    }
+
+
+def _repeats(base: int, entries: int) -> int:
+    # keep big documents from dominating the run time
+    return max(base * 100 // max(entries, 100), 3)
+
+
+# --- check() ---
+
+SCENARIOS = ("all_new", "none_new", "not_modified")
+
+
+def bench_check(args) -> List[dict]:
+    """check() end to end against the local server, with the per-phase medians."""
+    results = []
+    fetcher = Fetcher()
+    with FeedServer() as server:
+        for fmt in args.formats:
+            for entries in args.entries:
+                for body in args.bodies:
+                    document = FORMATS[fmt](entries, body)
+                    url = server.add(f"/{fmt}/{entries}/{body}", document)
+                    for scenario in SCENARIOS:
+                        result = {
+                            "suite": "check",
+                            "name": f"check/{fmt}/{entries}/{body}/{scenario}",
+                            "params": {
+                                "format": fmt,
+                                "entries": entries,
+                                "body": body,
+                                "scenario": scenario,
+                                "document_bytes": len(document),
+                            },
+                            "unit": "check",
+                        }
+                        result.update(
+                            _bench_one_check(
+                                fetcher, url, scenario, args.repeat, entries
+                            )
+                        )
+                        results.append(result)
+    fetcher.close()
+    return results
+
+
+def _bench_one_check(
+    fetcher: Fetcher, url: str, scenario: str, repeat: int, entries: int
+) -> dict:
+    delivered = []
+    last_seen = LATEST if scenario != "all_new" else OLD
+    samples: List[float] = []
+    phases: Dict[str, List[float]] = {}
+    for _ in range(_repeats(repeat, entries)):
+        storage = MemoryStorage()
+        scout = ScoutRSS(
+            url, delivered.append, storage=storage, last_seen=last_seen, fetcher=fetcher
+        )
+        if scenario == "not_modified":
+            scout.check()  # store the ETag
+        delivered.clear()
+        start = time.perf_counter()
+        result = scout.check()
+        samples.append(time.perf_counter() - start)
+        for phase, seconds in result.timings.items():
+            phases.setdefault(phase, []).append(seconds)
+    return {
+        **_stats(samples),
+        "phases": {phase: statistics.median(s) for phase, s in phases.items()},
+        "delivered": len(delivered),
+    }
+
+
+# --- storage ---
+
+
+def _storages(tmp: Path) -> Dict[str, Callable[[], object]]:
+    backends = {
+        "memory": MemoryStorage,
+        "file": lambda: FileStorage(tmp / f"{time.monotonic_ns()}.json"),
+        "file_cache": lambda: FileStorage(
+            tmp / f"{time.monotonic_ns()}.json", cache=True
+        ),
+        "sqlite": lambda: SqliteStorage(tmp / f"{time.monotonic_ns()}.db"),
+        "cached_file": lambda: CachedStorage(
+            FileStorage(tmp / f"{time.monotonic_ns()}.json")
+        ),
+    }
+    try:
+        import mongomock
+
+        from scoutrss.storage import MongoStorage
+
+        backends["mongo"] = lambda: MongoStorage(
+            mongomock.MongoClient()["bench"][f"feeds{time.monotonic_ns()}"]
+        )
+    except ImportError:
+        print("mongomock not installed; skipping MongoStorage", file=sys.stderr)
+    return backends
+
+
+def bench_storage(args) -> List[dict]:
+    """Per-call latency of each backend as the number of stored feeds grows."""
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for backend, make in _storages(Path(tmp)).items():
+            if args.backends and backend not in args.backends:
+                continue
+            for feeds in args.feeds:
+                storage = make()
+                ids = [f"https://feed{i}.example.com/rss" for i in range(feeds)]
+                dates = entry_dates(feeds)
+                start = time.perf_counter()
+                try:
+                    storage.set_many(dict(zip(ids, dates)))
+                except Exception as e:
+                    # e.g. mongomock's bulk_write lagging behind pymongo
+                    print(f"{backend}: set_many failed ({e!r})", file=sys.stderr)
+                    StorageAdapter.set_many(storage, dict(zip(ids, dates)))
+                populate = time.perf_counter() - start
+                sample = ids[:: max(feeds // args.sample, 1)][: args.sample]
+
+                def timed(op: str, call: Callable[[str], object]) -> dict:
+                    samples = []
+                    for id in sample:
+                        start = time.perf_counter()
+                        call(id)
+                        samples.append(time.perf_counter() - start)
+                    return {
+                        "suite": "storage",
+                        "name": f"storage/{backend}/{feeds}/{op}",
+                        "params": {"backend": backend, "feeds": feeds, "op": op},
+                        "unit": "call",
+                        **_stats(samples),
+                    }
+
+                results.append(timed("get_last_seen", storage.get_last_seen))
+                results.append(
+                    timed("set_last_seen", lambda id: storage.set_last_seen(id, LATEST))
+                )
+                results.append(
+                    timed(
+                        "advance_last_seen",
+                        lambda id: storage.advance_last_seen(id, LATEST),
+                    )
+                )
+                results.append(
+                    timed(
+                        "set_http_cache",
+                        lambda id: storage.set_http_cache(id, {"etag": '"v1"'}),
+                    )
+                )
+                for op, call in (
+                    ("set_many", lambda: storage.set_many(dict(zip(ids, dates)))),
+                    ("get_many", lambda: storage.get_many(ids)),
+                ):
+                    samples = []
+                    try:
+                        for _ in range(3):
+                            start = time.perf_counter()
+                            call()
+                            samples.append(time.perf_counter() - start)
+                    except Exception as e:
+                        print(f"{backend}: {op} failed ({e!r})", file=sys.stderr)
+                        continue
+                    results.append(
+                        {
+                            "suite": "storage",
+                            "name": f"storage/{backend}/{feeds}/{op}",
+                            "params": {"backend": backend, "feeds": feeds, "op": op},
+                            "unit": f"{feeds} feeds",
+                            **_stats(samples),
+                            "populate": populate,
+                        }
+                    )
+                storage.flush()
+    return results
+
+
+# --- many feeds ---
+
+
+def bench_pool(args) -> List[dict]:
+    """Time for a ScoutPool to check every feed once, with all feeds on one host."""
+    results = []
+    with FeedServer() as server:
+        document = FORMATS["rss"](args.pool_entries)
+        urls = [server.add(f"/feed/{i}", document) for i in range(max(args.pool_feeds))]
+        for feeds in args.pool_feeds:
+            for workers in args.workers:
+                samples = []
+                for _ in range(args.pool_repeat):
+                    samples.append(_pool_round(urls[:feeds], workers))
+                result = {
+                    "suite": "pool",
+                    "name": f"pool/{feeds}/{workers}",
+                    "params": {
+                        "feeds": feeds,
+                        "workers": workers,
+                        "entries": args.pool_entries,
+                    },
+                    "unit": "round",
+                    **_stats(samples),
+                }
+                result["feeds_per_second"] = feeds / result["median"]
+                results.append(result)
+    return results
+
+
+def _pool_round(urls: List[str], workers: int) -> float:
+    done = threading.Event()
+    checked = []
+    lock = threading.Lock()
+
+    def listener(result, error):
+        with lock:
+            checked.append(result.id)
+            if len(checked) == len(urls):
+                done.set()
+
+    storage = MemoryStorage()
+    scouts = ScoutRSS.create_many(
+        urls,
+        lambda entry: None,
+        storage=storage,
+        fetcher=Fetcher(),
+        listeners=[listener],
+    )
+    for scout in scouts:
+        storage.set_last_seen(scout.id, OLD)
+    pool = ScoutPool(
+        max_workers=workers, max_per_host=workers, interval=3600, tick=0.005
+    )
+    pool.add_many(scouts)
+    start = time.perf_counter()
+    pool.listen()
+    done.wait()
+    elapsed = time.perf_counter() - start
+    pool.stop()
+    return elapsed
+
+
+SUITES = {"check": bench_check, "storage": bench_storage, "pool": bench_pool}
+
+
+def _ints(value: str) -> List[int]:
+    return [int(v) for v in value.split(",")]
+
+
+def _names(value: str) -> List[str]:
+    return value.split(",")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__)
+    parser.add_argument("suites", nargs="*", help=f"any of {', '.join(SUITES)}")
+    parser.add_argument("-o", "--output", help="write the JSON here instead of stdout")
+    parser.add_argument("--quick", action="store_true", help="small sizes and few runs")
+    parser.add_argument("--repeat", type=int, default=20, help="runs per check case")
+    parser.add_argument("--formats", type=_names, default=list(FORMATS))
+    parser.add_argument("--entries", type=_ints, default=[10, 100, 1000, 10000])
+    parser.add_argument("--bodies", type=_names, default=["small", "large"])
+    parser.add_argument("--backends", type=_names, default=None)
+    parser.add_argument("--feeds", type=_ints, default=[100, 1000, 10000])
+    parser.add_argument("--sample", type=int, default=200, help="calls timed per op")
+    parser.add_argument("--pool-feeds", type=_ints, default=[100, 1000])
+    parser.add_argument("--pool-entries", type=int, default=20)
+    parser.add_argument("--pool-repeat", type=int, default=3)
+    parser.add_argument("--workers", type=_ints, default=[8, 32])
+    args = parser.parse_args(argv)
+    for name in args.suites:
+        if name not in SUITES:
+            parser.error(f"unknown suite: {name}")
+    if args.quick:
+        args.repeat = 3
+        args.entries = [10, 1000]
+        args.bodies = ["small"]
+        args.feeds = [100, 1000]
+        args.sample = 50
+        args.pool_feeds = [50]
+        args.pool_repeat = 1
+        args.workers = [8]
+    return args
+
+
+def main(argv=None) -> None:
+    args = parse_args(argv)
+    started = time.time()
+    results = []
+    for name in args.suites or SUITES:
+        print(f"running {name}...", file=sys.stderr)
+        results += SUITES[name](args)
+    report = {
+        "meta": {
+            "scoutrss": __version__,
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "started": datetime.fromtimestamp(started, tz=timezone.utc).isoformat(),
+            "seconds": time.time() - started,
+            "quick": args.quick,
+        },
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n")
+    else:
+        print(text)
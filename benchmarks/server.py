@@ -0,0 +1,67 @@
+import gzip
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like most feed hosts
+    disable_nagle_algorithm = True  # headers and body are written separately
+    documents: Dict[str, bytes] = {}
+    compressed: Dict[str, bytes] = {}
+
+    def do_GET(self):
+        body = self.documents.get(self.path)
+        if body is None:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        etag = '"' + hashlib.blake2b(body, digest_size=8).hexdigest() + '"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/rss+xml")
+        self.send_header("ETag", etag)
+        if "gzip" in self.headers.get("Accept-Encoding", ""):
+            body = self.compressed[self.path]
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class FeedServer:
+    """Serves generated feed documents on 127.0.0.1 with ETags and gzip.
+
+    Use as a context manager; ``add(path, body)`` returns the document's URL.
+    """
+
+    def __init__(self):
+        handler = type("Handler", (_Handler,), {"documents": {}, "compressed": {}})
+        self._handler = handler
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self._httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self.url = f"http://127.0.0.1:{self._httpd.server_port}"
+
+    def add(self, path: str, body: bytes) -> str:
+        self._handler.documents[path] = body
+        self._handler.compressed[path] = gzip.compress(body, compresslevel=6)
+        return self.url + path
+
+    def __enter__(self) -> "FeedServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
@@ -1,12 +1,61 @@
+from typing import TYPE_CHECKING, Any
+
 from ._version import __version__
+from .coalesce import FeedCache
+from .metrics import Metrics
+from .opml import read_opml
+from .outbox import Outbox
+from .result import CheckResult
+from .schedule import AdaptiveInterval
+from .seen import SeenIndex
+from .shard import Shard
 from .socutrss import ScoutRSS
-from .storage import FileStorage, MemoryStorage, MongoStorage, StorageAdapter
+from .storage import (
+    CachedStorage,
+    FileStorage,
+    MemoryStorage,
+    MongoStorage,
+    SqliteStorage,
+    StorageAdapter,
+)
+
+if TYPE_CHECKING:
+    from .aio import AsyncScoutRSS
+    from .pool import ScoutPool
+
+# imported on first use: asyncio and the process pool machinery make up most
+# of the cost of `import scoutrss`
+_LAZY = {"AsyncScoutRSS": ".aio", "ScoutPool": ".pool"}
+
+
+def __getattr__(name: str) -> Any:
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    from importlib import import_module
+
+    value = getattr(import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
 
 __all__ = [
     "ScoutRSS",
+    "ScoutPool",
+    "AsyncScoutRSS",
+    "CheckResult",
+    "AdaptiveInterval",
+    "FeedCache",
+    "SeenIndex",
+    "Outbox",
+    "Shard",
+    "Metrics",
+    "read_opml",
     "StorageAdapter",
+    "CachedStorage",
     "FileStorage",
     "MemoryStorage",
     "MongoStorage",
+    "SqliteStorage",
     "__version__",
 ]
@@ -0,0 +1,301 @@
+from __future__ import annotations
+
+import asyncio
+import inspect
+import logging
+from concurrent.futures import Executor
+from datetime import datetime
+from time import perf_counter
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Awaitable,
+    Callable,
+    List,
+    Optional,
+    Sequence,
+    Union,
+)
+
+from .fetch import _CHUNK_SIZE, Response, ResponseTooLarge
+from .metrics import Listener, notify
+from .result import CheckResult
+from .schedule import AdaptiveInterval, jitter_fraction, poll_hint, retry_after
+from .seen import SeenIndex
+from .socutrss import ScoutRSS, parse_entries, parse_new_entries
+from .storage.adapter import StorageAdapter
+
+if TYPE_CHECKING:
+    from aiohttp import ClientResponse, ClientSession
+    from feedparser import FeedParserDict
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncScoutRSS(ScoutRSS):
+    def __init__(
+        self,
+        url: str,
+        callback: Callable[
+            [Union[FeedParserDict, List[FeedParserDict]]],
+            Union[Any, Awaitable[Any]],
+        ],
+        storage: Optional[StorageAdapter] = None,
+        id: Optional[str] = None,
+        last_seen: Optional[datetime] = None,
+        require_confirmation: bool = False,
+        batch: bool = False,
+        max_batch_size: Optional[int] = None,
+        incremental: bool = False,
+        content_hash: bool = False,
+        adaptive: Optional[AdaptiveInterval] = None,
+        seen: Optional[SeenIndex] = None,
+        fields: Optional[Sequence[str]] = None,
+        initialize: bool = True,
+        listeners: Sequence[Listener] = (),
+        session: Optional["ClientSession"] = None,
+        timeout: float = 30,
+        parse_executor: Optional[Executor] = None,
+        max_size: int = 16 * 1024 * 1024,
+    ):
+        """
+        asyncio variant of ScoutRSS.
+
+        Requires aiohttp: pip install scoutrss[async]
+
+        :param callback: function or coroutine function called once per new entry (or per batch)
+        :param session: existing aiohttp session to reuse; if not provided, one is created on first check and closed by close()
+        :param timeout: total timeout for each feed request in seconds (default: 30)
+        :param parse_executor: executor to parse feeds in, e.g. a ProcessPoolExecutor (default: the loop's default executor)
+        :param max_size: largest accepted body in bytes, after decompression; larger ones raise ResponseTooLarge (default: 16 MiB)
+
+        The remaining parameters are the same as ScoutRSS.
+        """
+        try:
+            import aiohttp  # noqa: F401
+        except ImportError:
+            raise ImportError(
+                "aiohttp is required for AsyncScoutRSS. "
+                "Install it with: pip install scoutrss[async]"
+            )
+        super().__init__(
+            url,
+            callback,
+            storage=storage,
+            id=id,
+            last_seen=last_seen,
+            require_confirmation=require_confirmation,
+            batch=batch,
+            max_batch_size=max_batch_size,
+            incremental=incremental,
+            content_hash=content_hash,
+            adaptive=adaptive,
+            seen=seen,
+            fields=fields,
+            initialize=initialize,
+            listeners=listeners,
+        )
+        self.timeout = timeout
+        self.parse_executor = parse_executor
+        self.max_size = max_size
+        self._session = session
+        self._should_close_session = session is None
+        self._stop_event: Optional[asyncio.Event] = None
+
+    async def _fetch(self, cache: dict) -> Response:
+        """Download the feed, sending the stored validators."""
+        import aiohttp
+
+        if self._session is None:
+            # trust_env picks up HTTP(S)_PROXY like the threaded Fetcher
+            self._session = aiohttp.ClientSession(trust_env=True)
+
+        headers = {}
+        if cache.get("etag"):
+            headers["If-None-Match"] = cache["etag"]
+        if cache.get("modified"):
+            headers["If-Modified-Since"] = cache["modified"]
+
+        async with self._session.get(
+            self.url,
+            headers=headers,
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+        ) as response:
+            response_headers = {k.lower(): v for k, v in response.headers.items()}
+            if response.status == 304:
+                return Response(304, b"", response_headers, str(response.url))
+            response.raise_for_status()
+            body = await self._read(response)
+            # aiohttp has already decompressed the body
+            response_headers.pop("content-encoding", None)
+            response_headers.setdefault("content-location", str(response.url))
+            return Response(response.status, body, response_headers, str(response.url))
+
+    async def _read(self, response: "ClientResponse") -> bytes:
+        length = response.headers.get("Content-Length", "")
+        if length.isdigit() and int(length) > self.max_size:
+            raise ResponseTooLarge(f"{length} bytes")
+        chunks = []
+        size = 0
+        async for chunk in response.content.iter_chunked(_CHUNK_SIZE):
+            size += len(chunk)
+            if size > self.max_size:
+                raise ResponseTooLarge(f"more than {self.max_size} bytes")
+            chunks.append(chunk)
+        return b"".join(chunks)
+
+    async def check(self) -> CheckResult:  # type: ignore[override]
+        """Check for new entries without blocking the event loop.
+
+        Same semantics as ScoutRSS.check(). The feed is parsed in
+        parse_executor and coroutine callbacks are awaited. Storage calls
+        are made directly, so slow adapters should be wrapped accordingly.
+        """
+        result = self._result = CheckResult(self.id, self.url)
+        start = perf_counter()
+        error: Optional[BaseException] = None
+        try:
+            if self.adaptive is None:
+                return await self._run_check_async(result)
+            try:
+                await self._run_check_async(result)
+            except Exception as e:
+                self._adapt([], retry_after(getattr(e, "headers", None)), error=True)
+                raise
+            self._adapt(result.published, result.hint, error=result.status >= 400)
+            return result
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            result.duration = perf_counter() - start
+            self._result = None
+            notify(result, error, self.listeners)
+
+    async def _run_check_async(self, result: CheckResult) -> CheckResult:
+        with self._timed("storage"):
+            stored = self.storage.get_last_seen(self.id)
+        self._load_last_seen(stored)
+
+        with self._timed("storage"):
+            cache = self.storage.get_http_cache(self.id) or {}
+        with self._timed("fetch"):
+            response = await self._fetch(cache)
+        result.bytes = len(response.body)
+        result.hint = poll_hint(response.headers)
+        validators = self._response_validators(response, cache, result)
+        if validators is None:
+            logger.debug(f"{self.url} not modified")
+            return result
+
+        loop = asyncio.get_running_loop()
+        if self.seen is None:
+            with self._timed("parse"):
+                feed, new_entries = await loop.run_in_executor(
+                    self.parse_executor,
+                    parse_new_entries,
+                    response,
+                    self.last_seen,
+                    self.incremental,
+                    self.fields,
+                )
+            result.parsed = feed.get("parsed", 0)
+        else:
+            with self._timed("parse"):
+                feed, entries = await loop.run_in_executor(
+                    self.parse_executor,
+                    parse_entries,
+                    response,
+                    self.last_seen,
+                    self.incremental,
+                )
+            result.parsed = len(entries)
+            with self._timed("filter"):
+                new_entries = self._project(self._new_entries(entries))
+            del entries
+        result.hint = poll_hint(response.headers, feed)
+
+        result.new = len(new_entries)
+        result.published = [
+            d for d in map(self._published, new_entries) if d is not None
+        ]
+
+        logger.debug(f"Found {len(new_entries)} new entries for {self.url}")
+
+        # no storage.batch() around the awaits: adapters batch per thread, so
+        # every watcher on the loop would share (and hold open) one batch
+        delivered_all = False
+        with self._timed("deliver"):
+            for delivered in self._deliveries(new_entries):
+                try:
+                    confirm = self.callback(delivered)
+                    if inspect.isawaitable(confirm):
+                        confirm = await confirm
+                    committed = self._commit(delivered, confirm)
+                except Exception:
+                    logger.exception("Error in callback, stopping at current entry")
+                    committed = False
+                if not committed:
+                    result.failed.append(delivered)
+                    break
+                result.succeeded.append(delivered)
+                result.delivered += len(delivered) if self.batch else 1
+            else:
+                delivered_all = True
+            with self.storage.batch():
+                if delivered_all:
+                    self._update_http_cache(validators, cache)
+                self._save_seen()
+        return result
+
+    async def listen(  # type: ignore[override]
+        self, interval: int = 60, jitter: float = 0.0
+    ) -> None:
+        """
+        Check the feed every `interval` seconds until stop() is called.
+
+        Errors raised by a check are logged and the loop carries on. With
+        an adaptive policy the learned interval replaces `interval` after each check.
+
+        :param interval: check interval in seconds (default: 60)
+        :param jitter: delay the first check by up to this fraction of the interval, deterministically per feed (default: 0)
+        """
+        self._stop_event = asyncio.Event()
+        logger.info(f"Watching {self.url} every {interval}s")
+        delay = interval * jitter * jitter_fraction(self.id)
+        if delay:
+            try:
+                await asyncio.wait_for(self._stop_event.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+        while not self._stop_event.is_set():
+            try:
+                await self.check()
+            except Exception:
+                logger.exception(f"Error checking {self.url}")
+            try:
+                await asyncio.wait_for(
+                    self._stop_event.wait(), self.interval or interval
+                )
+            except asyncio.TimeoutError:
+                pass
+        self.storage.flush()
+        logger.info(f"Stopped watching {self.url}")
+
+    def stop(self) -> None:
+        """Stop the listen() loop after the current check."""
+        if self._stop_event is not None:
+            self._stop_event.set()
+
+    async def close(self) -> None:
+        """Close the aiohttp session if it was created by this watcher."""
+        if self._session is not None and self._should_close_session:
+            await self._session.close()
+            self._session = None
+
+    async def __aenter__(self) -> "AsyncScoutRSS":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        self.stop()
+        await self.close()
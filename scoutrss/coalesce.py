@@ -0,0 +1,112 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from .fetch import Response
+
+
+class SharedFeed:
+    """A downloaded document shared by every watcher of its URL.
+
+    The document is parsed at most once, by the first watcher that needs it.
+    """
+
+    __slots__ = ("response", "_parsed", "_lock")
+
+    def __init__(self, response: Response):
+        self.response = response
+        self._parsed: Any = None
+        self._lock = threading.Lock()
+
+    def parsed(self, parse: Callable[[Response], Any]) -> Any:
+        with self._lock:
+            if self._parsed is None:
+                self._parsed = parse(self.response)
+            return self._parsed
+
+
+class _Flight:
+    __slots__ = ("done", "feed", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.feed: Optional[SharedFeed] = None
+        self.error: Optional[BaseException] = None
+
+
+class FeedCache:
+    def __init__(self, ttl: float = 30, max_feeds: int = 1024):
+        """
+        Fetch/parse cache shared by watchers that subscribe to the same URL.
+
+        Concurrent checks of one URL wait for a single request, and the
+        document is reused for `ttl` seconds. Each watcher still filters the
+        entries with its own last_seen and calls its own callback.
+
+        :param ttl: seconds a downloaded document is reused for (default: 30)
+        :param max_feeds: documents kept for revalidation; the least recently used are dropped
+        """
+        self.ttl = ttl
+        self.max_feeds = max_feeds
+        self._feeds: "OrderedDict[str, Tuple[float, SharedFeed]]" = OrderedDict()
+        self._flights: Dict[str, _Flight] = {}
+        self._lock = threading.Lock()
+        self._clock = time.monotonic
+
+    def get(self, url: str, fetch: Callable[..., Response]) -> SharedFeed:
+        """The document at url, downloaded with fetch(url, etag=, modified=) if it has expired.
+
+        An expired document is revalidated with its own ETag/Last-Modified,
+        so a 304 keeps the already parsed entries. Errors are raised to
+        every watcher waiting on the request and are not cached.
+        """
+        with self._lock:
+            cached = self._feeds.get(url)
+            if cached is not None and cached[0] > self._clock():
+                self._feeds.move_to_end(url)
+                return cached[1]
+            flight = self._flights.get(url)
+            leader = flight is None
+            if leader:
+                flight = self._flights[url] = _Flight()
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.feed
+
+        try:
+            previous = cached[1] if cached is not None else None
+            headers = previous.response.headers if previous is not None else {}
+            response = fetch(
+                url, etag=headers.get("etag"), modified=headers.get("last-modified")
+            )
+            if response.status == 304 and previous is not None:
+                feed = previous
+            else:
+                feed = SharedFeed(response)
+            flight.feed = feed
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[url]
+                if flight.feed is not None:
+                    self._feeds[url] = (self._clock() + self.ttl, flight.feed)
+                    self._feeds.move_to_end(url)
+                    while len(self._feeds) > self.max_feeds:
+                        self._feeds.popitem(last=False)
+            flight.done.set()
+        return feed
+
+    def discard(self, url: str) -> None:
+        """Forget the document at url."""
+        with self._lock:
+            self._feeds.pop(url, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._feeds.clear()
@@ -0,0 +1,64 @@
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Optional, Sequence, Tuple, Type
+
+
+class Entry:
+    """Compact record of a feed entry holding only the configured fields.
+
+    Made by record_type(); fields missing from the entry are None and
+    ``published``/``updated`` are aware datetimes. Supports attribute
+    access, ``entry["title"]`` and ``entry.get("title")``.
+    """
+
+    __slots__ = ("_published", "_key")
+    _fields: Tuple[str, ...] = ()
+
+    def __init__(
+        self,
+        values: Sequence[Any],
+        published: Optional[datetime] = None,
+        key: Optional[bytes] = None,
+    ):
+        for name, value in zip(self._fields, values):
+            setattr(self, name, value)
+        self._published = published
+        self._key = key  # SeenIndex key, when the watcher has one
+
+    def get(self, name: str, default: Any = None) -> Any:
+        return getattr(self, name) if name in self._fields else default
+
+    def __getitem__(self, name: str) -> Any:
+        if name not in self._fields:
+            raise KeyError(name)
+        return getattr(self, name)
+
+    def _asdict(self) -> dict:
+        return {name: getattr(self, name) for name in self._fields}
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Entry):
+            return NotImplemented
+        return self._fields == other._fields and self._asdict() == other._asdict()
+
+    def __repr__(self) -> str:
+        values = ", ".join(f"{k}={v!r}" for k, v in self._asdict().items())
+        return f"Entry({values})"
+
+    def __reduce__(self):
+        # record types are made at runtime, so pickle by field names
+        values = tuple(getattr(self, name) for name in self._fields)
+        return _rebuild, (self._fields, values, self._published, self._key)
+
+
+@lru_cache(maxsize=None)
+def record_type(fields: Tuple[str, ...]) -> Type[Entry]:
+    """The Entry subclass with one slot per field name."""
+    for name in fields:
+        if not name.isidentifier() or name.startswith("_"):
+            raise ValueError(f"Invalid entry field: {name!r}")
+    return type("Entry", (Entry,), {"__slots__": fields, "_fields": fields})
+
+
+def _rebuild(fields, values, published, key) -> Entry:
+    return record_type(fields)(values, published, key)
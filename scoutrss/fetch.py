@@ -0,0 +1,375 @@
+import base64
+import hashlib
+import os
+import re
+import ssl
+import threading
+import time
+import zlib
+from collections import defaultdict
+from email.utils import formatdate
+from http.client import (
+    HTTPConnection,
+    HTTPResponse,
+    HTTPSConnection,
+    RemoteDisconnected,
+)
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from urllib.error import HTTPError
+from urllib.parse import quote, unquote, urljoin, urlsplit
+from urllib.request import getproxies, proxy_bypass_environment, urlopen
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional
+    brotli = None
+
+USER_AGENT = "scoutrss (+https://github.com/viperadnan-git/scoutrss)"
+ACCEPT_ENCODING = "gzip, deflate, br" if brotli is not None else "gzip, deflate"
+
+_REDIRECTS = {301, 302, 303, 307, 308}
+# characters left as they are when percent-quoting a request target
+_TARGET_SAFE = "/%?&=;:@+$,!~*'()[]"
+_CHUNK_SIZE = 64 * 1024
+
+
+# feed-level dates that many generators bump on every request
+_VOLATILE = re.compile(
+    rb"<((?:\w+:)?(?:lastBuildDate|pubDate|updated|date))\b[^>]*>[^<]*</\1\s*>"
+)
+_FIRST_ENTRY = re.compile(rb"<(?:\w+:)?(?:item|entry)[\s>]")
+
+
+class Response(NamedTuple):
+    status: int
+    body: bytes
+    headers: Dict[str, str]  # lower-cased names
+    url: str
+    connect: float = 0.0  # seconds spent opening connections (DNS, TCP, TLS)
+
+
+class ResponseTooLarge(Exception):
+    """The response body exceeded the fetcher's max_size."""
+
+
+class _Decoder:
+    """Incremental Content-Encoding decoder."""
+
+    def __init__(self, encoding: str):
+        self._brotli = False
+        self._raw_fallback = False
+        if encoding == "gzip":
+            self._obj = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        elif encoding == "deflate":
+            self._obj = zlib.decompressobj()
+            self._raw_fallback = True  # some servers send raw deflate
+        elif encoding == "br" and brotli is not None:
+            self._obj = brotli.Decompressor()
+            self._brotli = True
+        else:
+            self._obj = None
+
+    def decode(self, data: bytes) -> bytes:
+        if self._obj is None:
+            return data
+        if self._brotli:
+            return self._obj.process(data)
+        try:
+            return self._obj.decompress(data)
+        except zlib.error:
+            if not self._raw_fallback:
+                raise
+            self._raw_fallback = False
+            self._obj = zlib.decompressobj(-zlib.MAX_WBITS)
+            return self._obj.decompress(data)
+
+    def flush(self) -> bytes:
+        if self._obj is None or self._brotli:
+            return b""
+        return self._obj.flush()
+
+
+class Fetcher:
+    def __init__(
+        self,
+        connect_timeout: float = 10,
+        read_timeout: float = 30,
+        max_size: int = 16 * 1024 * 1024,
+        max_idle_per_host: int = 4,
+        max_redirects: int = 5,
+        user_agent: str = USER_AGENT,
+        ssl_context: Optional[ssl.SSLContext] = None,
+        proxies: Optional[Dict[str, str]] = None,
+    ):
+        """
+        HTTP client that keeps connections alive and reuses them across feeds on the same host.
+
+        Safe to share between threads; each request takes a connection from
+        the pool for its duration. Local paths and other URL schemes, such
+        as ``file://``, are read with urllib instead.
+
+        :param connect_timeout: seconds to wait for a connection (default: 10)
+        :param read_timeout: seconds to wait for each read from the server (default: 30)
+        :param max_size: largest accepted body in bytes, after decompression (default: 16 MiB)
+        :param max_idle_per_host: idle connections kept per host (default: 4)
+        :param max_redirects: redirects followed before giving up (default: 5)
+        :param user_agent: User-Agent header sent with each request
+        :param ssl_context: TLS settings shared by all connections (default: system defaults)
+        :param proxies: proxy URL per scheme, plus ``no`` for hosts to reach directly, like urllib's (default: from the ``HTTP_PROXY``/``HTTPS_PROXY``/``NO_PROXY`` environment)
+        """
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.max_size = max_size
+        self.max_idle_per_host = max_idle_per_host
+        self.max_redirects = max_redirects
+        self.user_agent = user_agent
+        self._ssl_context = ssl_context or ssl.create_default_context()
+        self.proxies = getproxies() if proxies is None else proxies
+        self._idle: Dict[tuple, List[HTTPConnection]] = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def _connection(self, key: tuple) -> Tuple[HTTPConnection, bool]:
+        """An idle connection for key, or a new one; returns (connection, reused)."""
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                return idle.pop(), True
+        scheme, host, port, proxy = key
+        if proxy is not None:
+            proxy_host, proxy_port, auth = proxy
+            if scheme == "https":
+                # TLS to the feed's host through a CONNECT tunnel
+                conn: HTTPConnection = HTTPSConnection(
+                    proxy_host,
+                    proxy_port,
+                    timeout=self.connect_timeout,
+                    context=self._ssl_context,
+                )
+                conn.set_tunnel(
+                    host, port, headers=_basic_auth("Proxy-Authorization", auth)
+                )
+            else:
+                conn = HTTPConnection(
+                    proxy_host, proxy_port, timeout=self.connect_timeout
+                )
+        elif scheme == "https":
+            conn = HTTPSConnection(
+                host, port, timeout=self.connect_timeout, context=self._ssl_context
+            )
+        else:
+            conn = HTTPConnection(host, port, timeout=self.connect_timeout)
+        return conn, False
+
+    def _proxy(self, scheme: str, host: str) -> Optional[Tuple[str, int, str]]:
+        """The (host, port, credentials) of the proxy for a URL, or None to connect directly."""
+        url = self.proxies.get(scheme)
+        if not url or proxy_bypass_environment(host, self.proxies):
+            return None
+        parts = urlsplit(url if "://" in url else f"http://{url}")
+        if not parts.hostname:
+            return None
+        auth = ""
+        if parts.username is not None:
+            auth = f"{unquote(parts.username)}:{unquote(parts.password or '')}"
+        return parts.hostname, parts.port or 8080, auth
+
+    def _release(self, key: tuple, conn: HTTPConnection) -> None:
+        with self._lock:
+            idle = self._idle[key]
+            if len(idle) < self.max_idle_per_host:
+                idle.append(conn)
+                return
+        conn.close()
+
+    def _request(self, url: str, headers: Dict[str, str]):
+        parts = urlsplit(url)
+        if not parts.hostname:
+            raise ValueError(f"Unsupported URL: {url}")
+        port = parts.port or (443 if parts.scheme == "https" else 80)
+        proxy = self._proxy(parts.scheme, parts.hostname)
+        key = (parts.scheme, parts.hostname, port, proxy)
+        path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        path = quote(path, safe=_TARGET_SAFE)
+        if parts.username is not None and "Authorization" not in headers:
+            auth = f"{unquote(parts.username)}:{unquote(parts.password or '')}"
+            headers = {**headers, **_basic_auth("Authorization", auth)}
+        if proxy is not None and parts.scheme == "http":
+            # plain HTTP proxies take the absolute URL
+            path = f"http://{parts.netloc.rpartition('@')[2]}{path}"
+            headers = {**headers, **_basic_auth("Proxy-Authorization", proxy[2])}
+
+        connect = 0.0
+        while True:
+            conn, reused = self._connection(key)
+            try:
+                if not reused:
+                    start = time.perf_counter()
+                    conn.connect()
+                    connect += time.perf_counter() - start
+                conn.request("GET", path, headers=headers)
+                if conn.sock is not None:
+                    conn.sock.settimeout(self.read_timeout)
+                return key, conn, conn.getresponse(), connect
+            except (RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                conn.close()
+                if not reused:
+                    raise
+                # the server dropped an idle keep-alive connection; try another
+            except BaseException:
+                conn.close()
+                raise
+
+    def _read(self, response: HTTPResponse, encoding: str) -> bytes:
+        length = response.getheader("content-length")
+        if length and length.isdigit() and int(length) > self.max_size:
+            raise ResponseTooLarge(f"{length} bytes")
+        decoder = _Decoder(encoding)
+        chunks = []
+        size = 0
+        while True:
+            chunk = response.read(_CHUNK_SIZE)
+            if not chunk:
+                break
+            data = decoder.decode(chunk)
+            size += len(data)
+            if size > self.max_size:
+                raise ResponseTooLarge(f"more than {self.max_size} bytes")
+            chunks.append(data)
+        chunks.append(decoder.flush())
+        return b"".join(chunks)
+
+    def fetch(
+        self, url: str, etag: Optional[str] = None, modified: Optional[str] = None
+    ) -> Response:
+        """Download a feed, sending conditional request headers when validators are given.
+
+        A 304 response is returned with an empty body; other HTTP errors
+        raise urllib.error.HTTPError and network errors raise OSError. The
+        returned body is decompressed, and the headers carry a
+        ``content-location`` so relative links can be resolved by the parser.
+        Like feedparser, ``feed:`` URLs are fetched over HTTP and credentials
+        in the URL are sent with Basic authentication.
+        """
+        url = _feed_url(url)
+        if urlsplit(url).scheme not in ("http", "https"):
+            return self._fetch_other(url, modified)
+        headers = {
+            "User-Agent": self.user_agent,
+            "Accept-Encoding": ACCEPT_ENCODING,
+            "Accept": "application/rss+xml, application/atom+xml, application/xml;q=0.9, */*;q=0.8",
+        }
+        if etag:
+            headers["If-None-Match"] = etag
+        if modified:
+            headers["If-Modified-Since"] = modified
+
+        connect = 0.0
+        for _ in range(self.max_redirects + 1):
+            key, conn, response, seconds = self._request(url, headers)
+            connect += seconds
+            try:
+                response_headers = {k.lower(): v for k, v in response.getheaders()}
+                location = response_headers.get("location")
+                if response.status in _REDIRECTS and location:
+                    response.read()
+                    url = urljoin(url, location)
+                    continue
+                if response.status == 304:
+                    response.read()
+                    return Response(304, b"", response_headers, url, connect)
+                if response.status >= 400:
+                    response.read()
+                    raise HTTPError(
+                        url, response.status, response.reason, response.msg, None
+                    )
+
+                encoding = response_headers.pop("content-encoding", "").strip().lower()
+                body = self._read(response, encoding)
+                response_headers.setdefault("content-location", url)
+                return Response(response.status, body, response_headers, url, connect)
+            except BaseException:
+                conn.close()
+                conn = None
+                raise
+            finally:
+                if conn is not None:
+                    if response.will_close:
+                        conn.close()
+                    else:
+                        self._release(key, conn)
+        raise HTTPError(url, 310, "Too many redirects", response.msg, None)
+
+    def _fetch_other(self, url: str, modified: Optional[str]) -> Response:
+        """Read a local path, or a URL urllib supports, such as file://."""
+        scheme = urlsplit(url).scheme
+        if not scheme or (len(scheme) == 1 and os.name == "nt"):  # drive letter
+            with open(url, "rb") as f:
+                body = f.read(self.max_size + 1)
+            headers = {"last-modified": formatdate(os.stat(url).st_mtime, usegmt=True)}
+        else:
+            with urlopen(url, timeout=self.read_timeout) as response:
+                body = response.read(self.max_size + 1)
+                headers = {k.lower(): v for k, v in response.headers.items()}
+        if len(body) > self.max_size:
+            raise ResponseTooLarge(f"more than {self.max_size} bytes")
+        headers.setdefault("content-location", url)
+        if modified and headers.get("last-modified") == modified:
+            return Response(304, b"", headers, url)
+        return Response(200, body, headers, url)
+
+    def close(self) -> None:
+        """Close every idle connection."""
+        with self._lock:
+            idle, self._idle = self._idle, defaultdict(list)
+        for connections in idle.values():
+            for conn in connections:
+                conn.close()
+
+
+def _basic_auth(header: str, auth: str) -> Dict[str, str]:
+    if not auth:
+        return {}
+    token = base64.b64encode(auth.encode()).decode()
+    return {header: f"Basic {token}"}
+
+
+def _feed_url(url: str) -> str:
+    """Map the ``feed:`` pseudo-scheme to the URL it stands for."""
+    if url[:5].lower() != "feed:":
+        return url
+    rest = url[5:]
+    return rest if rest.lower().startswith(("http:", "https:")) else f"http:{rest}"
+
+
+_default_fetcher: Optional[Fetcher] = None
+_default_lock = threading.Lock()
+
+
+def default_fetcher() -> Fetcher:
+    """The Fetcher shared by every watcher that isn't given its own."""
+    global _default_fetcher
+    with _default_lock:
+        if _default_fetcher is None:
+            _default_fetcher = Fetcher()
+        return _default_fetcher
+
+
+def fetch(
+    url: str, etag: Optional[str] = None, modified: Optional[str] = None
+) -> Response:
+    """Download a feed with the shared default Fetcher."""
+    return default_fetcher().fetch(url, etag=etag, modified=modified)
+
+
+def content_digest(body: bytes) -> str:
+    """Hash a feed document, ignoring the volatile dates in its header.
+
+    Only the part before the first item/entry is normalized, so a changed
+    entry date still changes the hash.
+    """
+    match = _FIRST_ENTRY.search(body)
+    split = match.start() if match else len(body)
+    header = _VOLATILE.sub(b"", body[:split])
+    digest = hashlib.blake2b(header, digest_size=16)
+    digest.update(body[split:])
+    return digest.hexdigest()
@@ -0,0 +1,226 @@
+import logging
+import math
+import threading
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from .result import CheckResult
+
+logger = logging.getLogger(__name__)
+
+Listener = Callable[[CheckResult, Optional[BaseException]], Any]
+
+PHASES = ("connect", "fetch", "parse", "filter", "deliver", "storage")
+
+_listeners: List[Listener] = []
+_listeners_lock = threading.Lock()
+
+
+def add_listener(listener: Listener) -> None:
+    """Call listener(result, error) after every check of every watcher.
+
+    `error` is the exception that ended the check, if any; `result` then
+    holds what was measured before it.
+    """
+    with _listeners_lock:
+        _listeners.append(listener)
+
+
+def remove_listener(listener: Listener) -> None:
+    with _listeners_lock:
+        if listener in _listeners:
+            _listeners.remove(listener)
+
+
+def notify(
+    result: CheckResult,
+    error: Optional[BaseException] = None,
+    listeners: Tuple[Listener, ...] = (),
+) -> None:
+    """Pass a finished check to the given and the global listeners; their errors are logged."""
+    with _listeners_lock:
+        everyone = listeners + tuple(_listeners)
+    for listener in everyone:
+        try:
+            listener(result, error)
+        except Exception:
+            logger.exception("Error in check listener")
+
+
+def _quantile(ordered: List[float], q: float) -> float:
+    # nearest rank
+    return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+
+def _value(value: float) -> str:
+    # exact: %g would print a large counter as 1.23457e+06
+    if isinstance(value, int):
+        return str(value)
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(value)
+
+
+def _labels(**labels: str) -> str:
+    return "{" + ",".join(f'{k}="{v}"' for k, v in labels.items()) + "}"
+
+
+class Metrics:
+    def __init__(self, window: int = 1000, quantiles: Tuple[float, ...] = (0.5, 0.99)):
+        """
+        Aggregate the checks of every watcher for monitoring.
+
+        A Metrics instance is a check listener: pass it to add_listener()
+        (or to a watcher's `listeners`) and export with prometheus().
+
+        :param window: recent checks that latency quantiles and the error ratio are computed over
+        :param quantiles: latency quantiles to export (default: p50 and p99)
+        """
+        self.window = window
+        self.quantiles = quantiles
+        self.counters: Dict[str, float] = dict.fromkeys(
+            (
+                "checks",
+                "errors",
+                "not_modified",
+                "unchanged",
+                "bytes",
+                "parsed",
+                "new",
+                "delivered",
+                "storage_calls",
+            ),
+            0,
+        )
+        self.duration_sum = 0.0
+        self.phase_sums: Dict[str, float] = dict.fromkeys(PHASES, 0.0)
+        self.phase_counts: Dict[str, int] = dict.fromkeys(PHASES, 0)
+        self._durations: Deque[float] = deque(maxlen=window)
+        self._phases: Dict[str, Deque[float]] = {
+            phase: deque(maxlen=window) for phase in PHASES
+        }
+        self._errors: Deque[bool] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def __call__(
+        self, result: CheckResult, error: Optional[BaseException] = None
+    ) -> None:
+        failed = error is not None or (
+            result.status is not None and result.status >= 400
+        )
+        with self._lock:
+            counters = self.counters
+            counters["checks"] += 1
+            counters["errors"] += failed
+            counters["not_modified"] += result.not_modified
+            counters["unchanged"] += result.unchanged
+            counters["bytes"] += result.bytes
+            counters["parsed"] += result.parsed
+            counters["new"] += result.new
+            counters["delivered"] += result.delivered
+            counters["storage_calls"] += result.storage_calls
+            self.duration_sum += result.duration
+            self._durations.append(result.duration)
+            self._errors.append(failed)
+            for phase, seconds in result.timings.items():
+                if phase in self._phases:
+                    self.phase_sums[phase] += seconds
+                    self.phase_counts[phase] += 1
+                    self._phases[phase].append(seconds)
+
+    def latency(self, q: float, phase: Optional[str] = None) -> Optional[float]:
+        """Quantile q of the recent check (or phase) durations in seconds; None without samples."""
+        with self._lock:
+            samples = sorted(self._durations if phase is None else self._phases[phase])
+        return _quantile(samples, q) if samples else None
+
+    def error_ratio(self) -> float:
+        """Share of the recent checks that raised or got an HTTP error."""
+        with self._lock:
+            return sum(self._errors) / len(self._errors) if self._errors else 0.0
+
+    def prometheus(self, prefix: str = "scoutrss") -> str:
+        """The metrics in the Prometheus text exposition format."""
+        with self._lock:
+            counters = dict(self.counters)
+            durations = sorted(self._durations)
+            phases = {phase: sorted(samples) for phase, samples in self._phases.items()}
+            phase_sums = dict(self.phase_sums)
+            phase_counts = dict(self.phase_counts)
+            duration_sum = self.duration_sum
+            errors = list(self._errors)
+
+        lines = []
+
+        def metric(name, kind, help, samples):
+            lines.append(f"# HELP {prefix}_{name} {help}")
+            lines.append(f"# TYPE {prefix}_{name} {kind}")
+            for suffix, labels, value in samples:
+                lines.append(f"{prefix}_{name}{suffix}{labels} {_value(value)}")
+
+        def summary(samples, labels):
+            if not samples:
+                return []
+            return [
+                ("", _labels(**labels, quantile=str(q)), _quantile(samples, q))
+                for q in self.quantiles
+            ]
+
+        metric(
+            "check_duration_seconds",
+            "summary",
+            f"Duration of checks; quantiles over the last {self.window}.",
+            summary(durations, {})
+            + [
+                ("_sum", "", duration_sum),
+                ("_count", "", counters["checks"]),
+            ],
+        )
+        rows = []
+        for phase in PHASES:
+            rows += summary(phases[phase], {"phase": phase})
+            rows.append(("_sum", _labels(phase=phase), phase_sums[phase]))
+            rows.append(("_count", _labels(phase=phase), phase_counts[phase]))
+        metric(
+            "check_phase_seconds",
+            "summary",
+            f"Time spent per check phase; quantiles over the last {self.window}.",
+            rows,
+        )
+        for name, key, help in (
+            ("checks_total", "checks", "Checks run."),
+            (
+                "check_errors_total",
+                "errors",
+                "Checks that raised or got an HTTP error.",
+            ),
+            ("not_modified_total", "not_modified", "Checks answered with 304."),
+            (
+                "unchanged_total",
+                "unchanged",
+                "Checks whose document hash was unchanged.",
+            ),
+            ("fetched_bytes_total", "bytes", "Bytes downloaded, after decompression."),
+            ("entries_parsed_total", "parsed", "Entries parsed."),
+            ("entries_new_total", "new", "New entries found."),
+            (
+                "entries_delivered_total",
+                "delivered",
+                "Entries delivered and committed.",
+            ),
+            (
+                "storage_calls_total",
+                "storage_calls",
+                "Storage adapter calls made by checks.",
+            ),
+        ):
+            metric(name, "counter", help, [("", "", counters[key])])
+        metric(
+            "check_error_ratio",
+            "gauge",
+            f"Share of the last {self.window} checks that failed.",
+            [("", "", sum(errors) / len(errors) if errors else 0.0)],
+        )
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,23 @@
+import xml.etree.ElementTree as ET
+from typing import List, Union
+
+
+def read_opml(source: Union[str, bytes]) -> List[str]:
+    """Feed urls of an OPML subscription list, in document order and without duplicates.
+
+    Nested outlines (folders) are walked; outlines without an ``xmlUrl``
+    are skipped.
+
+    :param source: path to the OPML file, or its content as bytes
+    """
+    root = (
+        ET.fromstring(source)
+        if isinstance(source, bytes)
+        else ET.parse(source).getroot()
+    )
+    urls = {}
+    for outline in root.iter("outline"):
+        url = (outline.get("xmlUrl") or "").strip()
+        if url:
+            urls.setdefault(url, None)
+    return list(urls)
@@ -0,0 +1,420 @@
+import bisect
+import heapq
+import json
+import logging
+import mmap
+import os
+import pickle
+import queue
+import struct
+import threading
+import time
+import zlib
+from collections import deque
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# each record: payload length, CRC32 of the payload, pickled (id, delivered)
+_HEADER = struct.Struct("<II")
+
+# offset, end, watcher id, item
+Record = Tuple[int, int, str, Any]
+
+
+class Outbox:
+    def __init__(
+        self,
+        path: str = "scoutrss.outbox",
+        workers: int = 1,
+        segment_size: int = 16 * 1024 * 1024,
+        retry_delay: float = 1.0,
+        max_retry_delay: float = 300.0,
+        max_attempts: Optional[int] = None,
+        ack_interval: float = 1.0,
+    ):
+        """
+        Durable queue between polling and callbacks.
+
+        Watchers append new entries to a segmented, append-only log in `path`
+        and advance last_seen once the entries are on disk; delivery workers
+        drain the log and call each watcher's callback, retrying until it
+        succeeds. Delivery is at-least-once, and in order per watcher when
+        workers=1. While a watcher's callback keeps failing (or no callback
+        is registered for it), its entries wait in memory and the other
+        watchers' entries are delivered meanwhile.
+
+        :param path: directory holding the log segments and the acknowledged offset
+        :param workers: number of delivery threads (default: 1)
+        :param segment_size: bytes after which a new segment is started; fully acknowledged segments are deleted
+        :param retry_delay: seconds before the first retry of a failed callback, doubled after each failure
+        :param max_retry_delay: longest delay between retries (default: 5 minutes)
+        :param max_attempts: drop an entry after this many failed attempts (default: retry forever)
+        :param ack_interval: seconds between writes of the acknowledged offset; a crash redelivers at most this much
+        """
+        self._dir = Path(path)
+        self._dir.mkdir(parents=True, exist_ok=True)
+        self.workers = workers
+        self.segment_size = segment_size
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.max_attempts = max_attempts
+        self.ack_interval = ack_interval
+
+        self._lock = threading.Lock()
+        self._appended = threading.Condition(self._lock)
+        self._sync_lock = threading.Lock()
+        self._ack_lock = threading.Lock()
+        self._callbacks: Dict[str, Tuple[Callable, bool]] = {}
+        self._maps: Dict[int, mmap.mmap] = {}
+
+        self._segments = sorted(int(p.stem) for p in self._dir.glob("*.log"))
+        if not self._segments:
+            self._segments = [self._ack_file_offset()]
+        base = self._segments[-1]
+        self._recover(base)
+        self._writer = open(self._segment_path(base), "ab")
+        self._write_end = base + self._writer.tell()
+        self._durable_end = self._write_end
+
+        self._acked = max(self._ack_file_offset(), self._segments[0])
+        self._ack_saved = self._acked
+        self._ack_time = time.monotonic()
+        self._done: Dict[int, int] = {}  # acknowledged past _acked: start -> end
+        self._read = self._acked
+
+        # watchers whose oldest undelivered record failed: their records in
+        # order, the failed attempts of the first one and when to retry it
+        self._parked: Dict[str, Deque[Record]] = {}
+        self._attempts: Dict[str, int] = {}
+        self._retry_at: Dict[str, float] = {}
+        self._retries: List[Tuple[float, str]] = []
+
+        # records and whether each is the first of its watcher's parked ones
+        self._queue: "queue.Queue[Optional[Tuple[Record, bool]]]" = queue.Queue(
+            maxsize=max(workers, 1)
+        )
+        self._stopping = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    # --- log files ---
+
+    def _segment_path(self, base: int) -> Path:
+        return self._dir / f"{base:020d}.log"
+
+    def _ack_file_offset(self) -> int:
+        try:
+            return json.loads((self._dir / "ack").read_text())["offset"]
+        except FileNotFoundError:
+            return 0
+
+    def _save_ack(self) -> None:
+        """Persist the acknowledged offset and delete the segments it covers.
+
+        Called without _lock held, so delivery isn't blocked on the fsync.
+        """
+        with self._ack_lock:
+            with self._lock:
+                acked = self._acked
+            if acked != self._ack_saved:
+                tmp = self._dir / f".ack.{os.getpid()}.tmp"
+                with open(tmp, "w") as f:
+                    json.dump({"offset": acked}, f)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp, self._dir / "ack")
+            with self._lock:
+                self._ack_saved = acked
+                self._ack_time = time.monotonic()
+                dropped = self._drop_segments()
+            for base, mapped in dropped:
+                if mapped is not None:
+                    mapped.close()
+                self._segment_path(base).unlink()
+
+    def _recover(self, base: int) -> None:
+        """Cut a torn record off the end of the last segment after a crash."""
+        path = self._segment_path(base)
+        data = path.read_bytes() if path.exists() else b""
+        pos = 0
+        while pos + _HEADER.size <= len(data):
+            length, crc = _HEADER.unpack_from(data, pos)
+            end = pos + _HEADER.size + length
+            if end > len(data) or zlib.crc32(data[pos + _HEADER.size : end]) != crc:
+                break
+            pos = end
+        if pos != len(data):
+            logger.warning(f"Truncating {len(data) - pos} torn bytes from {path}")
+            with open(path, "r+b") as f:
+                f.truncate(pos)
+                os.fsync(f.fileno())
+
+    # --- writing ---
+
+    def put(self, id: str, items: Sequence[Any]) -> None:
+        """Append deliveries for the watcher `id` and return once they are on disk.
+
+        Concurrent callers share fsyncs: whoever syncs first makes every
+        record written before it durable.
+        """
+        payloads = [pickle.dumps((id, item), pickle.HIGHEST_PROTOCOL) for item in items]
+        if not payloads:
+            return
+        with self._lock:
+            for payload in payloads:
+                if self._write_end - self._segments[-1] >= self.segment_size:
+                    self._roll()
+                self._writer.write(_HEADER.pack(len(payload), zlib.crc32(payload)))
+                self._writer.write(payload)
+                self._write_end += _HEADER.size + len(payload)
+            self._writer.flush()
+            end = self._write_end
+        with self._sync_lock:
+            with self._lock:
+                if self._durable_end >= end:
+                    return  # synced by another caller meanwhile
+                # a duplicate stays valid when _roll() closes the writer
+                target, fd = self._write_end, os.dup(self._writer.fileno())
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+            with self._lock:
+                self._durable_end = max(self._durable_end, target)
+                self._appended.notify_all()
+
+    def _roll(self) -> None:
+        self._writer.flush()
+        os.fsync(self._writer.fileno())
+        self._writer.close()
+        self._segments.append(self._write_end)
+        self._writer = open(self._segment_path(self._write_end), "ab")
+
+    # --- reading ---
+
+    def _map(self, base: int, needed: int) -> Optional[mmap.mmap]:
+        mapped = self._maps.get(base)
+        if mapped is None or len(mapped) < needed:
+            if mapped is not None:
+                mapped.close()
+            with open(self._segment_path(base), "rb") as f:
+                size = os.fstat(f.fileno()).st_size
+                if size == 0:
+                    return None
+                mapped = self._maps[base] = mmap.mmap(
+                    f.fileno(), 0, access=mmap.ACCESS_READ
+                )
+        return mapped
+
+    def _next(self) -> Optional[Record]:
+        """The record at the read offset, if it is durable."""
+        with self._lock:
+            if self._read >= self._durable_end:
+                return None
+            offset = self._read
+            index = bisect.bisect_right(self._segments, offset) - 1
+            base = self._segments[index]
+            last = index == len(self._segments) - 1
+        pos = offset - base
+        mapped = self._map(base, pos + _HEADER.size)
+        length, crc = _HEADER.unpack_from(mapped, pos)
+        start = pos + _HEADER.size
+        mapped = self._map(base, start + length)
+        payload = mapped[start : start + length]
+        if zlib.crc32(payload) != crc:
+            logger.error(f"Corrupt record at offset {offset}; skipping its segment")
+            if not last:
+                with self._lock:
+                    self._read = self._segments[index + 1]
+                    skipped = self._read
+                self._ack(offset, skipped)
+            return None
+        end = offset + _HEADER.size + length
+        with self._lock:
+            self._read = end
+        id, item = pickle.loads(payload)
+        return offset, end, id, item
+
+    # --- delivery ---
+
+    def register(
+        self,
+        id: str,
+        callback: Callable[[Any], Any],
+        require_confirmation: bool = False,
+    ) -> None:
+        """Deliver the entries of the watcher `id` to callback; starts the workers."""
+        self._callbacks[id] = (callback, require_confirmation)
+        with self._lock:
+            if id in self._retry_at:
+                self._schedule(id, time.monotonic())  # waiting for this callback
+        self.start()
+
+    def start(self) -> None:
+        if self._threads:
+            return
+        self._stopping.clear()
+        self._threads = [
+            threading.Thread(target=self._dispatch, name="scoutrss-outbox", daemon=True)
+        ] + [
+            threading.Thread(
+                target=self._deliver, name=f"scoutrss-outbox-{i}", daemon=True
+            )
+            for i in range(self.workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def _schedule(self, id: str, at: float) -> None:
+        """Retry the first parked record of `id` at `at` (lock held)."""
+        self._retry_at[id] = at
+        heapq.heappush(self._retries, (at, id))
+        self._appended.notify_all()
+
+    def _due(self) -> Tuple[Optional[Record], float]:
+        """The parked record whose retry is due, else the seconds until the next one."""
+        with self._lock:
+            now = time.monotonic()
+            while self._retries:
+                at, id = self._retries[0]
+                if self._retry_at.get(id) != at:
+                    heapq.heappop(self._retries)  # rescheduled or delivered
+                elif at > now:
+                    return None, at - now
+                else:
+                    heapq.heappop(self._retries)
+                    del self._retry_at[id]
+                    return self._parked[id][0], 0.0
+            return None, 0.5
+
+    def _dispatch(self) -> None:
+        while not self._stopping.is_set():
+            record, wait = self._due()
+            retry = record is not None
+            if record is None:
+                record = self._next()
+            if record is None:
+                with self._lock:
+                    self._appended.wait(min(wait, 0.5))
+                continue
+            while not self._stopping.is_set():
+                try:
+                    self._queue.put((record, retry), timeout=0.5)
+                    break
+                except queue.Full:
+                    pass
+
+    def _deliver(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                queued = self._queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            if queued is None:
+                return  # woken by close()
+            record, retry = queued
+            offset, end, id, item = record
+            if not retry:
+                with self._lock:
+                    parked = self._parked.get(id)
+                    if parked is not None:
+                        parked.append(record)  # behind the watcher's failing one
+                        continue
+            if not self._call(id, item):
+                with self._lock:
+                    attempt = self._attempts.get(id, 0) + 1
+                    if self.max_attempts is None or attempt < self.max_attempts:
+                        if not retry:
+                            self._parked[id] = deque([record])
+                        self._attempts[id] = attempt
+                        delay = self.retry_delay * 2 ** (attempt - 1)
+                        self._schedule(
+                            id, time.monotonic() + min(delay, self.max_retry_delay)
+                        )
+                        continue
+                logger.error(f"Dropping an entry for {id} after {attempt} attempts")
+            if retry:
+                with self._lock:
+                    self._attempts.pop(id, None)
+                    parked = self._parked[id]
+                    parked.popleft()
+                    if parked:
+                        self._schedule(id, time.monotonic())
+                    else:
+                        del self._parked[id]
+            self._ack(offset, end)
+
+    def _call(self, id: str, item: Any) -> bool:
+        registered = self._callbacks.get(id)
+        if registered is None:
+            logger.warning(f"No callback registered for {id}; retrying")
+            return False
+        callback, require_confirmation = registered
+        try:
+            confirm = callback(item)
+        except Exception:
+            logger.exception(f"Error in callback for {id}; retrying")
+            return False
+        if require_confirmation and not confirm:
+            logger.warning(f"Callback for {id} returned False; retrying")
+            return False
+        return True
+
+    def _ack(self, offset: int, end: int) -> None:
+        """Record a delivered record and advance the acknowledged offset."""
+        with self._lock:
+            self._done[offset] = end
+            while self._acked in self._done:
+                self._acked = self._done.pop(self._acked)
+            if self._acked == self._ack_saved:
+                return
+            if time.monotonic() - self._ack_time < self.ack_interval:
+                return
+            self._ack_time = time.monotonic()  # one save per interval
+        self._save_ack()
+
+    def _drop_segments(self) -> List[Tuple[int, Optional[mmap.mmap]]]:
+        """Forget the fully acknowledged segments (lock held); the caller deletes them."""
+        dropped = []
+        while len(self._segments) > 1 and self._segments[1] <= self._acked:
+            base = self._segments.pop(0)
+            dropped.append((base, self._maps.pop(base, None)))
+        return dropped
+
+    def pending(self) -> int:
+        """Bytes of log not yet acknowledged."""
+        with self._lock:
+            return self._write_end - self._acked
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """Stop the workers and save the acknowledged offset.
+
+        Entries still being retried stay in the log for the next start.
+        """
+        self._stopping.set()
+        with self._lock:
+            self._appended.notify_all()
+        for _ in range(self.workers):
+            try:
+                self._queue.put_nowait(None)
+            except queue.Full:
+                break  # busy workers see the stop flag on their own
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+        self._save_ack()
+        with self._lock:
+            for mapped in self._maps.values():
+                mapped.close()
+            self._maps.clear()
+            self._writer.close()
+            # records handed to workers but not acknowledged are read again
+            self._read = self._acked
+            self._done.clear()
+            self._parked.clear()
+            self._attempts.clear()
+            self._retry_at.clear()
+            self._retries.clear()
+        while not self._queue.empty():
+            self._queue.get_nowait()
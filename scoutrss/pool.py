@@ -0,0 +1,340 @@
+import heapq
+import itertools
+import logging
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union, cast
+from urllib.parse import urlsplit
+
+from .opml import read_opml
+from .schedule import TokenBucket, jitter_fraction
+from .shard import Shard
+from .socutrss import ScoutRSS
+
+logger = logging.getLogger(__name__)
+
+
+class _PoolFeed:
+    __slots__ = ("scout", "interval", "host", "next_run", "runs")
+
+    def __init__(self, scout: ScoutRSS, interval: float, next_run: float):
+        self.scout = scout
+        self.interval = interval
+        self.host = urlsplit(scout.url).hostname or ""
+        self.next_run = next_run
+        self.runs = 0
+
+
+class ScoutPool:
+    def __init__(
+        self,
+        max_workers: int = 16,
+        max_per_host: int = 4,
+        interval: float = 60,
+        tick: float = 1.0,
+        parse_workers: int = 0,
+        shard: Optional[Shard] = None,
+        jitter: float = 0.0,
+        host_rate: Optional[float] = None,
+        host_burst: float = 1.0,
+    ):
+        """
+        Poll many feeds from one process on a bounded thread pool.
+
+        Each feed keeps its own ScoutRSS.check() semantics (last_seen,
+        require_confirmation); the pool only decides when and where it runs.
+
+        :param max_workers: maximum number of checks running at once
+        :param max_per_host: maximum number of checks running at once against the same host
+        :param interval: default check interval in seconds for feeds added without one
+        :param tick: how often the pool looks for due feeds, in seconds
+        :param parse_workers: number of processes to parse feeds in, so parsing isn't limited to one core by the GIL; 0 parses in the worker threads (default: 0)
+        :param shard: share the feeds with other pools in the same Shard group; each pool only checks the feeds it owns
+        :param jitter: spread first runs over this fraction of the interval and vary each interval by ±jitter/2, deterministically per feed, so feeds added together don't poll together (default: 0)
+        :param host_rate: most checks started per second against the same host (default: unlimited)
+        :param host_burst: checks a host may get at once before host_rate applies (default: 1)
+        """
+        self.max_workers = max_workers
+        self.max_per_host = max_per_host
+        self.interval = interval
+        self.tick_interval = tick
+        self.parse_workers = parse_workers
+        self.shard = shard
+        self.jitter = jitter
+        self.host_rate = host_rate
+        self.host_burst = host_burst
+
+        self._feeds: Dict[str, _PoolFeed] = {}
+        self._queue: List[Tuple[float, int, _PoolFeed]] = []
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._inflight = 0
+        self._host_inflight: Dict[str, int] = defaultdict(int)
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._throttled = 0  # feeds held back by host limits on the last tick
+        self._submit_lag = 0.0  # largest lag of the checks submitted on the last tick
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._parse_executor: Optional[ProcessPoolExecutor] = None
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._clock = time.monotonic
+
+    def __len__(self) -> int:
+        return len(self._feeds)
+
+    def __contains__(self, id: str) -> bool:
+        return id in self._feeds
+
+    def add(self, scout: ScoutRSS, interval: Optional[float] = None) -> None:
+        """Add a feed to the pool; it is due immediately, or within its jitter.
+
+        :param scout: watcher to poll
+        :param interval: check interval in seconds (defaults to the pool interval)
+        """
+        feed = self._feed(scout, interval, self._clock())
+        with self._lock:
+            self._feeds[scout.id] = feed
+            self._push(feed)
+
+    def add_many(
+        self, scouts: Iterable[ScoutRSS], interval: Optional[float] = None
+    ) -> None:
+        """Add several feeds to the pool under one lock; all are due immediately, or within their jitter."""
+        now = self._clock()
+        feeds = [self._feed(s, interval, now) for s in scouts]
+        with self._lock:
+            for feed in feeds:
+                self._feeds[feed.scout.id] = feed
+                self._push(feed)
+
+    def _feed(
+        self, scout: ScoutRSS, interval: Optional[float], now: float
+    ) -> _PoolFeed:
+        interval = interval or self.interval
+        offset = interval * self.jitter * jitter_fraction(scout.id)
+        return _PoolFeed(scout, interval, now + offset)
+
+    def _next_interval(self, feed: _PoolFeed) -> float:
+        # adaptive watchers carry their own learned interval
+        interval = feed.scout.interval or feed.interval
+        if not self.jitter:
+            return interval
+        fraction = jitter_fraction(f"{feed.scout.id}#{feed.runs}")
+        return interval * (1 + self.jitter * (fraction - 0.5))
+
+    def import_opml(
+        self,
+        source: Union[str, bytes],
+        callback: Callable[..., Any],
+        interval: Optional[float] = None,
+        **kwargs: Any,
+    ) -> List[ScoutRSS]:
+        """Add every feed of an OPML subscription list, created with ScoutRSS.create_many().
+
+        :param source: path to the OPML file, or its content as bytes
+        :param callback: callback shared by the feeds
+        :param interval: check interval in seconds (defaults to the pool interval)
+        :param kwargs: other ScoutRSS parameters, such as storage
+        """
+        scouts = ScoutRSS.create_many(read_opml(source), callback, **kwargs)
+        self.add_many(scouts, interval)
+        return scouts
+
+    def remove(self, id: str) -> None:
+        """Remove a feed from the pool. A check already running is left to finish."""
+        with self._lock:
+            self._feeds.pop(id, None)
+
+    def _storages(self) -> list:
+        """Distinct storage adapters used by the feeds in the pool."""
+        storages = {id(f.scout.storage): f.scout.storage for f in self._feeds.values()}
+        return list(storages.values())
+
+    def _push(self, feed: _PoolFeed, at: Optional[float] = None) -> None:
+        # `at` retries a throttled feed later without changing when it was due
+        at = feed.next_run if at is None else at
+        heapq.heappush(self._queue, (at, next(self._seq), feed))
+
+    def _take(self, host: str, now: float) -> float:
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            bucket = self._buckets[host] = TokenBucket(
+                cast(float, self.host_rate), self.host_burst
+            )
+        return bucket.take(now)
+
+    def tick(self) -> int:
+        """Submit every due feed that fits within the concurrency limits.
+
+        Feeds held back by the per-host limit stay due and are retried on the
+        next tick; with host_rate, they are retried once their host has a
+        token again. Returns the number of checks submitted.
+        """
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="scoutrss"
+            )
+        if self._parse_executor is None and self.parse_workers:
+            self._parse_executor = ProcessPoolExecutor(max_workers=self.parse_workers)
+
+        if self.shard is not None:
+            try:
+                self.shard.heartbeat()
+            except Exception:
+                logger.exception("Error renewing the shard lease")
+
+        now = self._clock()
+        due = []
+        deferred = []
+        throttled = []
+        with self._lock:
+            while (
+                self._queue
+                and self._queue[0][0] <= now
+                and self._inflight < self.max_workers
+            ):
+                _, _, feed = heapq.heappop(self._queue)
+                if self._feeds.get(feed.scout.id) is not feed:
+                    continue  # removed or replaced
+                if self.shard is not None and not self.shard.owns(feed.scout.id):
+                    feed.next_run = now + feed.interval  # another worker's feed
+                    self._push(feed)
+                    continue
+                if self._host_inflight[feed.host] >= self.max_per_host:
+                    deferred.append(feed)
+                    continue
+                if self.host_rate:
+                    wait = self._take(feed.host, now)
+                    if wait:
+                        throttled.append((feed, now + wait))
+                        continue
+                self._inflight += 1
+                self._host_inflight[feed.host] += 1
+                due.append(feed)
+            for feed in deferred:
+                self._push(feed)
+            for feed, at in throttled:
+                self._push(feed, at)
+            self._throttled = len(deferred) + len(throttled)
+            self._submit_lag = max((now - f.next_run for f in due), default=0.0)
+
+        stored = self._prefetch(due)
+        for feed in due:
+            self._executor.submit(self._run, feed, stored)
+        return len(due)
+
+    def _prefetch(self, feeds: List[_PoolFeed]) -> Dict[str, Optional[datetime]]:
+        """Read last_seen for all due feeds with one get_many() per storage."""
+        by_storage: Dict[int, List[_PoolFeed]] = defaultdict(list)
+        for feed in feeds:
+            by_storage[id(feed.scout.storage)].append(feed)
+        stored: Dict[str, Optional[datetime]] = {}
+        for group in by_storage.values():
+            try:
+                stored.update(
+                    group[0].scout.storage.get_many([f.scout.id for f in group])
+                )
+            except Exception:
+                # each check falls back to reading its own state
+                logger.exception("Error reading feed state in bulk")
+        return stored
+
+    def _run(self, feed: _PoolFeed, stored: Dict[str, Optional[datetime]]) -> None:
+        started = self._clock()
+        try:
+            if self.shard is not None and not self.shard.claim(feed.scout.id):
+                pass  # leased by another worker
+            elif feed.scout.id in stored:
+                feed.scout._check(stored[feed.scout.id], self._parse_executor)
+            elif self._parse_executor is not None:
+                feed.scout._check(
+                    feed.scout.storage.get_last_seen(feed.scout.id),
+                    self._parse_executor,
+                )
+            else:
+                feed.scout.check()
+        except Exception:
+            logger.exception(f"Error checking {feed.scout.url}")
+        finally:
+            with self._lock:
+                self._inflight -= 1
+                self._host_inflight[feed.host] -= 1
+                if self._feeds.get(feed.scout.id) is feed:
+                    feed.runs += 1
+                    feed.next_run = started + self._next_interval(feed)
+                    self._push(feed)
+
+    def stats(self) -> Dict[str, float]:
+        """How far behind the pool is.
+
+        ``due`` is the number of feeds waiting past their scheduled time
+        (the queue depth) and ``lag`` how late the most overdue one is, in
+        seconds; ``submit_lag`` is the largest lag of the checks submitted
+        on the last tick and ``throttled`` the feeds it held back for their
+        host. A lag that keeps growing means the pool needs more workers or
+        a longer interval.
+        """
+        now = self._clock()
+        with self._lock:
+            waiting = [
+                feed.next_run
+                for _, _, feed in self._queue
+                if feed.next_run <= now and self._feeds.get(feed.scout.id) is feed
+            ]
+            return {
+                "feeds": len(self._feeds),
+                "due": len(waiting),
+                "inflight": self._inflight,
+                "throttled": self._throttled,
+                "lag": now - min(waiting) if waiting else 0.0,
+                "submit_lag": self._submit_lag,
+            }
+
+    def _loop(self) -> None:
+        while not self._stop_event.is_set():
+            self.tick()
+            self._stop_event.wait(self.tick_interval)
+
+    def listen(self, blocking: bool = False) -> None:
+        """
+        Start polling every feed in the pool.
+
+        :param blocking: block the current thread (default: False)
+        """
+        self._stop_event.clear()
+        logger.info(f"Watching {len(self._feeds)} feeds")
+        if blocking:
+            self._loop()
+        else:
+            self._thread = threading.Thread(
+                target=self._loop, name="scoutrss-pool", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self, wait: bool = True) -> None:
+        """Stop polling and shut down the worker threads.
+
+        :param wait: wait for running checks to finish (default: True)
+        """
+        self._stop_event.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+        self._thread = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+        if self._parse_executor is not None:
+            self._parse_executor.shutdown(wait=wait)
+            self._parse_executor = None
+        with self._lock:
+            scouts = [feed.scout for feed in self._feeds.values()]
+        for scout in scouts:
+            scout.close()  # threads of concurrent callbacks
+        for storage in self._storages():
+            storage.flush()
+        if self.shard is not None:
+            self.shard.leave()
+        logger.info(f"Stopped watching {len(self._feeds)} feeds")
@@ -0,0 +1,31 @@
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+
+@dataclass
+class CheckResult:
+    """Outcome of a single ScoutRSS.check()."""
+
+    id: str
+    url: str
+    status: Optional[int] = None  # HTTP status, when known
+    not_modified: bool = False  # the server answered 304
+    unchanged: bool = False  # the body hash matched the last processed document
+    content_hash: Optional[str] = None
+    new: int = 0  # entries newer than last_seen
+    delivered: int = 0  # entries accepted by the callback and committed
+    published: List[datetime] = field(default_factory=list)  # of the new entries
+    hint: Optional[float] = None  # server/feed suggested seconds until the next poll
+    # callback arguments (entries, or batches) in delivery order; with
+    # concurrency > 1, succeeded ones after a failure are not committed
+    succeeded: List[Any] = field(default_factory=list)
+    failed: List[Any] = field(default_factory=list)
+    bytes: int = 0  # response body size, after decompression
+    parsed: int = 0  # entries parsed from the document (after incremental trimming)
+    # seconds per phase: connect (DNS, TCP and TLS of new connections), fetch
+    # (including connect), parse, filter, deliver (callbacks and commits) and
+    # storage (every adapter call, so it overlaps deliver)
+    timings: Dict[str, float] = field(default_factory=dict)
+    storage_calls: int = 0
+    duration: float = 0.0  # seconds for the whole check
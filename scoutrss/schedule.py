@@ -0,0 +1,163 @@
+import hashlib
+import re
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from statistics import median
+from typing import List, Mapping, Optional
+
+_MAX_AGE = re.compile(r"(?:^|,)\s*max-age\s*=\s*(\d+)", re.IGNORECASE)
+
+_UPDATE_PERIODS = {
+    "hourly": 3600,
+    "daily": 86400,
+    "weekly": 7 * 86400,
+    "monthly": 30 * 86400,
+    "yearly": 365 * 86400,
+}
+
+
+def retry_after(headers: Optional[Mapping[str, str]]) -> Optional[float]:
+    """Seconds to wait according to a Retry-After header (delay or HTTP date)."""
+    value = (headers or {}).get("retry-after") or (headers or {}).get("Retry-After")
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max((when - datetime.now(tz=timezone.utc)).total_seconds(), 0.0)
+
+
+def poll_hint(
+    headers: Optional[Mapping[str, str]], feed: Optional[Mapping] = None
+) -> Optional[float]:
+    """Longest delay before the next poll suggested by the server or the feed, in seconds.
+
+    Looks at Cache-Control max-age, Retry-After, RSS <ttl> and the syndication
+    module's <sy:updatePeriod>/<sy:updateFrequency>.
+    """
+    hints = []
+    headers = {k.lower(): v for k, v in (headers or {}).items()}
+
+    match = _MAX_AGE.search(headers.get("cache-control", ""))
+    if match:
+        hints.append(float(match.group(1)))
+    after = retry_after(headers)
+    if after is not None:
+        hints.append(after)
+
+    feed = feed or {}
+    try:
+        hints.append(float(feed["ttl"]) * 60)
+    except (KeyError, TypeError, ValueError):
+        pass
+    period = _UPDATE_PERIODS.get(str(feed.get("sy_updateperiod", "")).strip().lower())
+    if period:
+        try:
+            frequency = max(int(feed.get("sy_updatefrequency") or 1), 1)
+        except (TypeError, ValueError):
+            frequency = 1
+        hints.append(period / frequency)
+
+    return max(hints) if hints else None
+
+
+class AdaptiveInterval:
+    def __init__(
+        self,
+        min_interval: float = 60,
+        max_interval: float = 6 * 3600,
+        backoff: float = 1.5,
+        factor: float = 0.5,
+        history: int = 20,
+    ):
+        """
+        Polling interval learned from a feed's publish frequency.
+
+        :param min_interval: shortest interval in seconds (default: 60)
+        :param max_interval: longest interval in seconds (default: 6 hours)
+        :param backoff: multiplier applied after a check without new entries, or a failed one
+        :param factor: fraction of the typical gap between posts to poll at (default: 0.5)
+        :param history: number of publish timestamps kept per feed
+        """
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.factor = factor
+        self.history = history
+
+    def _clamp(self, interval: float) -> float:
+        return min(max(interval, self.min_interval), self.max_interval)
+
+    def update(
+        self,
+        state: Optional[dict],
+        published: List[datetime],
+        hint: Optional[float] = None,
+        error: bool = False,
+    ) -> dict:
+        """Return the new schedule state after a check.
+
+        :param state: previous state (None for a new feed)
+        :param published: publish times of the entries that were new in this check
+        :param hint: server/feed suggested minimum delay in seconds
+        :param error: the check failed
+        """
+        state = dict(state or {})
+        interval = state.get("interval") or self.min_interval
+        times = sorted(
+            set(state.get("published", [])) | {dt.isoformat() for dt in published}
+        )[-self.history :]
+
+        if published and not error and len(times) >= 2:
+            parsed = [datetime.fromisoformat(t) for t in times]
+            gaps = [(b - a).total_seconds() for a, b in zip(parsed, parsed[1:])]
+            interval = median(gaps) * self.factor
+        elif error or not published:
+            interval *= self.backoff
+
+        if hint is not None:
+            interval = max(interval, hint)
+
+        state["interval"] = self._clamp(interval)
+        state["published"] = times
+        return state
+
+
+def jitter_fraction(key: str) -> float:
+    """A fraction in [0, 1) derived from key, the same on every run and every host."""
+    digest = hashlib.blake2b(key.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big") / 2**64
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: float = 1.0):
+        """
+        Rate limit of `rate` requests per second on average, allowing bursts of `burst`.
+
+        Not thread-safe; callers hold their own lock.
+
+        :param rate: tokens added per second
+        :param burst: most tokens held at once
+        """
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated: Optional[float] = None
+
+    def take(self, now: float) -> float:
+        """Take a token at time `now` (in seconds); returns 0, or the seconds to wait for one when none is left."""
+        if self.updated is not None:
+            self.tokens = min(
+                self.tokens + (now - self.updated) * self.rate, self.burst
+            )
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
@@ -0,0 +1,188 @@
+import base64
+import hashlib
+import math
+import sys
+from array import array
+from bisect import bisect_left
+from typing import Optional
+
+_BIG_ENDIAN = sys.byteorder == "big"  # ids are stored little-endian
+
+# feedparser maps RSS <guid> to `id`
+_KEY_FIELDS = ("id", "link")
+
+
+def _b64(data: bytes) -> str:
+    return base64.b64encode(data).decode("ascii")
+
+
+def _key(digest: bytes) -> int:
+    return int.from_bytes(digest[:8], "little")
+
+
+class _RecentIds:
+    """The `size` most recently seen entry digests, evicted least recently seen first.
+
+    Digests are kept as 8-byte ints, in a ring in the order they were added
+    and in a sorted copy for lookups, about 17 bytes per id. Eviction is
+    CLOCK-style: a digest seen again since it was added is passed over once
+    instead of being evicted.
+    """
+
+    def __init__(self, size: int, data: Optional[dict] = None):
+        self.size = size
+        self.primed = data is not None
+        self.dirty = False
+        self._ring = array("Q")  # oldest first until full, then from _hand
+        self._hand = 0
+        if data:
+            raw = base64.b64decode(data["ids"])
+            raw = raw[len(raw) % 8 :][-size * 8 :]
+            self._ring.frombytes(raw)
+            if _BIG_ENDIAN:
+                self._ring.byteswap()
+        self._sorted = array("Q", sorted(self._ring))
+        self._again = bytearray(len(self._sorted))  # seen again, by sorted index
+
+    def _index(self, key: int) -> int:
+        i = bisect_left(self._sorted, key)
+        return i if i < len(self._sorted) and self._sorted[i] == key else -1
+
+    def __contains__(self, digest: bytes) -> bool:
+        return self._index(_key(digest)) >= 0
+
+    def add(self, digest: bytes) -> None:
+        key = _key(digest)
+        i = self._index(key)
+        if i >= 0:
+            self._again[i] = 1  # recency only; saved with the next change
+            return
+        ring = self._ring
+        if len(ring) < self.size:
+            ring.append(key)
+        else:
+            hand = self._hand
+            while True:
+                j = self._index(ring[hand])
+                if not self._again[j]:
+                    break
+                self._again[j] = 0
+                hand = (hand + 1) % self.size
+            del self._sorted[j]
+            del self._again[j]
+            ring[hand] = key
+            self._hand = (hand + 1) % self.size
+        i = bisect_left(self._sorted, key)
+        self._sorted.insert(i, key)
+        self._again.insert(i, 0)
+        self.dirty = True
+
+    def dump(self) -> dict:
+        # oldest first, like the order the ids were added in
+        ids = self._ring[self._hand :] + self._ring[: self._hand]
+        if _BIG_ENDIAN:
+            ids.byteswap()
+        return {"type": "recent", "ids": _b64(ids.tobytes())}
+
+
+class _BloomIds:
+    """Two generations of Bloom filters; the older one is dropped when the newer fills up.
+
+    Membership may report false positives at about `error_rate`, never
+    false negatives for the last `size` entries added.
+    """
+
+    def __init__(self, size: int, error_rate: float, data: Optional[dict] = None):
+        self.size = size
+        self.bits = max(int(-size * math.log(error_rate) / math.log(2) ** 2), 8)
+        self.hashes = max(round(self.bits / size * math.log(2)), 1)
+        self.primed = data is not None
+        self.dirty = False
+        nbytes = (self.bits + 7) // 8
+        if data and data.get("bits_per_filter") == self.bits:
+            self.count = data["count"]
+            self._filters = [bytearray(base64.b64decode(f)) for f in data["filters"]]
+        else:
+            self.primed = False  # sized differently; start over
+            self.count = 0
+            self._filters = [bytearray(nbytes), bytearray(nbytes)]
+
+    def _positions(self, digest: bytes):
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:16], "little") | 1
+        return [(h1 + i * h2) % self.bits for i in range(self.hashes)]
+
+    @staticmethod
+    def _has(bits: bytearray, positions) -> bool:
+        return all(bits[p >> 3] & (1 << (p & 7)) for p in positions)
+
+    def __contains__(self, digest: bytes) -> bool:
+        positions = self._positions(digest)
+        return any(self._has(bits, positions) for bits in self._filters)
+
+    def add(self, digest: bytes) -> None:
+        positions = self._positions(digest)
+        current = self._filters[0]
+        if self._has(current, positions):
+            return
+        if self.count >= self.size:
+            self._filters = [bytearray(len(current)), current]
+            current = self._filters[0]
+            self.count = 0
+        for p in positions:
+            current[p >> 3] |= 1 << (p & 7)
+        self.count += 1
+        self.dirty = True
+
+    def dump(self) -> dict:
+        return {
+            "type": "bloom",
+            "bits_per_filter": self.bits,
+            "count": self.count,
+            "filters": [_b64(bytes(bits)) for bits in self._filters],
+        }
+
+
+class SeenIndex:
+    def __init__(
+        self,
+        size: int = 1000,
+        bloom: bool = False,
+        error_rate: float = 0.001,
+        updates: bool = False,
+    ):
+        """
+        Per-feed index of the entry ids (guid/id, else link) that were already delivered.
+
+        With an index, entries without a date and entries sharing a
+        timestamp are delivered once each. It should hold more ids than the
+        feed carries at a time.
+
+        :param size: ids remembered per feed (default: 1000)
+        :param bloom: keep a Bloom filter instead of the exact ids, about 3.6 KB per 1000 ids at the default error_rate (two generations of 1.8 KB)
+        :param error_rate: false positive rate of the Bloom filter; a false positive skips a new entry
+        :param updates: deliver an entry again when its updated date changes
+        """
+        self.size = size
+        self.bloom = bloom
+        self.error_rate = error_rate
+        self.updates = updates
+
+    def key(self, entry) -> Optional[bytes]:
+        """Digest identifying an entry, or None if it has neither id nor link."""
+        value = next((entry.get(f) for f in _KEY_FIELDS if entry.get(f)), None)
+        if not value:
+            return None
+        # `in` first: feedparser maps a missing updated to published, with a warning
+        if self.updates and "updated" in entry and entry.get("updated"):
+            value = f"{value}\n{entry.get('updated')}"
+        return hashlib.blake2b(str(value).encode(), digest_size=16).digest()
+
+    def load(self, data: Optional[dict]):
+        """Index state from the stored data (None, or another type, for a new index)."""
+        kind = "bloom" if self.bloom else "recent"
+        if data is not None and data.get("type") != kind:
+            data = None
+        if self.bloom:
+            return _BloomIds(self.size, self.error_rate, data)
+        return _RecentIds(self.size, data)
@@ -0,0 +1,146 @@
+import bisect
+import hashlib
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from typing import List, Optional, Set, Tuple
+
+from .storage import StorageAdapter
+
+logger = logging.getLogger(__name__)
+
+
+def _hash(value: str) -> int:
+    return int.from_bytes(
+        hashlib.blake2b(value.encode(), digest_size=8).digest(), "big"
+    )
+
+
+class Shard:
+    def __init__(
+        self,
+        storage: StorageAdapter,
+        worker: Optional[str] = None,
+        group: str = "scoutrss",
+        ttl: float = 30.0,
+        vnodes: int = 64,
+    ):
+        """
+        Split the feeds of a group of pollers between the workers that are alive.
+
+        Workers announce themselves with a lease in the shared storage and
+        renew it every ttl/3 seconds. Each feed belongs to one worker by
+        consistent hashing of its id over the live workers, so a worker
+        joining or dying only moves its share of the feeds. Before a check
+        the owner also takes a lease on the feed itself, which keeps two
+        workers with a different view of the group from polling it at once.
+
+        :param storage: storage shared by every worker; it must support leases
+        :param worker: unique name of this worker (default: host, pid and a random suffix)
+        :param group: name of the group of workers sharing the feeds
+        :param ttl: seconds a lease lasts without renewal; a dead worker's feeds move after this long
+        :param vnodes: points per worker on the hash ring; more spread the feeds more evenly
+        """
+        self.storage = storage
+        self.worker = (
+            worker or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        )
+        self.group = group
+        self.ttl = ttl
+        self.vnodes = vnodes
+        self.workers: List[str] = []
+        self._ring: List[Tuple[int, str]] = []
+        self._points: List[int] = []
+        self._held: Set[str] = set()
+        self._renewed = float("-inf")
+        self._lock = threading.Lock()
+        self._clock = time.monotonic
+
+    def _worker_lease(self, worker: str) -> str:
+        return f"{self.group}/worker/{worker}"
+
+    def _feed_lease(self, id: str) -> str:
+        return f"{self.group}/feed/{id}"
+
+    def heartbeat(self, force: bool = False) -> bool:
+        """Renew this worker's lease and reload the live workers, at most every ttl/3 seconds.
+
+        Leases on feeds that moved to another worker are released. Returns
+        True if the set of workers changed.
+        """
+        now = self._clock()
+        if not force and now - self._renewed < self.ttl / 3:
+            return False
+        self.storage.acquire_lease(
+            self._worker_lease(self.worker), self.worker, self.ttl
+        )
+        prefix = self._worker_lease("")
+        workers = sorted(
+            {name[len(prefix) :] for name in self.storage.get_leases(prefix)}
+            | {self.worker}
+        )
+        self._renewed = now
+        with self._lock:
+            if workers == self.workers:
+                return False
+            ring = sorted(
+                (_hash(f"{worker}#{i}"), worker)
+                for worker in workers
+                for i in range(self.vnodes)
+            )
+            self.workers, self._ring = workers, ring
+            self._points = [point for point, _ in ring]
+            moved = [id for id in self._held if not self._owns(id)]
+        logger.info(f"Sharding feeds between {len(workers)} workers")
+        for id in moved:
+            self.release(id)
+        return True
+
+    def _owns(self, id: str) -> bool:
+        if not self._ring:
+            return True
+        index = bisect.bisect(self._points, _hash(id)) % len(self._ring)
+        return self._ring[index][1] == self.worker
+
+    def owns(self, id: str) -> bool:
+        """Whether the feed id hashes to this worker."""
+        with self._lock:
+            return self._owns(id)
+
+    def claim(self, id: str) -> bool:
+        """Take or renew the lease on a feed this worker owns; False if it should be skipped."""
+        if not self.owns(id):
+            return False
+        try:
+            claimed = self.storage.acquire_lease(
+                self._feed_lease(id), self.worker, self.ttl
+            )
+        except Exception:
+            logger.exception(f"Error taking the lease on {id}")
+            return False
+        with self._lock:
+            if claimed:
+                self._held.add(id)
+            else:
+                self._held.discard(id)
+        return claimed
+
+    def release(self, id: str) -> None:
+        with self._lock:
+            self._held.discard(id)
+        try:
+            self.storage.release_lease(self._feed_lease(id), self.worker)
+        except Exception:
+            logger.exception(f"Error releasing the lease on {id}")
+
+    def leave(self) -> None:
+        """Release every lease so the other workers take over without waiting for them to expire."""
+        with self._lock:
+            held, self._held = list(self._held), set()
+        for id in held:
+            self.release(id)
+        self.storage.release_lease(self._worker_lease(self.worker), self.worker)
+        self._renewed = float("-inf")
@@ -1,105 +1,557 @@
-import logging
-from datetime import datetime, timezone
-from time import mktime, struct_time
-from typing import Any, Callable, List, Optional, cast
+from __future__ import annotations
 
-from feedparser import FeedParserDict, parse
+import calendar
+import logging
+from concurrent.futures import FIRST_COMPLETED, Executor, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from time import perf_counter, struct_time
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+    cast,
+)
 
+from .coalesce import FeedCache
+from .entry import Entry, record_type
+from .fetch import Fetcher, Response, content_digest, fetch
+from .metrics import Listener, notify
+from .outbox import Outbox
+from .parser import FAST_FIELDS, FeedDocument, read_feed, scan_new_items
+from .result import CheckResult
+from .schedule import AdaptiveInterval, jitter_fraction, poll_hint, retry_after
+from .seen import SeenIndex
 from .storage.adapter import StorageAdapter
 from .storage.file import FileStorage
 
+if TYPE_CHECKING:
+    from feedparser import FeedParserDict
+
 logger = logging.getLogger(__name__)
 
+_UNREAD: Any = object()  # _check() reads the stored last_seen itself
+
 
 class ScoutRSS:
     def __init__(
         self,
         url: str,
-        callback: Callable[[FeedParserDict], Any],
+        callback: Callable[[Union[FeedParserDict, List[FeedParserDict]]], Any],
         storage: Optional[StorageAdapter] = None,
         id: Optional[str] = None,
         last_seen: Optional[datetime] = None,
         require_confirmation: bool = False,
+        batch: bool = False,
+        max_batch_size: Optional[int] = None,
+        incremental: bool = False,
+        content_hash: bool = False,
+        adaptive: Optional[AdaptiveInterval] = None,
+        fetcher: Optional[Fetcher] = None,
+        feed_cache: Optional[FeedCache] = None,
+        seen: Optional[SeenIndex] = None,
+        fields: Optional[Sequence[str]] = None,
+        concurrency: int = 1,
+        callback_executor: Optional[Executor] = None,
+        outbox: Optional[Outbox] = None,
+        initialize: bool = True,
+        listeners: Sequence[Listener] = (),
     ):
         """
         :param url: RSS feed url
-        :param callback: function called once per new entry; return value is only used when require_confirmation=True
+        :param callback: function called once per new entry (or per batch when batch=True); return value is only used when require_confirmation=True
         :param storage: storage adapter (defaults to FileStorage)
         :param id: id for storing state (defaults to url)
         :param last_seen: override the last seen timestamp
         :param require_confirmation: update timestamp only if callback returns True
+        :param batch: pass the callback a list of new entries (oldest-first) and update the timestamp once per batch
+        :param max_batch_size: maximum number of entries per batch (default: all new entries)
+        :param incremental: scan newest-first feeds only until the last seen entry and parse just the new ones
+        :param content_hash: skip parsing when the response body (minus volatile header dates) is unchanged
+        :param adaptive: learn the polling interval from the feed's publish frequency and server hints
+        :param fetcher: HTTP client to download the feed with (default: a keep-alive Fetcher shared by all watchers)
+        :param feed_cache: share downloads and parses with other watchers of the same URL (incremental scanning is skipped)
+        :param seen: remember delivered entry ids, so undated entries and entries sharing a timestamp are not missed
+        :param fields: pass the callback compact Entry records holding only these fields instead of FeedParserDicts
+        :param concurrency: callbacks of one check run at a time; above 1, last_seen advances only past the contiguous successful entries
+        :param callback_executor: executor to run callbacks in when concurrency > 1 (default: a thread pool owned by the watcher)
+        :param outbox: queue new entries in this durable outbox and let its workers call the callback; last_seen advances once they are on disk
+        :param initialize: load (or store) last_seen now; False leaves storage untouched until the first check, where a stored value takes precedence over last_seen
+        :param listeners: functions called with (result, error) after each check, in addition to those added with metrics.add_listener()
         """
         self.url = url
         self.id = id or url
         self.callback = callback
         self.require_confirmation = require_confirmation
+        self.batch = batch
+        self.max_batch_size = max_batch_size
+        self.incremental = incremental
+        self.content_hash = content_hash
+        self.adaptive = adaptive
+        self.fetcher = fetcher
+        self.feed_cache = feed_cache
+        self.seen = seen
+        self._seen = None  # loaded from storage on first use
+        self.fields = tuple(dict.fromkeys(fields)) if fields else None
+        if self.fields:
+            record_type(self.fields)  # validate the names early
+        self.concurrency = max(concurrency, 1)
+        self._callback_executor = callback_executor
+        self._owns_callback_executor = callback_executor is None
+        self.outbox = outbox
+        self.interval: Optional[float] = None  # learned interval when adaptive
+        self._schedule: Optional[dict] = None
+        self.listeners = tuple(listeners)
+        self._result: Optional[CheckResult] = None  # of the running check
         self.storage = storage or FileStorage()
+        if outbox is not None:
+            outbox.register(self.id, callback, require_confirmation)
 
+        self.last_seen = last_seen
+        if not initialize:
+            return
         if last_seen:
             self._update_last_seen(last_seen)
         else:
-            stored = self.storage.get_last_seen(self.id)
-            self._update_last_seen(
-                stored if stored is not None else datetime.now(tz=timezone.utc)
+            self._load_last_seen(self.storage.get_last_seen(self.id))
+
+    @classmethod
+    def create_many(
+        cls,
+        feeds: Iterable[Union[str, Tuple[str, str]]],
+        callback: Callable[[Union[FeedParserDict, List[FeedParserDict]]], Any],
+        storage: Optional[StorageAdapter] = None,
+        **kwargs: Any,
+    ) -> List["ScoutRSS"]:
+        """Create watchers for many feeds with one bulk read and at most one bulk write.
+
+        Existing state is read with storage.get_many(); feeds without any get
+        the current time in a single set_many(). No other storage call is made
+        until each watcher's first check.
+
+        :param feeds: feed urls, or (url, id) pairs
+        :param callback: callback shared by every watcher
+        :param storage: storage adapter shared by every watcher (defaults to FileStorage)
+        :param kwargs: other ScoutRSS parameters, applied to every watcher
+        """
+        storage = storage or FileStorage()
+        specs = [(f, f) if isinstance(f, str) else (f[0], f[1] or f[0]) for f in feeds]
+        stored = storage.get_many([id for _, id in specs])
+        now = datetime.now(tz=timezone.utc)
+        missing = {id: now for id, last_seen in stored.items() if last_seen is None}
+        if missing:
+            storage.set_many(missing)
+        return [
+            cls(
+                url,
+                callback,
+                storage=storage,
+                id=id,
+                last_seen=stored.get(id) or now,
+                initialize=False,
+                **kwargs,
             )
+            for url, id in specs
+        ]
+
+    def _load_last_seen(self, stored: Optional[datetime]) -> None:
+        """Use the stored last_seen; a feed without one starts from now."""
+        if stored is not None:
+            self.last_seen = stored
+        elif self.last_seen is None:
+            self._update_last_seen(datetime.now(tz=timezone.utc))
 
     def _update_last_seen(self, dt: datetime) -> None:
-        self.storage.set_last_seen(self.id, dt)
+        with self._timed("storage"):
+            self.storage.set_last_seen(self.id, dt)
         self.last_seen = dt
 
+    @contextmanager
+    def _timed(self, phase: str) -> Iterator[None]:
+        """Add the time spent in the block to the running check's timings."""
+        result = self._result
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            if result is not None:
+                elapsed = perf_counter() - start
+                result.timings[phase] = result.timings.get(phase, 0.0) + elapsed
+                if phase == "storage":
+                    result.storage_calls += 1
+
     @staticmethod
     def _struct_to_datetime(struct: struct_time) -> datetime:
-        return datetime.fromtimestamp(mktime(struct), tz=timezone.utc)
+        return datetime.fromtimestamp(calendar.timegm(struct), tz=timezone.utc)
+
+    def _update_http_cache(self, validators: dict, cache: dict) -> None:
+        validators = {key: value for key, value in validators.items() if value}
+        if validators != cache:
+            with self._timed("storage"):
+                self.storage.set_http_cache(self.id, validators)
+
+    def _new_entries(self, entries: List[FeedParserDict]) -> List[FeedParserDict]:
+        """Return the entries to deliver, oldest-first.
+
+        With a seen index, entries whose id was already delivered are
+        skipped, entries sharing last_seen's timestamp are kept, and undated
+        entries follow the dated ones. Undated entries, and dated ones up to
+        last_seen, present when the index is created are taken as history.
+        """
+        if self.seen is None:
+            return filter_new_entries(entries, self.last_seen)
+        ids = self._seen_ids()
+        dated, undated = [], []
+        for entry in entries:
+            key = self.seen.key(entry)
+            if key is not None and key in ids:
+                ids.add(key)  # still in the feed; keep it from being evicted
+                continue
+            if entry.get("published_parsed"):
+                published = self._struct_to_datetime(entry.published_parsed)
+                if (
+                    published > self.last_seen
+                    or (key is not None and ids.primed and published == self.last_seen)
+                    or (
+                        self.seen.updates
+                        and "updated_parsed" in entry
+                        and entry.get("updated_parsed")
+                        and self._struct_to_datetime(entry.updated_parsed)
+                        > self.last_seen
+                    )
+                ):
+                    dated.append(entry)
+                elif key is not None and not ids.primed:
+                    ids.add(key)  # delivered before the index existed
+            elif key is not None:
+                if ids.primed:
+                    undated.append(entry)
+                else:
+                    ids.add(key)
+        ids.primed = True
+        dated.sort(key=lambda e: e.published_parsed)
+        return dated + undated[::-1]  # feeds list newest-first
+
+    def _seen_ids(self):
+        if self._seen is None:
+            with self._timed("storage"):
+                stored = self.storage.get_seen(self.id)
+            self._seen = cast(SeenIndex, self.seen).load(stored)
+        return self._seen
+
+    def _save_seen(self) -> None:
+        if self._seen is not None and self._seen.dirty:
+            with self._timed("storage"):
+                self.storage.set_seen(self.id, self._seen.dump())
+            self._seen.dirty = False
+
+    def _fetch(self, cache: dict) -> Response:
+        """Download the feed, sending the stored validators."""
+        fetch_fn = self.fetcher.fetch if self.fetcher is not None else fetch
+        return fetch_fn(
+            self.url, etag=cache.get("etag"), modified=cache.get("modified")
+        )
 
-    def check(self) -> None:
+    def _deliveries(self, new_entries: List[FeedParserDict]) -> list:
+        """Split new entries into callback arguments: single entries, or batches."""
+        if not self.batch:
+            return new_entries
+        size = self.max_batch_size or len(new_entries) or 1
+        return [new_entries[i : i + size] for i in range(0, len(new_entries), size)]
+
+    def _project(self, entries: list) -> list:
+        """Turn parsed entries into Entry records when fields are configured."""
+        if self.fields is None:
+            return entries
+        return project_entries(
+            entries, self.fields, self.seen.key if self.seen is not None else None
+        )
+
+    @classmethod
+    def _published(cls, entry: Any) -> Optional[datetime]:
+        if isinstance(entry, Entry):
+            return entry._published
+        if not entry.get("published_parsed"):
+            return None
+        return cls._struct_to_datetime(cast(struct_time, entry.published_parsed))
+
+    def _commit(self, delivered: Any, confirm: Any) -> bool:
+        """Advance last_seen past a delivered entry or batch; returns False to stop processing."""
+        if self.require_confirmation and not confirm:
+            logger.warning("Callback returned False, stopping at current entry")
+            return False
+        entries = delivered if self.batch else [delivered]
+        if self.seen is not None:
+            ids = self._seen_ids()
+            for entry in entries:
+                key = entry._key if isinstance(entry, Entry) else self.seen.key(entry)
+                if key is not None:
+                    ids.add(key)
+        dates = [d for d in map(self._published, entries) if d is not None]
+        if dates and dates[-1] > self.last_seen:
+            # never moves a later watermark saved by another worker backwards
+            with self._timed("storage"):
+                self.storage.advance_last_seen(self.id, dates[-1])
+            self.last_seen = dates[-1]
+        return True
+
+    def _response_validators(
+        self, response: Response, cache: dict, result: CheckResult
+    ) -> Optional[dict]:
+        """Validators of a downloaded response, or None if it needs no parsing."""
+        result.status = response.status
+        if response.status == 304:
+            result.not_modified = True
+            return None
+
+        validators = {
+            "etag": response.headers.get("etag"),
+            "modified": response.headers.get("last-modified"),
+        }
+        if (
+            self.feed_cache is not None
+            and any(validators.values())
+            and all(cache.get(key) == value for key, value in validators.items())
+        ):
+            # a shared document this watcher has already processed
+            result.not_modified = True
+            return None
+        if self.content_hash:
+            result.content_hash = validators["hash"] = content_digest(response.body)
+            if result.content_hash == cache.get("hash"):
+                result.unchanged = True
+                self._update_http_cache(validators, cache)
+                return None
+        return validators
+
+    def check(self) -> CheckResult:
         """Check for new entries in the RSS feed and invoke the callback per entry.
 
         Entries are processed oldest-first so last_seen advances progressively.
         On callback failure or False return (when require_confirmation=True),
         processing stops but previously confirmed entries remain saved.
+
+        The ETag/Last-Modified validators of the response are sent with the
+        next request, and a 304 response returns before any parsing. They are
+        only stored once every new entry has been processed, so a stopped
+        check is retried against the full feed. The same applies to the body
+        hash when content_hash=True.
         """
-        self.last_seen = self.storage.get_last_seen(self.id) or self.last_seen
+        return self._check()
 
-        parsed = parse(self.url)
+    def _check(
+        self, stored: Any = _UNREAD, parse_executor: Optional[Executor] = None
+    ) -> CheckResult:
+        """check(), optionally with the stored last_seen already read (e.g. in bulk by ScoutPool).
 
-        if not parsed.entries:
-            return
+        With a parse_executor the feed is always downloaded here and parsed
+        and filtered by parse_new_entries() in the executor, which may be a
+        process pool; delivery and commits stay in this thread. The result
+        is passed to the listeners, also when the check raises.
+        """
+        result = self._result = CheckResult(self.id, self.url)
+        start = perf_counter()
+        error: Optional[BaseException] = None
+        try:
+            if stored is _UNREAD:
+                with self._timed("storage"):
+                    stored = self.storage.get_last_seen(self.id)
+            if self.adaptive is None:
+                return self._run_check(stored, parse_executor, result)
+            try:
+                self._run_check(stored, parse_executor, result)
+            except Exception as e:
+                self._adapt([], retry_after(getattr(e, "headers", None)), error=True)
+                raise
+            failed = result.status is None or result.status >= 400
+            self._adapt(result.published, result.hint, error=failed)
+            return result
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            result.duration = perf_counter() - start
+            self._result = None
+            notify(result, error, self.listeners)
 
-        new_entries = (
-            entry
-            for entry in parsed.entries
-            if entry.get("published_parsed")
-            and self._struct_to_datetime(cast(struct_time, entry.published_parsed))
-            > self.last_seen
+    def _adapt(
+        self, published: List[datetime], hint: Optional[float], error: bool
+    ) -> None:
+        if self._schedule is None:
+            with self._timed("storage"):
+                self._schedule = self.storage.get_schedule(self.id) or {}
+        schedule = cast(AdaptiveInterval, self.adaptive).update(
+            self._schedule, published, hint=hint, error=error
         )
+        if schedule != self._schedule:
+            with self._timed("storage"):
+                self.storage.set_schedule(self.id, schedule)
+            self._schedule = schedule
+        self.interval = schedule["interval"]
 
-        # sort oldest-first so last_seen advances entry by entry
-        new_entries = sorted(
-            new_entries,
-            key=lambda e: e.published_parsed,
-        )
+    def _run_check(
+        self,
+        stored: Optional[datetime],
+        parse_executor: Optional[Executor],
+        result: CheckResult,
+    ) -> CheckResult:
+        self._load_last_seen(stored)
+
+        with self._timed("storage"):
+            cache = self.storage.get_http_cache(self.id) or {}
+        with self._timed("fetch"):
+            if self.feed_cache is None:
+                response = self._fetch(cache)
+            else:
+                shared = self.feed_cache.get(
+                    self.url, self.fetcher.fetch if self.fetcher is not None else fetch
+                )
+                response = shared.response
+        if response.connect:
+            result.timings["connect"] = response.connect
+        result.bytes = len(response.body)
+        result.hint = poll_hint(response.headers)
+        validators = self._response_validators(response, cache, result)
+        if validators is None:
+            logger.debug(f"{self.url} not modified")
+            return result
+        if self.feed_cache is not None or self.seen is not None:
+            with self._timed("parse"):
+                if self.feed_cache is not None:
+                    feed, entries = shared.parsed(
+                        parse_feed
+                        if parse_executor is None
+                        else lambda r: parse_executor.submit(parse_feed, r).result()
+                    )
+                else:
+                    args = (response, self.last_seen, self.incremental)
+                    if parse_executor is None:
+                        feed, entries = parse_entries(*args)
+                    else:
+                        feed, entries = parse_executor.submit(
+                            parse_entries, *args
+                        ).result()
+            result.parsed = len(entries)
+            with self._timed("filter"):
+                new_entries = self._project(self._new_entries(entries))
+        else:
+            # the date filter and projection run with the parse
+            args = (response, self.last_seen, self.incremental, self.fields)
+            with self._timed("parse"):
+                if parse_executor is None:
+                    feed, new_entries = parse_new_entries(*args)
+                else:
+                    feed, new_entries = parse_executor.submit(
+                        parse_new_entries, *args
+                    ).result()
+            result.parsed = feed.get("parsed", 0)
+        entries = None  # release the parse result before running callbacks
+        result.hint = poll_hint(response.headers, feed)
+
+        result.new = len(new_entries)
+        result.published = [
+            d for d in map(self._published, new_entries) if d is not None
+        ]
 
         logger.debug(f"Found {len(new_entries)} new entries for {self.url}")
 
-        for entry in new_entries:
-            entry_time = self._struct_to_datetime(
-                cast(struct_time, entry.published_parsed)
-            )
+        with self._timed("deliver"), self.storage.batch():
+            deliveries = self._deliveries(new_entries)
+            if self.outbox is not None:
+                complete = self._enqueue(deliveries, result)
+            elif self.concurrency > 1 and len(deliveries) > 1:
+                complete = self._deliver_concurrently(deliveries, result)
+            else:
+                complete = self._deliver(deliveries, result)
+            if complete:
+                self._update_http_cache(validators, cache)
+            self._save_seen()
+        return result
+
+    def _enqueue(self, deliveries: list, result: CheckResult) -> bool:
+        """Append the deliveries to the outbox, then commit them all."""
+        cast(Outbox, self.outbox).put(self.id, deliveries)
+        for delivered in deliveries:
+            self._commit(delivered, True)
+            result.succeeded.append(delivered)
+            result.delivered += len(delivered) if self.batch else 1
+        return True
+
+    def _deliver(self, deliveries: list, result: CheckResult) -> bool:
+        """Run the callback on each delivery in order; returns True if all were committed."""
+        for delivered in deliveries:
             try:
-                confirm = self.callback(entry)
-                if self.require_confirmation:
-                    if confirm:
-                        self._update_last_seen(entry_time)
-                    else:
-                        logger.warning(
-                            "Callback returned False, stopping at current entry"
-                        )
-                        break
-                else:
-                    self._update_last_seen(entry_time)
+                committed = self._commit(delivered, self.callback(delivered))
             except Exception:
                 logger.exception("Error in callback, stopping at current entry")
+                committed = False
+            if not committed:
+                result.failed.append(delivered)
+                return False
+            result.succeeded.append(delivered)
+            result.delivered += len(delivered) if self.batch else 1
+        return True
+
+    def _deliver_concurrently(self, deliveries: list, result: CheckResult) -> bool:
+        """Run up to `concurrency` callbacks at once and commit up to the watermark.
+
+        The watermark is the end of the leading run of successful
+        deliveries. Nothing new is started after a failure; callbacks
+        already running are waited for, and those that succeed after the
+        failed one are delivered again by the next check.
+        """
+        if self._callback_executor is None:
+            self._callback_executor = ThreadPoolExecutor(
+                max_workers=self.concurrency, thread_name_prefix="scoutrss-callback"
+            )
+        outcomes: dict = {}
+        running: dict = {}
+        submitted = watermark = 0
+        failed = False
+        while True:
+            while (
+                not failed
+                and submitted < len(deliveries)
+                and len(running) < self.concurrency
+            ):
+                future = self._callback_executor.submit(
+                    self.callback, deliveries[submitted]
+                )
+                running[future] = submitted
+                submitted += 1
+            if not running:
                 break
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                index = running.pop(future)
+                error = future.exception()
+                if error is not None:
+                    logger.error("Error in callback", exc_info=error)
+                    ok = False
+                elif self.require_confirmation and not future.result():
+                    logger.warning("Callback returned False")
+                    ok = False
+                else:
+                    ok = True
+                outcomes[index] = ok
+                failed = failed or not ok
+            while outcomes.get(watermark):
+                self._commit(deliveries[watermark], True)
+                result.delivered += len(deliveries[watermark]) if self.batch else 1
+                watermark += 1
+
+        for index in sorted(outcomes):
+            (result.succeeded if outcomes[index] else result.failed).append(
+                deliveries[index]
+            )
+        return watermark == len(deliveries)
 
     def listen(
         self,
@@ -107,6 +559,7 @@ class ScoutRSS:
         blocking: bool = False,
         scheduler=None,
         check_fn: Optional[Callable] = None,
+        jitter: float = 0.0,
     ) -> None:
         """
         Start watching the feed on a schedule.
@@ -117,6 +570,7 @@ class ScoutRSS:
         :param blocking: block the current thread (default: False)
         :param scheduler: existing APScheduler instance to reuse; if not provided, a new one is created and started automatically
         :param check_fn: custom callable to use instead of self.check (e.g. wrapped with retry logic)
+        :param jitter: delay the first check by up to this fraction of the interval, deterministically per feed, so watchers started together on one scheduler don't poll together (default: 0)
         """
         self._should_shutdown_scheduler = scheduler is None
         if scheduler is None:
@@ -134,22 +588,192 @@ class ScoutRSS:
         else:
             self._scheduler = scheduler
 
+        job = check_fn or self.check
+        if self.adaptive is not None:
+            job = self._adaptive_job(job)
+            interval = int(self.interval or interval)
+
         self._scheduler.add_job(
-            check_fn or self.check,
+            job,
             "interval",
             seconds=interval,
             id=f"scoutrss:{self.id}",
             max_instances=1,  # prevent overlapping runs
-            next_run_time=datetime.now(tz=timezone.utc),
+            next_run_time=datetime.now(tz=timezone.utc)
+            + timedelta(seconds=interval * jitter * jitter_fraction(self.id)),
         )
         logger.info(f"Watching {self.url} every {interval}s")
 
         if self._should_shutdown_scheduler or blocking:
             self._scheduler.start()
 
+    def _adaptive_job(self, fn: Callable) -> Callable:
+        """Wrap a scheduled check so the job follows the learned interval."""
+
+        def job():
+            try:
+                fn()
+            finally:
+                if self.interval:
+                    self._scheduler.reschedule_job(
+                        f"scoutrss:{self.id}",
+                        trigger="interval",
+                        seconds=int(self.interval),
+                    )
+
+        return job
+
     def stop(self) -> None:
         """Stop the scheduled feed watcher."""
         self._scheduler.remove_job(f"scoutrss:{self.id}")
         if self._should_shutdown_scheduler:
             self._scheduler.shutdown()
+        self.close()
+        self.storage.flush()
         logger.info(f"Stopped watching {self.url}")
+
+    def close(self) -> None:
+        """Shut down the callback thread pool the watcher created, if any."""
+        if self._owns_callback_executor and self._callback_executor is not None:
+            self._callback_executor.shutdown()
+            self._callback_executor = None
+
+
+# feed-level fields kept by parse_new_entries() for polling hints
+_HINT_FIELDS = ("ttl", "sy_updateperiod", "sy_updatefrequency")
+
+
+def filter_new_entries(
+    entries: List[FeedParserDict], last_seen: datetime
+) -> List[FeedParserDict]:
+    """Return the entries published after last_seen, oldest-first."""
+    new_entries = (
+        entry
+        for entry in entries
+        if entry.get("published_parsed")
+        and ScoutRSS._struct_to_datetime(cast(struct_time, entry.published_parsed))
+        > last_seen
+    )
+
+    # sort oldest-first so last_seen advances entry by entry
+    return sorted(
+        new_entries,
+        key=lambda e: e.published_parsed,
+    )
+
+
+def parse(*args: Any, **kwargs: Any) -> FeedParserDict:
+    """feedparser.parse(); feedparser is imported on first use, as feeds read_feed() can handle never need it."""
+    from feedparser import parse
+
+    return parse(*args, **kwargs)
+
+
+def parse_feed(
+    response: Response, body: Optional[bytes] = None
+) -> Tuple[dict, List[FeedParserDict]]:
+    """Parse a downloaded feed into its polling hint fields and entries.
+
+    `body` replaces the response body, e.g. with a trimmed document.
+    """
+    parsed = parse(
+        response.body if body is None else body, response_headers=response.headers
+    )
+    header = parsed.get("feed", {})
+    return {key: header[key] for key in _HINT_FIELDS if key in header}, parsed.entries
+
+
+def parse_entries(
+    response: Response, last_seen: datetime, incremental: bool = False
+) -> Tuple[dict, List[FeedParserDict]]:
+    """Parse a downloaded feed, trimmed to the entries after last_seen when incremental."""
+    body = response.body
+    if incremental:
+        body = scan_new_items(response.body, last_seen)
+        if body is None:
+            logger.debug(f"Falling back to a full parse for {response.url}")
+            body = response.body
+    return parse_feed(response, body)
+
+
+def project_entries(
+    entries: List[FeedParserDict],
+    fields: Sequence[str],
+    key: Optional[Callable[[FeedParserDict], Optional[bytes]]] = None,
+) -> List[Entry]:
+    """Copy the given fields of each entry into an Entry record.
+
+    ``published`` and ``updated`` become aware datetimes; `key` computes
+    the SeenIndex key kept on each record.
+    """
+    record = record_type(tuple(fields))
+    records = []
+    for entry in entries:
+        dates = {
+            name: ScoutRSS._struct_to_datetime(entry[f"{name}_parsed"])
+            if f"{name}_parsed" in entry and entry.get(f"{name}_parsed")
+            else None
+            for name in ("published", "updated")
+        }
+        values = [dates[f] if f in dates else entry.get(f) for f in record._fields]
+        records.append(record(values, dates["published"], key(entry) if key else None))
+    return records
+
+
+def parse_new_entries(
+    response: Response,
+    last_seen: datetime,
+    incremental: bool = False,
+    fields: Optional[Sequence[str]] = None,
+) -> Tuple[dict, list]:
+    """Parse a downloaded feed and keep only what a check needs.
+
+    Returns the feed's polling hint fields, plus the number of ``parsed``
+    entries, and the new entries, oldest-first, as Entry records when
+    fields are given. The full parse result is dropped here, so when this
+    runs in a worker process only the new entries are sent back.
+
+    RSS 2.0 and Atom 1.0 feeds are read with read_feed(); feedparser then
+    only parses the new entries, and not at all when the
+    fields are all FAST_FIELDS. Other feeds are parsed with feedparser.
+    """
+    document = read_feed(
+        response.body, response.headers, last_seen if incremental else None
+    )
+    if document is None:
+        logger.debug(f"Parsing {response.url} with feedparser")
+        feed, entries = parse_entries(response, last_seen, incremental)
+        feed["parsed"] = len(entries)
+        new_entries = filter_new_entries(entries, last_seen)
+        del entries
+        return feed, project_entries(new_entries, fields) if fields else new_entries
+
+    feed = dict(document.feed, parsed=len(document.items))
+    if fields and FAST_FIELDS.issuperset(fields):
+        return feed, read_new_entries(document, last_seen, fields)
+    # feedparser parses just the new entries, for complete entries
+    candidates = document.candidates(last_seen)
+    if not candidates:
+        return feed, []
+    _, entries = parse_feed(response, document.trim(candidates))
+    new_entries = filter_new_entries(entries, last_seen)
+    return feed, project_entries(new_entries, fields) if fields else new_entries
+
+
+def read_new_entries(
+    document: FeedDocument, last_seen: datetime, fields: Sequence[str]
+) -> List[Entry]:
+    """The entries of a read_feed() document published after last_seen, oldest-first, as Entry records."""
+    record = record_type(tuple(fields))
+    new_items = sorted(
+        (
+            item
+            for item in document.items
+            if item.published is not None and item.published > last_seen
+        ),
+        key=lambda item: cast(datetime, item.published),
+    )
+    return [
+        record([getattr(item, f) for f in record._fields], item.published)
+        for item in new_items
+    ]
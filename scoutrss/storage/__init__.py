@@ -1,6 +1,15 @@
 from .adapter import StorageAdapter
+from .cached import CachedStorage
 from .file import FileStorage
 from .memory import MemoryStorage
 from .mongo import MongoStorage
+from .sqlite import SqliteStorage
 
-__all__ = ["StorageAdapter", "FileStorage", "MemoryStorage", "MongoStorage"]
+__all__ = [
+    "StorageAdapter",
+    "CachedStorage",
+    "FileStorage",
+    "MemoryStorage",
+    "MongoStorage",
+    "SqliteStorage",
+]
@@ -1,7 +1,9 @@
 from __future__ import annotations
 
 from abc import ABC, abstractmethod
+from contextlib import contextmanager
 from datetime import datetime
+from typing import Iterable, Iterator, Mapping
 
 
 class StorageAdapter(ABC):
@@ -10,3 +12,91 @@ class StorageAdapter(ABC):
 
     @abstractmethod
     def set_last_seen(self, id: str, last_seen: datetime) -> None: ...
+
+    # --- Bulk operations ---
+    # The defaults loop over the single-key methods; adapters override them
+    # to read or write many feeds in one round trip.
+
+    def get_many(self, ids: Iterable[str]) -> dict[str, datetime | None]:
+        """Return the last seen timestamp of each id (None when unknown)."""
+        return {id: self.get_last_seen(id) for id in ids}
+
+    def set_many(self, mapping: Mapping[str, datetime]) -> None:
+        """Set the last seen timestamp of several ids at once."""
+        for id, last_seen in mapping.items():
+            self.set_last_seen(id, last_seen)
+
+    def advance_last_seen(self, id: str, last_seen: datetime) -> None:
+        """Set the last seen timestamp unless the stored one is already later.
+
+        Watchers commit through this, so a worker working from stale state
+        can't move the watermark backwards. The default is a plain
+        set_last_seen(); adapters shared between processes compare and set
+        atomically.
+        """
+        self.set_last_seen(id, last_seen)
+
+    def flush(self) -> None:
+        """Write any buffered changes; called when a watcher stops."""
+        return None
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """Group the writes made inside the block; adapters may commit them together."""
+        yield
+
+    # --- HTTP cache (optional) ---
+    # Adapters that don't override these never send conditional requests,
+    # so every check downloads the full feed.
+
+    def get_http_cache(self, id: str) -> dict | None:
+        """Return the stored HTTP validators (``etag``/``modified``) for ``id``."""
+        return None
+
+    def set_http_cache(self, id: str, cache: dict) -> None:
+        """Persist the HTTP validators from the latest full response for ``id``."""
+        return None
+
+    # --- Schedule (optional) ---
+    # Learned polling intervals; without these an adaptive watcher relearns
+    # its interval after a restart.
+
+    def get_schedule(self, id: str) -> dict | None:
+        """Return the adaptive polling state for ``id``."""
+        return None
+
+    def set_schedule(self, id: str, schedule: dict) -> None:
+        """Persist the adaptive polling state for ``id``."""
+        return None
+
+    # --- Seen ids (optional) ---
+    # The SeenIndex of delivered entry ids; without these the index starts
+    # empty after a restart and undated entries are learned again silently.
+
+    def get_seen(self, id: str) -> dict | None:
+        """Return the seen-id index state for ``id``."""
+        return None
+
+    def set_seen(self, id: str, seen: dict) -> None:
+        """Persist the seen-id index state for ``id``."""
+        return None
+
+    # --- Leases (optional) ---
+    # Time-limited named locks used by Shard to coordinate workers. Expiry
+    # uses wall-clock time, so hosts sharing a storage need roughly
+    # synchronized clocks.
+
+    def acquire_lease(self, name: str, owner: str, ttl: float) -> bool:
+        """Take or renew the lease ``name`` for ``ttl`` seconds.
+
+        Succeeds if the lease is free, expired or already held by ``owner``.
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not support leases")
+
+    def release_lease(self, name: str, owner: str) -> None:
+        """Give up the lease ``name`` if ``owner`` holds it."""
+        raise NotImplementedError(f"{type(self).__name__} does not support leases")
+
+    def get_leases(self, prefix: str) -> dict[str, str]:
+        """Return the owner of every unexpired lease whose name starts with ``prefix``."""
+        raise NotImplementedError(f"{type(self).__name__} does not support leases")
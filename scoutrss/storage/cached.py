@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, ContextManager, Iterable, Mapping
+
+from .adapter import StorageAdapter
+
+_LAST_SEEN = "last_seen"
+_HTTP_CACHE = "http_cache"
+_SCHEDULE = "schedule"
+_SEEN = "seen"
+
+
+def _aware(dt: datetime) -> datetime:
+    # some backends return naive UTC datetimes
+    return dt if dt.tzinfo is not None else dt.replace(tzinfo=timezone.utc)
+
+
+class CachedStorage(StorageAdapter):
+    def __init__(self, storage: StorageAdapter, ttl: float | None = None):
+        """
+        Serve reads from memory and write through to another adapter.
+
+        Meant for feeds this process is the only writer of: once a feed's
+        state has been read or written, reads of it no longer reach the
+        wrapped storage. With other writers, set a ttl or call invalidate()
+        when they change a feed. Leases always go to the wrapped storage.
+
+        :param storage: adapter holding the state
+        :param ttl: seconds a cached value is used before it is read again (default: until invalidated)
+        """
+        self.storage = storage
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._cache: dict[tuple[str, str], tuple[Any, float]] = {}
+        self._lock = threading.Lock()
+        self._clock = time.monotonic
+        self._epoch = 0  # bumped by invalidate()
+
+    def _expires(self) -> float:
+        return float("inf") if self.ttl is None else self._clock() + self.ttl
+
+    def _lookup(self, section: str, id: str, now: float) -> tuple[Any, float] | None:
+        cached = self._cache.get((section, id))
+        if cached is None or cached[1] <= now:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return cached
+
+    def _get(self, section: str, id: str, read: Callable[[str], Any]) -> Any:
+        with self._lock:
+            cached = self._lookup(section, id, self._clock())
+            epoch = self._epoch
+        if cached is not None:
+            return cached[0]
+        value = read(id)
+        with self._lock:
+            return self._fill(section, id, value, epoch)
+
+    def _fill(self, section: str, id: str, value: Any, epoch: int) -> Any:
+        """Cache a value read from the wrapped storage (lock held); returns the cached value.
+
+        The read ran without the lock, so a write made meanwhile wins, except
+        that a later last_seen read replaces an earlier one. Nothing is cached
+        when invalidate() was called during the read.
+        """
+        if epoch != self._epoch:
+            return value
+        cached = self._cache.get((section, id))
+        if cached is not None and cached[1] > self._clock():
+            if (
+                section != _LAST_SEEN
+                or value is None
+                or (cached[0] is not None and _aware(value) <= _aware(cached[0]))
+            ):
+                return cached[0]
+        self._cache[(section, id)] = (value, self._expires())
+        return value
+
+    def _put(self, section: str, id: str, value: Any) -> None:
+        with self._lock:
+            self._cache[(section, id)] = (value, self._expires())
+
+    def invalidate(self, id: str | None = None) -> None:
+        """Forget the cached state of one feed, or of every feed."""
+        with self._lock:
+            self._epoch += 1
+            if id is None:
+                self._cache.clear()
+            else:
+                for section in (_LAST_SEEN, _HTTP_CACHE, _SCHEDULE, _SEEN):
+                    self._cache.pop((section, id), None)
+
+    def get_last_seen(self, id: str) -> datetime | None:
+        return self._get(_LAST_SEEN, id, self.storage.get_last_seen)
+
+    def set_last_seen(self, id: str, last_seen: datetime) -> None:
+        self.storage.set_last_seen(id, last_seen)
+        self._put(_LAST_SEEN, id, last_seen)
+
+    def advance_last_seen(self, id: str, last_seen: datetime) -> None:
+        self.storage.advance_last_seen(id, last_seen)
+        with self._lock:
+            cached = self._cache.get((_LAST_SEEN, id))
+            # an uncached feed stays uncached: the stored value may be later
+            if cached is not None and (
+                cached[0] is None or _aware(last_seen) > _aware(cached[0])
+            ):
+                self._cache[(_LAST_SEEN, id)] = (last_seen, self._expires())
+
+    def get_many(self, ids: Iterable[str]) -> dict[str, datetime | None]:
+        ids = list(ids)
+        found: dict[str, datetime | None] = {}
+        with self._lock:
+            now = self._clock()
+            epoch = self._epoch
+            for id in ids:
+                cached = self._lookup(_LAST_SEEN, id, now)
+                if cached is not None:
+                    found[id] = cached[0]
+        missing = [id for id in ids if id not in found]
+        if missing:
+            read = self.storage.get_many(missing)
+            with self._lock:
+                for id in missing:
+                    found[id] = self._fill(_LAST_SEEN, id, read.get(id), epoch)
+        return {id: found[id] for id in ids}
+
+    def set_many(self, mapping: Mapping[str, datetime]) -> None:
+        self.storage.set_many(mapping)
+        expires = self._expires()
+        with self._lock:
+            for id, last_seen in mapping.items():
+                self._cache[(_LAST_SEEN, id)] = (last_seen, expires)
+
+    def flush(self) -> None:
+        self.storage.flush()
+
+    def batch(self) -> ContextManager[None]:
+        return self.storage.batch()
+
+    def get_http_cache(self, id: str) -> dict | None:
+        return self._get(_HTTP_CACHE, id, self.storage.get_http_cache)
+
+    def set_http_cache(self, id: str, cache: dict) -> None:
+        self.storage.set_http_cache(id, cache)
+        self._put(_HTTP_CACHE, id, dict(cache))
+
+    def get_schedule(self, id: str) -> dict | None:
+        return self._get(_SCHEDULE, id, self.storage.get_schedule)
+
+    def set_schedule(self, id: str, schedule: dict) -> None:
+        self.storage.set_schedule(id, schedule)
+        self._put(_SCHEDULE, id, dict(schedule))
+
+    def get_seen(self, id: str) -> dict | None:
+        return self._get(_SEEN, id, self.storage.get_seen)
+
+    def set_seen(self, id: str, seen: dict) -> None:
+        self.storage.set_seen(id, seen)
+        self._put(_SEEN, id, dict(seen))
+
+    def acquire_lease(self, name: str, owner: str, ttl: float) -> bool:
+        return self.storage.acquire_lease(name, owner, ttl)
+
+    def release_lease(self, name: str, owner: str) -> None:
+        self.storage.release_lease(name, owner)
+
+    def get_leases(self, prefix: str) -> dict[str, str]:
+        return self.storage.get_leases(prefix)
@@ -1,35 +1,308 @@
 from __future__ import annotations
 
+import atexit
 import json
+import os
 import threading
+import time
+import weakref
+from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path
+from typing import Callable, Iterable, Iterator, Mapping
 
 from .adapter import StorageAdapter
 
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+
+def _later(value: str, stored: str | None) -> bool:
+    if stored is None:
+        return True
+    return datetime.fromisoformat(value) > datetime.fromisoformat(stored)
+
+
+def _flush_hook(ref: weakref.ref) -> Callable[[], None]:
+    def flush() -> None:
+        storage = ref()
+        if storage is not None:
+            storage.flush()
+
+    return flush
+
 
 class FileStorage(StorageAdapter):
-    def __init__(self, path: str = "scoutrss.data.json"):
+    def __init__(
+        self,
+        path: str = "scoutrss.data.json",
+        cache: bool = False,
+        flush_interval: float = 1.0,
+        fsync: bool = True,
+    ):
+        """
+        :param path: JSON file holding the state of every feed
+        :param cache: keep the state in memory and batch writes (default: False)
+        :param flush_interval: seconds to coalesce writes for when cache=True
+        :param fsync: fsync every write; without it a power loss can drop the latest writes
+
+        Leases live next to the file in ``<path>.leases`` and are guarded by
+        a lock on ``<path>.lock``, so several processes on one host can share
+        them.
+        """
         self._path = Path(path)
         self._lock = threading.Lock()
+        self._process_lock = threading.Lock()
+        self._leases_path = self._path.with_name(self._path.name + ".leases")
+        self._cache = cache
+        self._flush_interval = flush_interval
+        self._fsync = fsync
+        self._local = threading.local()
+        self._data: dict = {}
+        self._stat: tuple | None = None
+        self._pending: dict = {}
+        self._timer: threading.Timer | None = None
+        self._atexit = None
         if not self._path.exists():
-            self._path.write_text("{}")
+            self._write({})
+        if cache:
+            # a weak reference, so registering doesn't keep the storage alive
+            self._atexit = _flush_hook(weakref.ref(self))
+            atexit.register(self._atexit)
 
-    def _read(self) -> dict:
+    def _file_stat(self) -> tuple:
+        st = os.stat(self._path)
+        return st.st_mtime_ns, st.st_ino, st.st_size
+
+    def _load(self) -> dict:
         return json.loads(self._path.read_text())
 
-    def _write(self, data: dict) -> None:
-        self._path.write_text(json.dumps(data))
+    def _read(self) -> dict:
+        if not self._cache:
+            pending = getattr(self._local, "pending", None)
+            return self._merge(self._load(), pending) if pending else self._load()
+        stat = self._file_stat()
+        if stat != self._stat:
+            # changed on disk by someone else; keep our unflushed fields on top
+            self._data = self._merge(self._load(), self._pending)
+            self._stat = stat
+        return self._data
+
+    @staticmethod
+    def _merge(data: dict, pending: dict) -> dict:
+        """Apply the pending fields to ``data``; advances only move forward."""
+        for (id, key), (value, advance) in pending.items():
+            entry = data.setdefault(id, {})
+            if advance and not _later(value, entry.get(key)):
+                continue
+            entry[key] = value
+        return data
+
+    def _write(self, data: dict, path: Path | None = None) -> None:
+        # write-to-temp + rename so a crash never leaves a truncated file
+        path = path or self._path
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        with open(tmp, "w") as f:
+            json.dump(data, f)
+            if self._fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp, path)
+
+    @contextmanager
+    def _exclusive(self) -> Iterator[None]:
+        """Hold a lock shared with other threads and processes using this file."""
+        with self._process_lock:
+            if fcntl is None:
+                yield
+                return
+            with open(self._path.with_name(self._path.name + ".lock"), "a") as f:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+    def _set(self, id: str, key: str, value) -> None:
+        self._set_many(key, {id: value})
+
+    def _set_many(self, key: str, values: Mapping, advance: bool = False) -> None:
+        if getattr(self._local, "depth", 0):
+            pending = self._local.pending
+            for id, value in values.items():
+                queued = pending.get((id, key))
+                if not advance or queued is None:
+                    pending[(id, key)] = (value, advance)
+                elif _later(value, queued[0]):
+                    pending[(id, key)] = (value, queued[1])
+            return
+        if not self._cache:
+            # re-read under the file lock so writers in other processes
+            # never overwrite each other's fields
+            with self._exclusive(), self._lock:
+                data = self._load()
+                if self._update(data, key, values, advance):
+                    self._write(data)
+            return
+        with self._lock:
+            changed = self._update(self._read(), key, values, advance)
+            if not changed:
+                return
+            for id in changed:
+                self._pending[(id, key)] = (values[id], advance)
+            if self._timer is None:
+                self._timer = threading.Timer(self._flush_interval, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    @staticmethod
+    def _update(data: dict, key: str, values: Mapping, advance: bool) -> list:
+        """Set ``key`` on each entry and return the ids that changed."""
+        changed = []
+        for id, value in values.items():
+            entry = data.setdefault(id, {})
+            if advance and not _later(value, entry.get(key)):
+                continue
+            entry[key] = value
+            changed.append(id)
+        return changed
+
+    def flush(self) -> None:
+        """Write pending changes to disk (cache=True only; a no-op otherwise)."""
+        with self._exclusive(), self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._pending:
+                return
+            # merge field by field into the current file, so changes other
+            # processes made since our last read are kept
+            data = self._merge(self._load(), self._pending)
+            self._write(data)
+            self._data = data
+            self._stat = self._file_stat()
+            self._pending.clear()
+
+    def close(self) -> None:
+        """Flush pending changes and stop flushing this storage at exit."""
+        self.flush()
+        if self._atexit is not None:
+            atexit.unregister(self._atexit)
+            self._atexit = None
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """Buffer the writes made by this thread and write them in one go.
+
+        Only used with cache=False, where every write otherwise rewrites the
+        file; with cache=True writes are already coalesced.
+        """
+        if self._cache:
+            yield
+            return
+        depth = getattr(self._local, "depth", 0)
+        if depth == 0:
+            self._local.pending = {}
+        self._local.depth = depth + 1
+        try:
+            yield
+        finally:
+            self._local.depth -= 1
+            if self._local.depth == 0:
+                pending, self._local.pending = self._local.pending, None
+                if pending:
+                    with self._exclusive(), self._lock:
+                        self._write(self._merge(self._load(), pending))
 
     def get_last_seen(self, id: str) -> datetime | None:
         with self._lock:
             entry = self._read().get(id)
-            if not entry:
+            if not entry or "last_seen_at" not in entry:
                 return None
             return datetime.fromisoformat(entry["last_seen_at"])
 
     def set_last_seen(self, id: str, last_seen: datetime) -> None:
+        self._set(id, "last_seen_at", last_seen.isoformat())
+
+    def advance_last_seen(self, id: str, last_seen: datetime) -> None:
+        # with cache=True the comparison is repeated against the file on flush
+        self._set_many("last_seen_at", {id: last_seen.isoformat()}, advance=True)
+
+    def get_many(self, ids: Iterable[str]) -> dict[str, datetime | None]:
         with self._lock:
             data = self._read()
-            data[id] = {"last_seen_at": last_seen.isoformat()}
-            self._write(data)
+            result = {}
+            for id in ids:
+                entry = data.get(id)
+                result[id] = (
+                    datetime.fromisoformat(entry["last_seen_at"])
+                    if entry and "last_seen_at" in entry
+                    else None
+                )
+            return result
+
+    def set_many(self, mapping: Mapping[str, datetime]) -> None:
+        self._set_many(
+            "last_seen_at", {id: dt.isoformat() for id, dt in mapping.items()}
+        )
+
+    def get_http_cache(self, id: str) -> dict | None:
+        with self._lock:
+            entry = self._read().get(id)
+            return entry.get("http_cache") if entry else None
+
+    def set_http_cache(self, id: str, cache: dict) -> None:
+        self._set(id, "http_cache", cache)
+
+    def get_schedule(self, id: str) -> dict | None:
+        with self._lock:
+            entry = self._read().get(id)
+            return entry.get("schedule") if entry else None
+
+    def set_schedule(self, id: str, schedule: dict) -> None:
+        self._set(id, "schedule", schedule)
+
+    def get_seen(self, id: str) -> dict | None:
+        with self._lock:
+            entry = self._read().get(id)
+            return entry.get("seen") if entry else None
+
+    def set_seen(self, id: str, seen: dict) -> None:
+        self._set(id, "seen", seen)
+
+    def _read_leases(self) -> dict:
+        try:
+            return json.loads(self._leases_path.read_text())
+        except FileNotFoundError:
+            return {}
+
+    def acquire_lease(self, name: str, owner: str, ttl: float) -> bool:
+        with self._exclusive():
+            leases = self._read_leases()
+            now = time.time()
+            held = leases.get(name)
+            if held is not None and held[0] != owner and held[1] > now:
+                return False
+            leases = {n: lease for n, lease in leases.items() if lease[1] > now}
+            leases[name] = [owner, now + ttl]
+            self._write(leases, self._leases_path)
+            return True
+
+    def release_lease(self, name: str, owner: str) -> None:
+        with self._exclusive():
+            leases = self._read_leases()
+            if leases.get(name, [""])[0] == owner:
+                del leases[name]
+                self._write(leases, self._leases_path)
+
+    def get_leases(self, prefix: str) -> dict[str, str]:
+        with self._exclusive():
+            leases = self._read_leases()
+        now = time.time()
+        return {
+            name: owner
+            for name, (owner, expires) in leases.items()
+            if name.startswith(prefix) and expires > now
+        }
@@ -1,6 +1,9 @@
 from __future__ import annotations
 
+import threading
+import time
 from datetime import datetime
+from typing import Iterable, Mapping
 
 from .adapter import StorageAdapter
 
@@ -8,9 +11,67 @@ from .adapter import StorageAdapter
 class MemoryStorage(StorageAdapter):
     def __init__(self):
         self._data: dict[str, datetime] = {}
+        self._http_cache: dict[str, dict] = {}
+        self._schedule: dict[str, dict] = {}
+        self._seen: dict[str, dict] = {}
+        self._leases: dict[str, tuple[str, float]] = {}
+        self._lock = threading.Lock()
 
     def get_last_seen(self, id: str) -> datetime | None:
         return self._data.get(id)
 
     def set_last_seen(self, id: str, last_seen: datetime) -> None:
         self._data[id] = last_seen
+
+    def advance_last_seen(self, id: str, last_seen: datetime) -> None:
+        with self._lock:
+            stored = self._data.get(id)
+            if stored is None or last_seen > stored:
+                self.set_last_seen(id, last_seen)
+
+    def get_many(self, ids: Iterable[str]) -> dict[str, datetime | None]:
+        return {id: self._data.get(id) for id in ids}
+
+    def set_many(self, mapping: Mapping[str, datetime]) -> None:
+        self._data.update(mapping)
+
+    def get_http_cache(self, id: str) -> dict | None:
+        return self._http_cache.get(id)
+
+    def set_http_cache(self, id: str, cache: dict) -> None:
+        self._http_cache[id] = dict(cache)
+
+    def get_schedule(self, id: str) -> dict | None:
+        return self._schedule.get(id)
+
+    def set_schedule(self, id: str, schedule: dict) -> None:
+        self._schedule[id] = dict(schedule)
+
+    def get_seen(self, id: str) -> dict | None:
+        return self._seen.get(id)
+
+    def set_seen(self, id: str, seen: dict) -> None:
+        self._seen[id] = dict(seen)
+
+    def acquire_lease(self, name: str, owner: str, ttl: float) -> bool:
+        now = time.time()
+        with self._lock:
+            held = self._leases.get(name)
+            if held is not None and held[0] != owner and held[1] > now:
+                return False
+            self._leases[name] = (owner, now + ttl)
+            return True
+
+    def release_lease(self, name: str, owner: str) -> None:
+        with self._lock:
+            if self._leases.get(name, ("",))[0] == owner:
+                del self._leases[name]
+
+    def get_leases(self, prefix: str) -> dict[str, str]:
+        now = time.time()
+        with self._lock:
+            return {
+                name: owner
+                for name, (owner, expires) in self._leases.items()
+                if name.startswith(prefix) and expires > now
+            }
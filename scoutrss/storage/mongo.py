@@ -1,7 +1,9 @@
 from __future__ import annotations
 
+import re
+import time
 from datetime import datetime
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Iterable, Mapping
 
 if TYPE_CHECKING:
     from pymongo.collection import Collection
@@ -10,12 +12,21 @@ from .adapter import StorageAdapter
 
 
 class MongoStorage(StorageAdapter):
-    def __init__(self, collection: Collection):
+    def __init__(self, collection: Collection, leases: Collection | None = None):
+        """
+        :param collection: collection holding one document per feed
+        :param leases: collection holding Shard leases (default: ``<collection>_leases`` in the same database)
+        """
         self._collection = collection
+        self._leases = (
+            leases
+            if leases is not None
+            else collection.database[f"{collection.name}_leases"]
+        )
 
     def get_last_seen(self, id: str) -> datetime | None:
         result = self._collection.find_one({"_id": id})
-        return result["last_seen_at"] if result else None
+        return result.get("last_seen_at") if result else None
 
     def set_last_seen(self, id: str, last_seen: datetime) -> None:
         self._collection.update_one(
@@ -23,3 +34,103 @@ class MongoStorage(StorageAdapter):
             {"$set": {"last_seen_at": last_seen}},
             upsert=True,
         )
+
+    def advance_last_seen(self, id: str, last_seen: datetime) -> None:
+        from pymongo.errors import DuplicateKeyError
+
+        try:
+            self._collection.update_one(
+                {
+                    "_id": id,
+                    "$or": [
+                        {"last_seen_at": None},
+                        {"last_seen_at": {"$lt": last_seen}},
+                    ],
+                },
+                {"$set": {"last_seen_at": last_seen}},
+                upsert=True,
+            )
+        except DuplicateKeyError:
+            pass  # the stored timestamp is already later
+
+    def get_many(self, ids: Iterable[str]) -> dict[str, datetime | None]:
+        result: dict[str, datetime | None] = dict.fromkeys(ids)
+        for doc in self._collection.find(
+            {"_id": {"$in": list(result)}}, {"last_seen_at": 1}
+        ):
+            result[doc["_id"]] = doc.get("last_seen_at")
+        return result
+
+    def set_many(self, mapping: Mapping[str, datetime]) -> None:
+        from pymongo import UpdateOne
+
+        if not mapping:
+            return
+        self._collection.bulk_write(
+            [
+                UpdateOne({"_id": id}, {"$set": {"last_seen_at": dt}}, upsert=True)
+                for id, dt in mapping.items()
+            ],
+            ordered=False,
+        )
+
+    def get_http_cache(self, id: str) -> dict | None:
+        result = self._collection.find_one({"_id": id}, {"http_cache": 1})
+        return result.get("http_cache") if result else None
+
+    def set_http_cache(self, id: str, cache: dict) -> None:
+        self._collection.update_one(
+            {"_id": id},
+            {"$set": {"http_cache": cache}},
+            upsert=True,
+        )
+
+    def get_schedule(self, id: str) -> dict | None:
+        result = self._collection.find_one({"_id": id}, {"schedule": 1})
+        return result.get("schedule") if result else None
+
+    def set_schedule(self, id: str, schedule: dict) -> None:
+        self._collection.update_one(
+            {"_id": id},
+            {"$set": {"schedule": schedule}},
+            upsert=True,
+        )
+
+    def get_seen(self, id: str) -> dict | None:
+        result = self._collection.find_one({"_id": id}, {"seen": 1})
+        return result.get("seen") if result else None
+
+    def set_seen(self, id: str, seen: dict) -> None:
+        self._collection.update_one(
+            {"_id": id},
+            {"$set": {"seen": seen}},
+            upsert=True,
+        )
+
+    def acquire_lease(self, name: str, owner: str, ttl: float) -> bool:
+        from pymongo.errors import DuplicateKeyError
+
+        now = time.time()
+        try:
+            self._leases.update_one(
+                {"_id": name, "$or": [{"owner": owner}, {"expires": {"$lte": now}}]},
+                {"$set": {"owner": owner, "expires": now + ttl}},
+                upsert=True,
+            )
+        except DuplicateKeyError:
+            return False  # held by another owner
+        return True
+
+    def release_lease(self, name: str, owner: str) -> None:
+        self._leases.delete_one({"_id": name, "owner": owner})
+
+    def get_leases(self, prefix: str) -> dict[str, str]:
+        return {
+            doc["_id"]: doc["owner"]
+            for doc in self._leases.find(
+                {
+                    "_id": {"$regex": f"^{re.escape(prefix)}"},
+                    "expires": {"$gt": time.time()},
+                }
+            )
+        }
@@ -0,0 +1,240 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Iterable, Iterator, Mapping
+
+from .adapter import StorageAdapter
+
+# http_cache and meta hold JSON; meta is an object with one key per
+# additional state section, addressed as "meta.<key>" fields below
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS feeds (
+    id TEXT PRIMARY KEY,
+    last_seen_at TEXT,
+    http_cache TEXT,
+    meta TEXT
+) WITHOUT ROWID
+"""
+
+_LEASES_SCHEMA = """
+CREATE TABLE IF NOT EXISTS leases (
+    name TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    expires REAL NOT NULL
+) WITHOUT ROWID
+"""
+
+# pseudo-column for buffered advance_last_seen() writes
+_ADVANCED = "last_seen_at>"
+
+
+def _select(field: str) -> str:
+    if field.startswith("meta."):
+        return f"json_extract(meta, '$.{field[5:]}')"
+    return field
+
+
+def _upsert(field: str) -> str:
+    if field == _ADVANCED:
+        # julianday() compares timestamps written with different offsets
+        return (
+            "INSERT INTO feeds (id, last_seen_at) VALUES (?, ?) "
+            "ON CONFLICT(id) DO UPDATE SET last_seen_at = excluded.last_seen_at "
+            "WHERE feeds.last_seen_at IS NULL "
+            "OR julianday(excluded.last_seen_at) > julianday(feeds.last_seen_at)"
+        )
+    if field.startswith("meta."):
+        key = field[5:]
+        return (
+            f"INSERT INTO feeds (id, meta) VALUES (?1, json_object('{key}', json(?2))) "
+            f"ON CONFLICT(id) DO UPDATE SET "
+            f"meta = json_set(COALESCE(meta, '{{}}'), '$.{key}', json(?2))"
+        )
+    return (
+        f"INSERT INTO feeds (id, {field}) VALUES (?, ?) "
+        f"ON CONFLICT(id) DO UPDATE SET {field} = excluded.{field}"
+    )
+
+
+class SqliteStorage(StorageAdapter):
+    def __init__(self, path: str = "scoutrss.db", timeout: float = 30.0):
+        """
+        :param path: SQLite database file
+        :param timeout: seconds to wait for a lock held by another process
+        """
+        self._path = str(path)
+        self._timeout = timeout
+        self._local = threading.local()
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(_SCHEMA)
+        conn.execute(_LEASES_SCHEMA)
+        conn.commit()
+
+    def _conn(self) -> sqlite3.Connection:
+        # one connection per thread; sqlite3 connections must not be shared
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self._path, timeout=self._timeout)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """Buffer the writes made by this thread and commit them in one transaction.
+
+        The write lock is only taken when the block exits, so slow callbacks
+        inside it don't hold up other processes sharing the database.
+        """
+        depth = getattr(self._local, "depth", 0)
+        if depth == 0:
+            self._local.pending = {}
+        self._local.depth = depth + 1
+        try:
+            yield
+        finally:
+            self._local.depth -= 1
+            if self._local.depth == 0:
+                self._flush_pending()
+
+    def _flush_pending(self) -> None:
+        pending = getattr(self._local, "pending", None)
+        if not pending:
+            return
+        self._local.pending = None
+        conn = self._conn()
+        by_column: dict[str, list] = {}
+        for (id, column), value in pending.items():
+            by_column.setdefault(column, []).append((id, value))
+        with conn:
+            for column, rows in by_column.items():
+                conn.executemany(_upsert(column), rows)
+
+    def _get(self, id: str, column: str):
+        pending = getattr(self._local, "pending", None)
+        if pending:
+            for key in ((id, column), (id, column + ">")):
+                if key in pending:
+                    return pending[key]
+        row = (
+            self._conn()
+            .execute(f"SELECT {_select(column)} FROM feeds WHERE id = ?", (id,))
+            .fetchone()
+        )
+        return row[0] if row else None
+
+    def _set(self, id: str, column: str, value) -> None:
+        if getattr(self._local, "depth", 0):
+            self._local.pending[(id, column)] = value
+            return
+        conn = self._conn()
+        with conn:
+            conn.execute(_upsert(column), (id, value))
+
+    def close(self) -> None:
+        """Close the calling thread's connection."""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def get_last_seen(self, id: str) -> datetime | None:
+        value = self._get(id, "last_seen_at")
+        return datetime.fromisoformat(value) if value else None
+
+    def set_last_seen(self, id: str, last_seen: datetime) -> None:
+        if getattr(self._local, "depth", 0):
+            self._local.pending.pop((id, _ADVANCED), None)
+        self._set(id, "last_seen_at", last_seen.isoformat())
+
+    def advance_last_seen(self, id: str, last_seen: datetime) -> None:
+        if getattr(self._local, "depth", 0):
+            pending = self._local.pending
+            for key in ((id, "last_seen_at"), (id, _ADVANCED)):
+                if key in pending:
+                    if last_seen > datetime.fromisoformat(pending[key]):
+                        pending[key] = last_seen.isoformat()
+                    return
+        self._set(id, _ADVANCED, last_seen.isoformat())
+
+    def get_many(self, ids: Iterable[str]) -> dict[str, datetime | None]:
+        result: dict[str, datetime | None] = dict.fromkeys(ids)
+        keys = list(result)
+        conn = self._conn()
+        # stay well under SQLITE_MAX_VARIABLE_NUMBER
+        for i in range(0, len(keys), 500):
+            chunk = keys[i : i + 500]
+            rows = conn.execute(
+                "SELECT id, last_seen_at FROM feeds WHERE id IN "
+                f"({','.join('?' * len(chunk))})",
+                chunk,
+            )
+            for id, value in rows:
+                result[id] = datetime.fromisoformat(value) if value else None
+        pending = getattr(self._local, "pending", None)
+        if pending:
+            for id in keys:
+                for key in ((id, "last_seen_at"), (id, _ADVANCED)):
+                    if key in pending:
+                        result[id] = datetime.fromisoformat(pending[key])
+        return result
+
+    def set_many(self, mapping: Mapping[str, datetime]) -> None:
+        with self.batch():
+            for id, last_seen in mapping.items():
+                self.set_last_seen(id, last_seen)
+
+    def get_http_cache(self, id: str) -> dict | None:
+        value = self._get(id, "http_cache")
+        return json.loads(value) if value else None
+
+    def set_http_cache(self, id: str, cache: dict) -> None:
+        self._set(id, "http_cache", json.dumps(cache))
+
+    def get_schedule(self, id: str) -> dict | None:
+        value = self._get(id, "meta.schedule")
+        return json.loads(value) if value else None
+
+    def set_schedule(self, id: str, schedule: dict) -> None:
+        self._set(id, "meta.schedule", json.dumps(schedule))
+
+    def get_seen(self, id: str) -> dict | None:
+        value = self._get(id, "meta.seen")
+        return json.loads(value) if value else None
+
+    def set_seen(self, id: str, seen: dict) -> None:
+        self._set(id, "meta.seen", json.dumps(seen))
+
+    def acquire_lease(self, name: str, owner: str, ttl: float) -> bool:
+        now = time.time()
+        conn = self._conn()
+        with conn:
+            cursor = conn.execute(
+                "INSERT INTO leases (name, owner, expires) VALUES (?1, ?2, ?3) "
+                "ON CONFLICT(name) DO UPDATE SET "
+                "owner = excluded.owner, expires = excluded.expires "
+                "WHERE leases.owner = excluded.owner OR leases.expires <= ?4",
+                (name, owner, now + ttl, now),
+            )
+        return cursor.rowcount == 1
+
+    def release_lease(self, name: str, owner: str) -> None:
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                "DELETE FROM leases WHERE name = ? AND owner = ?", (name, owner)
+            )
+
+    def get_leases(self, prefix: str) -> dict[str, str]:
+        rows = self._conn().execute(
+            "SELECT name, owner FROM leases WHERE substr(name, 1, ?) = ? "
+            "AND expires > ?",
+            (len(prefix), prefix, time.time()),
+        )
+        return dict(rows)
@@ -0,0 +1,163 @@
+import asyncio
+from datetime import datetime, timezone
+from unittest.mock import MagicMock
+
+import pytest
+
+from scoutrss.storage import MemoryStorage, SqliteStorage
+
+web = pytest.importorskip("aiohttp.web")
+
+from scoutrss import AsyncScoutRSS  # noqa: E402
+from scoutrss.fetch import ResponseTooLarge  # noqa: E402
+
+OLD = datetime(2024, 1, 10, 0, 0, 0, tzinfo=timezone.utc)
+
+FEED = b"""<?xml version="1.0"?>
+<rss version="2.0"><channel><title>t</title>
+<item><guid>2</guid><title>two</title><pubDate>Sun, 21 Jan 2024 00:00:00 GMT</pubDate></item>
+<item><guid>1</guid><title>one</title><pubDate>Sat, 20 Jan 2024 00:00:00 GMT</pubDate></item>
+<item><guid>0</guid><title>old</title><pubDate>Fri, 05 Jan 2024 00:00:00 GMT</pubDate></item>
+</channel></rss>"""
+
+
+class FeedServer:
+    def __init__(self):
+        self.requests = []
+
+    async def handle(self, request):
+        self.requests.append(request.headers.copy())
+        if request.headers.get("If-None-Match") == '"v1"':
+            return web.Response(status=304)
+        return web.Response(
+            body=FEED, content_type="application/rss+xml", headers={"ETag": '"v1"'}
+        )
+
+    async def endless(self, request):
+        response = web.StreamResponse()  # chunked, no Content-Length
+        await response.prepare(request)
+        for _ in range(100):
+            await response.write(b"x" * 1024)
+        return response
+
+    async def __aenter__(self):
+        app = web.Application()
+        app.router.add_get("/feed", self.handle)
+        app.router.add_get("/endless", self.endless)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://127.0.0.1:{port}/feed"
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.runner.cleanup()
+
+
+def make_scout(url, callback, **kwargs):
+    storage = MemoryStorage()
+    storage.set_last_seen(url, OLD)
+    return AsyncScoutRSS(url, callback, storage=storage, **kwargs)
+
+
+class TestAsyncCheck:
+    def test_sync_callback_oldest_first(self):
+        async def run():
+            async with FeedServer() as server:
+                callback = MagicMock(return_value=True)
+                async with make_scout(server.url, callback) as scout:
+                    await scout.check()
+                return [c.args[0].title for c in callback.call_args_list], scout
+
+        titles, scout = asyncio.run(run())
+        assert titles == ["one", "two"]
+        assert scout.last_seen == datetime(2024, 1, 21, tzinfo=timezone.utc)
+
+    def test_coroutine_callback_with_confirmation(self):
+        seen = []
+
+        async def callback(entry):
+            seen.append(entry.title)
+            return entry.title == "one"
+
+        async def run():
+            async with FeedServer() as server:
+                async with make_scout(
+                    server.url, callback, require_confirmation=True
+                ) as scout:
+                    await scout.check()
+                return scout
+
+        scout = asyncio.run(run())
+        assert seen == ["one", "two"]
+        assert scout.last_seen == datetime(2024, 1, 20, tzinfo=timezone.utc)
+
+    def test_conditional_request_on_second_check(self):
+        async def run():
+            async with FeedServer() as server:
+                callback = MagicMock(return_value=True)
+                async with make_scout(server.url, callback) as scout:
+                    await scout.check()
+                    await scout.check()
+                return server, callback, scout
+
+        server, callback, scout = asyncio.run(run())
+        assert server.requests[1]["If-None-Match"] == '"v1"'
+        assert callback.call_count == 2
+        assert scout.storage.get_http_cache(scout.id) == {"etag": '"v1"'}
+
+    def test_commit_not_held_by_another_watcher(self, tmp_path):
+        storage = SqliteStorage(tmp_path / "state.db")
+
+        async def run():
+            async with FeedServer() as server:
+                urls = [f"{server.url}?a", f"{server.url}?b"]
+                for url in urls:
+                    storage.set_last_seen(url, OLD)
+                blocked = asyncio.Event()
+
+                async def slow(entry):
+                    await blocked.wait()
+
+                a = AsyncScoutRSS(urls[0], MagicMock(), storage=storage)
+                b = AsyncScoutRSS(urls[1], slow, storage=storage)
+                async with a, b:
+                    task = asyncio.ensure_future(b.check())
+                    await asyncio.sleep(0.05)  # b is awaiting its callback
+                    await a.check()
+                    stored = SqliteStorage(tmp_path / "state.db").get_last_seen(a.id)
+                    blocked.set()
+                    await task
+                return stored
+
+        assert asyncio.run(run()) == datetime(2024, 1, 21, tzinfo=timezone.utc)
+
+    def test_max_size(self):
+        async def run():
+            async with FeedServer() as server:
+                url = server.url.replace("/feed", "/endless")
+                async with make_scout(url, MagicMock(), max_size=10_000) as scout:
+                    with pytest.raises(ResponseTooLarge):
+                        await scout.check()
+                async with make_scout(server.url, MagicMock(), max_size=100) as scout:
+                    with pytest.raises(ResponseTooLarge):
+                        await scout.check()
+
+        asyncio.run(run())
+
+
+class TestAsyncListen:
+    def test_listen_until_stopped(self):
+        async def run():
+            async with FeedServer() as server:
+                async with make_scout(server.url, MagicMock()) as scout:
+                    task = asyncio.ensure_future(scout.listen(interval=0.01))
+                    while len(server.requests) < 2:
+                        await asyncio.sleep(0.01)
+                    scout.stop()
+                    await asyncio.wait_for(task, 1)
+                return server
+
+        assert len(asyncio.run(run()).requests) >= 2
@@ -0,0 +1,134 @@
+import threading
+from datetime import datetime, timezone
+from unittest.mock import MagicMock, patch
+
+import pytest
+from feedparser import parse
+
+from scoutrss import FeedCache, ScoutRSS
+from scoutrss.fetch import Response
+from scoutrss.storage import MemoryStorage
+
+URL = "https://example.com/feed.rss"
+OLD = datetime(2024, 1, 10, 0, 0, 0, tzinfo=timezone.utc)
+FEED = (
+    b'<rss version="2.0"><channel><title>t</title>'
+    b"<item><title>two</title><pubDate>Sun, 21 Jan 2024 00:00:00 GMT</pubDate></item>"
+    b"<item><title>one</title><pubDate>Sat, 20 Jan 2024 00:00:00 GMT</pubDate></item>"
+    b"<item><title>old</title><pubDate>Fri, 05 Jan 2024 00:00:00 GMT</pubDate></item>"
+    b"</channel></rss>"
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_cache(ttl=30):
+    cache = FeedCache(ttl=ttl)
+    cache._clock = FakeClock()
+    return cache
+
+
+class TestFeedCache:
+    def test_reused_within_ttl(self):
+        cache = make_cache()
+        fetch = MagicMock(return_value=Response(200, b"doc", {}, URL))
+        first = cache.get(URL, fetch)
+        cache._clock.now = 29
+        assert cache.get(URL, fetch) is first
+        fetch.assert_called_once_with(URL, etag=None, modified=None)
+
+    def test_revalidated_after_ttl(self):
+        cache = make_cache()
+        fetch = MagicMock(return_value=Response(200, b"doc", {"etag": '"v1"'}, URL))
+        first = cache.get(URL, fetch)
+        first.parsed(lambda response: "parsed")
+        cache._clock.now = 31
+        fetch.return_value = Response(304, b"", {}, URL)
+        second = cache.get(URL, fetch)
+        fetch.assert_called_with(URL, etag='"v1"', modified=None)
+        assert second is first
+        assert second.parsed(lambda response: "again") == "parsed"
+
+    def test_single_flight(self):
+        cache = make_cache()
+        release = threading.Event()
+
+        def fetch(url, etag=None, modified=None):
+            release.wait(5)
+            return Response(200, b"doc", {}, url)
+
+        fetch = MagicMock(side_effect=fetch)
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(cache.get(URL, fetch)))
+            for _ in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        release.set()
+        for thread in threads:
+            thread.join()
+        assert fetch.call_count == 1
+        assert len({id(feed) for feed in results}) == 1
+
+    def test_errors_not_cached(self):
+        cache = make_cache()
+        fetch = MagicMock(side_effect=OSError)
+        with pytest.raises(OSError):
+            cache.get(URL, fetch)
+        fetch.side_effect = None
+        fetch.return_value = Response(200, b"doc", {}, URL)
+        assert cache.get(URL, fetch).response.body == b"doc"
+
+    def test_least_recently_used_dropped(self):
+        cache = FeedCache(max_feeds=1)
+        fetch = MagicMock(side_effect=lambda url, **kw: Response(200, b"", {}, url))
+        cache.get("a", fetch)
+        cache.get("b", fetch)
+        cache.get("a", fetch)
+        assert fetch.call_count == 3
+
+
+class TestSharedWatchers:
+    def _make_scouts(self, cache):
+        storage = MemoryStorage()
+        scouts = []
+        for id in ("tenant-a", "tenant-b"):
+            storage.set_last_seen(id, OLD)
+            scouts.append(
+                ScoutRSS(
+                    URL,
+                    MagicMock(return_value=True),
+                    storage=storage,
+                    id=id,
+                    feed_cache=cache,
+                )
+            )
+        return scouts
+
+    def test_one_download_and_parse(self):
+        scouts = self._make_scouts(make_cache())
+        response = Response(200, FEED, {"etag": '"v1"'}, URL)
+        with patch("scoutrss.socutrss.fetch", return_value=response) as fetch:
+            with patch("scoutrss.socutrss.parse", wraps=parse) as mock_parse:
+                results = [scout.check() for scout in scouts]
+        assert fetch.call_count == 1 and mock_parse.call_count == 1
+        assert [r.delivered for r in results] == [2, 2]
+        for scout in scouts:
+            titles = [c.args[0].title for c in scout.callback.call_args_list]
+            assert titles == ["one", "two"]
+
+    def test_processed_document_not_delivered_again(self):
+        cache = make_cache()
+        scout = self._make_scouts(cache)[0]
+        response = Response(200, FEED, {"etag": '"v1"'}, URL)
+        with patch("scoutrss.socutrss.fetch", return_value=response):
+            scout.check()
+            assert scout.check().not_modified
+        assert scout.callback.call_count == 2
@@ -0,0 +1,39 @@
+import pickle
+from datetime import datetime, timezone
+
+import pytest
+
+from scoutrss.entry import Entry, record_type
+
+DT = datetime(2024, 1, 20, tzinfo=timezone.utc)
+
+
+class TestRecordType:
+    def test_fields(self):
+        record = record_type(("title", "published"))(["t", DT], DT)
+        assert isinstance(record, Entry)
+        assert record.title == "t"
+        assert record["published"] == DT
+        assert record.get("link", "-") == "-"
+        assert record._asdict() == {"title": "t", "published": DT}
+        assert not hasattr(record, "__dict__")
+
+    def test_missing_key(self):
+        record = record_type(("title",))(["t"])
+        with pytest.raises(KeyError):
+            record["link"]
+
+    def test_type_cached(self):
+        assert record_type(("title",)) is record_type(("title",))
+
+    def test_invalid_name(self):
+        with pytest.raises(ValueError):
+            record_type(("title", "not a name"))
+        with pytest.raises(ValueError):
+            record_type(("_key",))
+
+    def test_pickle(self):
+        record = record_type(("id", "title"))(["a", "t"], DT, b"key")
+        restored = pickle.loads(pickle.dumps(record))
+        assert restored == record
+        assert (restored._published, restored._key) == (DT, b"key")
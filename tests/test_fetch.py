@@ -0,0 +1,237 @@
+import gzip
+import socket
+import threading
+import time
+import zlib
+from http.client import HTTPConnection
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.error import HTTPError
+
+import pytest
+
+from scoutrss.fetch import Fetcher, ResponseTooLarge, content_digest, fetch
+
+BODY = b"<rss><channel><title>t</title></channel></rss>"
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    connections: list = []
+
+    paths: list = []
+    auths: list = []
+
+    def setup(self):
+        super().setup()
+        self.connections.append(self.client_address)
+
+    def _empty(self, status, **headers):
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_GET(self):
+        self.paths.append((self.path, self.headers.get("Proxy-Authorization")))
+        self.auths.append(self.headers.get("Authorization"))
+        if self.path == "/missing":
+            return self._empty(404)
+        if self.path == "/redirect":
+            return self._empty(302, Location="/feed")
+        if self.path == "/slow":
+            time.sleep(1)
+        if self.headers.get("If-None-Match") == '"v1"':
+            return self._empty(304)
+        body = BODY * 1000 if self.path == "/big" else BODY
+        self.send_response(200)
+        self.send_header("ETag", '"v1"')
+        if self.path == "/deflate":
+            compressor = zlib.compressobj(wbits=-zlib.MAX_WBITS)  # raw deflate
+            body = compressor.compress(body) + compressor.flush()
+            self.send_header("Content-Encoding", "deflate")
+        elif "gzip" in self.headers.get("Accept-Encoding", ""):
+            body = gzip.compress(body)
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    Handler.connections = []
+    Handler.paths = []
+    Handler.auths = []
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    httpd.daemon_threads = True
+    httpd.handle_error = lambda *args: None  # clients hanging up early (max_size)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_port}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+class TestFetch:
+    def test_decompresses_body(self, server):
+        response = fetch(f"{server}/feed")
+        assert response.status == 200
+        assert response.body == BODY
+        assert response.headers["etag"] == '"v1"'
+        assert "content-encoding" not in response.headers
+        assert response.headers["content-location"] == f"{server}/feed"
+
+    def test_not_modified(self, server):
+        response = fetch(f"{server}/feed", etag='"v1"')
+        assert response.status == 304
+        assert response.body == b""
+
+    def test_http_error_raised(self, server):
+        with pytest.raises(HTTPError):
+            fetch(f"{server}/missing")
+
+
+class TestFetcher:
+    def test_reuses_connection(self, server):
+        fetcher = Fetcher()
+        for _ in range(3):
+            assert fetcher.fetch(f"{server}/feed").body == BODY
+        assert fetcher.fetch(f"{server}/feed", etag='"v1"').status == 304
+        assert len(Handler.connections) == 1
+        fetcher.close()
+
+    def test_connect_time_reported_for_new_connections(self, server):
+        fetcher = Fetcher()
+        assert fetcher.fetch(f"{server}/feed").connect > 0
+        assert fetcher.fetch(f"{server}/feed").connect == 0
+        fetcher.close()
+
+    def test_reconnects_after_close(self, server):
+        fetcher = Fetcher()
+        fetcher.fetch(f"{server}/feed")
+        fetcher.close()
+        assert fetcher.fetch(f"{server}/feed").body == BODY
+        assert len(Handler.connections) == 2
+
+    def test_raw_deflate(self, server):
+        assert Fetcher().fetch(f"{server}/deflate").body == BODY
+
+    def test_follows_redirects(self, server):
+        response = Fetcher().fetch(f"{server}/redirect")
+        assert response.body == BODY
+        assert response.url == f"{server}/feed"
+
+    def test_max_size(self, server):
+        fetcher = Fetcher(max_size=len(BODY) * 10)
+        with pytest.raises(ResponseTooLarge):
+            fetcher.fetch(f"{server}/big")
+        assert fetcher.fetch(f"{server}/feed").body == BODY
+
+    def test_read_timeout(self, server):
+        with pytest.raises(socket.timeout):
+            Fetcher(read_timeout=0.1).fetch(f"{server}/slow")
+
+    def test_credentials_in_url(self, server):
+        host = server.split("://")[1]
+        fetcher = Fetcher()
+        assert fetcher.fetch(f"http://user:p%40ss@{host}/feed").body == BODY
+        assert Handler.auths == ["Basic dXNlcjpwQHNz"]  # user:p@ss
+        assert Handler.paths[0][0] == "/feed"
+        fetcher.close()
+
+    def test_feed_scheme(self, server):
+        host = server.split("://")[1]
+        assert fetch(f"feed://{host}/feed").body == BODY
+        assert fetch(f"feed:{server}/feed").body == BODY
+
+    def test_non_ascii_path_quoted(self, server):
+        fetcher = Fetcher()
+        assert fetcher.fetch(f"{server}/caf\u00e9?q=\u00fc").body == BODY
+        assert Handler.paths[0][0] == "/caf%C3%A9?q=%C3%BC"
+        fetcher.close()
+
+    def test_connection_closed_on_timeout(self, server, mocker):
+        fetcher = Fetcher(read_timeout=0.1)
+        close = mocker.spy(HTTPConnection, "close")
+        mocker.patch.object(
+            HTTPConnection, "getresponse", side_effect=socket.timeout("timed out")
+        )
+        with pytest.raises(socket.timeout):
+            fetcher.fetch(f"{server}/feed")
+        assert close.call_count >= 1
+        assert not any(fetcher._idle.values())
+
+
+class TestFetchOther:
+    def test_local_path(self, tmp_path):
+        path = tmp_path / "feed.xml"
+        path.write_bytes(BODY)
+        response = Fetcher().fetch(str(path))
+        assert response.status == 200 and response.body == BODY
+        assert response.headers["content-location"] == str(path)
+        again = Fetcher().fetch(str(path), modified=response.headers["last-modified"])
+        assert again.status == 304
+
+    def test_file_url(self, tmp_path):
+        path = tmp_path / "feed.xml"
+        path.write_bytes(BODY)
+        assert Fetcher().fetch(path.as_uri()).body == BODY
+
+    def test_max_size(self, tmp_path):
+        path = tmp_path / "feed.xml"
+        path.write_bytes(BODY)
+        with pytest.raises(ResponseTooLarge):
+            Fetcher(max_size=10).fetch(str(path))
+
+
+class TestProxy:
+    def test_http_through_proxy(self, server):
+        fetcher = Fetcher(proxies={"http": server.replace("://", "://user:pw@")})
+        response = fetcher.fetch("http://feeds.example/feed")
+        assert response.body == BODY
+        path, auth = Handler.paths[-1]
+        assert path == "http://feeds.example/feed"
+        assert auth == "Basic dXNlcjpwdw=="
+
+    def test_no_proxy(self, server):
+        fetcher = Fetcher(
+            proxies={"http": "http://proxy.invalid:3128", "no": "127.0.0.1"}
+        )
+        assert fetcher.fetch(f"{server}/feed").body == BODY
+        assert Handler.paths[-1][0] == "/feed"
+
+    def test_https_tunnels(self):
+        fetcher = Fetcher(proxies={"https": "http://proxy.example:3128"})
+        key = ("https", "feeds.example", 443, fetcher._proxy("https", "feeds.example"))
+        conn, _ = fetcher._connection(key)
+        assert (conn.host, conn.port) == ("proxy.example", 3128)
+        assert (conn._tunnel_host, conn._tunnel_port) == ("feeds.example", 443)
+
+    def test_from_environment(self, monkeypatch):
+        monkeypatch.setenv("HTTPS_PROXY", "http://proxy.example:3128")
+        assert Fetcher()._proxy("https", "feeds.example") == ("proxy.example", 3128, "")
+
+
+class TestContentDigest:
+    FEED = (
+        b"<rss><channel><lastBuildDate>{build}</lastBuildDate>"
+        b"<item><pubDate>{date}</pubDate></item></channel></rss>"
+    )
+
+    def _digest(self, build=b"a", date=b"x"):
+        return content_digest(
+            self.FEED.replace(b"{build}", build).replace(b"{date}", date)
+        )
+
+    def test_stable(self):
+        assert self._digest() == self._digest()
+
+    def test_ignores_header_dates(self):
+        assert self._digest(build=b"a") == self._digest(build=b"b")
+
+    def test_entry_changes_detected(self):
+        assert self._digest(date=b"x") != self._digest(date=b"y")
@@ -0,0 +1,74 @@
+from scoutrss import CheckResult, Metrics
+
+URL = "https://example.com/feed.rss"
+
+
+def make_result(duration, status=200, **fields):
+    return CheckResult("feed", URL, status=status, duration=duration, **fields)
+
+
+def test_counters():
+    metrics = Metrics()
+    metrics(make_result(0.1, bytes=100, parsed=3, new=2, delivered=2, storage_calls=4))
+    metrics(make_result(0.2, status=304, not_modified=True))
+    assert metrics.counters["checks"] == 2
+    assert metrics.counters["bytes"] == 100
+    assert metrics.counters["delivered"] == 2
+    assert metrics.counters["not_modified"] == 1
+
+
+def test_latency_quantiles():
+    metrics = Metrics()
+    for i in range(1, 101):
+        metrics(make_result(i / 100, timings={"fetch": i / 1000}))
+    assert metrics.latency(0.5) == 0.51
+    assert metrics.latency(0.99) == 1.0
+    assert metrics.latency(0.5, "fetch") == 0.051
+    assert metrics.latency(0.5, "parse") is None
+
+
+def test_window():
+    metrics = Metrics(window=10)
+    for i in range(100):
+        metrics(make_result(float(i)))
+    assert metrics.latency(0.0) == 90.0
+    assert metrics.counters["checks"] == 100
+
+
+def test_error_ratio():
+    metrics = Metrics()
+    assert metrics.error_ratio() == 0.0
+    metrics(make_result(0.1))
+    metrics(make_result(0.1, status=500))
+    metrics(make_result(0.1, status=None), OSError())
+    metrics(make_result(0.1))
+    assert metrics.error_ratio() == 0.5
+    assert metrics.counters["errors"] == 2
+
+
+def test_prometheus():
+    metrics = Metrics()
+    metrics(make_result(0.5, bytes=10, timings={"fetch": 0.25}))
+    metrics(make_result(1.5), OSError())
+    text = metrics.prometheus()
+    lines = text.splitlines()
+    assert "# TYPE scoutrss_check_duration_seconds summary" in lines
+    assert 'scoutrss_check_duration_seconds{quantile="0.5"} 1.5' in lines
+    assert "scoutrss_check_duration_seconds_sum 2.0" in lines
+    assert "scoutrss_check_duration_seconds_count 2" in lines
+    assert 'scoutrss_check_phase_seconds{phase="fetch",quantile="0.99"} 0.25' in lines
+    assert 'scoutrss_check_phase_seconds_count{phase="fetch"} 1' in lines
+    assert "scoutrss_fetched_bytes_total 10" in lines
+    assert "scoutrss_check_errors_total 1" in lines
+    assert "scoutrss_check_error_ratio 0.5" in lines
+    assert text.endswith("\n")
+    assert Metrics().prometheus(prefix="rss").startswith("# HELP rss_")
+
+
+def test_prometheus_prints_values_exactly():
+    metrics = Metrics()
+    metrics(make_result(0.1, bytes=1234567891))
+    metrics(make_result(0.123456789))
+    lines = metrics.prometheus().splitlines()
+    assert "scoutrss_fetched_bytes_total 1234567891" in lines
+    assert 'scoutrss_check_duration_seconds{quantile="0.5"} 0.123456789' in lines
@@ -0,0 +1,37 @@
+import pytest
+
+from scoutrss.opml import read_opml
+
+OPML = b"""<?xml version="1.0"?>
+<opml version="2.0">
+  <head><title>Subscriptions</title></head>
+  <body>
+    <outline text="Top" type="rss" xmlUrl="https://a.example/feed"/>
+    <outline text="Folder">
+      <outline text="B" type="rss" xmlUrl="https://b.example/feed"/>
+      <outline text="Nested">
+        <outline text="C" type="rss" xmlUrl=" https://c.example/feed "/>
+      </outline>
+      <outline text="A again" type="rss" xmlUrl="https://a.example/feed"/>
+    </outline>
+    <outline text="Link only" htmlUrl="https://d.example/"/>
+  </body>
+</opml>
+"""
+
+URLS = ["https://a.example/feed", "https://b.example/feed", "https://c.example/feed"]
+
+
+def test_reads_nested_outlines_without_duplicates():
+    assert read_opml(OPML) == URLS
+
+
+def test_reads_file(tmp_path):
+    path = tmp_path / "feeds.opml"
+    path.write_bytes(OPML)
+    assert read_opml(str(path)) == URLS
+
+
+def test_invalid_document():
+    with pytest.raises(Exception):
+        read_opml(b"<opml><body>")
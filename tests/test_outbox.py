@@ -0,0 +1,168 @@
+import time
+from datetime import datetime, timezone
+from unittest.mock import MagicMock
+
+from scoutrss import Outbox, ScoutRSS
+from scoutrss.fetch import Response
+from scoutrss.storage import MemoryStorage
+
+URL = "https://example.com/feed.rss"
+OLD = datetime(2024, 1, 10, tzinfo=timezone.utc)
+FEED = (
+    b'<rss version="2.0"><channel><title>t</title>'
+    b"<item><title>two</title><pubDate>Sun, 21 Jan 2024 00:00:00 GMT</pubDate></item>"
+    b"<item><title>one</title><pubDate>Sat, 20 Jan 2024 00:00:00 GMT</pubDate></item>"
+    b"</channel></rss>"
+)
+
+
+def wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def make_outbox(path, **kwargs):
+    kwargs.setdefault("retry_delay", 0.01)
+    kwargs.setdefault("ack_interval", 0)
+    return Outbox(path, **kwargs)
+
+
+class TestOutbox:
+    def test_delivers_in_order(self, tmp_path):
+        outbox = make_outbox(tmp_path)
+        received = []
+        outbox.register("feed", received.append)
+        outbox.put("feed", ["a", "b"])
+        outbox.put("feed", ["c"])
+        wait_for(lambda: len(received) == 3)
+        assert received == ["a", "b", "c"]
+        wait_for(lambda: outbox.pending() == 0)
+        outbox.close()
+
+    def test_routes_by_id(self, tmp_path):
+        outbox = make_outbox(tmp_path)
+        first, second = [], []
+        outbox.register("first", first.append)
+        outbox.register("second", second.append)
+        outbox.put("second", ["x"])
+        outbox.put("first", ["y"])
+        wait_for(lambda: first and second)
+        assert (first, second) == (["y"], ["x"])
+        outbox.close()
+
+    def test_retries_until_success(self, tmp_path):
+        outbox = make_outbox(tmp_path)
+        callback = MagicMock(side_effect=[Exception, Exception, None])
+        outbox.register("feed", callback)
+        outbox.put("feed", ["a"])
+        wait_for(lambda: outbox.pending() == 0)
+        assert callback.call_count == 3
+        outbox.close()
+
+    def test_unconfirmed_is_retried(self, tmp_path):
+        outbox = make_outbox(tmp_path)
+        callback = MagicMock(side_effect=[False, True])
+        outbox.register("feed", callback, require_confirmation=True)
+        outbox.put("feed", ["a"])
+        wait_for(lambda: outbox.pending() == 0)
+        assert callback.call_count == 2
+        outbox.close()
+
+    def test_max_attempts(self, tmp_path):
+        outbox = make_outbox(tmp_path, max_attempts=2)
+        callback = MagicMock(side_effect=Exception)
+        outbox.register("feed", callback)
+        outbox.put("feed", ["a"])
+        wait_for(lambda: outbox.pending() == 0)
+        assert callback.call_count == 2
+        outbox.close()
+
+    def test_failing_watcher_does_not_block_others(self, tmp_path):
+        outbox = make_outbox(tmp_path, retry_delay=0.05)
+        failing = MagicMock(side_effect=[Exception, Exception, None, None])
+        received = []
+        outbox.register("failing", failing)
+        outbox.register("feed", received.append)
+        outbox.put("failing", ["a", "b"])
+        outbox.put("unregistered", ["x"])
+        outbox.put("feed", ["c"])
+        wait_for(lambda: received == ["c"])
+        wait_for(lambda: failing.call_count == 4)
+        assert [c.args[0] for c in failing.call_args_list] == ["a", "a", "a", "b"]
+
+        late = []
+        outbox.register("unregistered", late.append)
+        wait_for(lambda: late == ["x"])
+        wait_for(lambda: outbox.pending() == 0)
+        outbox.close()
+
+    def test_pending_entries_survive_restart(self, tmp_path):
+        outbox = make_outbox(tmp_path)
+        outbox.put("feed", ["a", "b"])
+        outbox.close()
+
+        reopened = make_outbox(tmp_path)
+        received = []
+        reopened.register("feed", received.append)
+        wait_for(lambda: len(received) == 2)
+        reopened.close()
+
+        again = make_outbox(tmp_path)
+        again.register("feed", received.append)
+        time.sleep(0.1)
+        again.close()
+        assert received == ["a", "b"]
+
+    def test_acknowledged_segments_deleted(self, tmp_path):
+        outbox = make_outbox(tmp_path, segment_size=64)
+        received = []
+        outbox.register("feed", received.append)
+        for i in range(20):
+            outbox.put("feed", [f"entry {i}"])
+        wait_for(lambda: len(received) == 20)
+        wait_for(lambda: outbox.pending() == 0)
+        outbox.close()
+        assert received == [f"entry {i}" for i in range(20)]
+        assert len(list(tmp_path.glob("*.log"))) == 1
+
+    def test_torn_tail_truncated(self, tmp_path):
+        outbox = make_outbox(tmp_path)
+        outbox.put("feed", ["a"])
+        outbox.close()
+        (segment,) = tmp_path.glob("*.log")
+        with open(segment, "ab") as f:
+            f.write(b"\x10\x00\x00\x00partial")
+
+        reopened = make_outbox(tmp_path)
+        reopened.put("feed", ["b"])
+        received = []
+        reopened.register("feed", received.append)
+        wait_for(lambda: len(received) == 2)
+        reopened.close()
+        assert received == ["a", "b"]
+
+
+class TestScoutWithOutbox:
+    def test_last_seen_advances_before_delivery(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(
+            "scoutrss.socutrss.fetch",
+            MagicMock(return_value=Response(200, FEED, {}, URL)),
+        )
+        outbox = make_outbox(tmp_path)
+        storage = MemoryStorage()
+        storage.set_last_seen(URL, OLD)
+        callback = MagicMock(side_effect=[Exception, None, None])
+        scout = ScoutRSS(URL, callback, storage=storage, outbox=outbox)
+
+        result = scout.check()
+        assert result.delivered == 2
+        assert storage.get_last_seen(URL) == datetime(2024, 1, 21, tzinfo=timezone.utc)
+        wait_for(lambda: callback.call_count == 3)
+        assert [c.args[0].title for c in callback.call_args_list] == [
+            "one",
+            "one",
+            "two",
+        ]
+        outbox.close()
@@ -0,0 +1,192 @@
+from datetime import datetime, timezone
+
+import feedparser
+
+from scoutrss.parser import SCAN_STOP_AFTER, parse_date, read_feed, scan_new_items
+
+SINCE = datetime(2024, 1, 15, 0, 0, 0, tzinfo=timezone.utc)
+
+
+def rss(*days, extra=""):
+    items = "".join(
+        f"<item><guid>{day}</guid><title>t{day}</title>"
+        f"<pubDate>{day:02d} Jan 2024 00:00:00 GMT</pubDate></item>"
+        for day in days
+    )
+    return (
+        '<?xml version="1.0" encoding="utf-8"?>'
+        '<rss version="2.0" xmlns:dc="http://purl.org/dc/elements/1.1/">'
+        f"<channel><title>feed</title>{extra}{items}</channel></rss>"
+    ).encode()
+
+
+def atom(*days):
+    entries = "".join(
+        f"<entry><id>{day}</id><title>t{day}</title>"
+        f"<published>2024-01-{day:02d}T00:00:00Z</published></entry>"
+        for day in days
+    )
+    return (
+        f'<feed xmlns="http://www.w3.org/2005/Atom"><title>feed</title>{entries}</feed>'
+    ).encode()
+
+
+def titles(body):
+    return [e.title for e in feedparser.parse(body).entries]
+
+
+class TestParseDate:
+    def test_rfc822(self):
+        assert parse_date("Sat, 20 Jan 2024 01:00:00 +0100") == datetime(
+            2024, 1, 20, 0, 0, tzinfo=timezone.utc
+        )
+
+    def test_iso8601(self):
+        assert parse_date("2024-01-20T00:00:00Z") == datetime(
+            2024, 1, 20, tzinfo=timezone.utc
+        )
+
+    def test_naive_is_utc(self):
+        assert parse_date("2024-01-20T00:00:00").tzinfo == timezone.utc
+
+    def test_invalid(self):
+        assert parse_date("yesterday") is None
+        assert parse_date("") is None
+
+
+class TestScanNewItems:
+    def test_keeps_only_recent_items(self):
+        body = scan_new_items(rss(21, 20, 10, 9, 8, 7), SINCE)
+        assert titles(body) == ["t21", "t20"]
+
+    def test_keeps_channel_header(self):
+        body = scan_new_items(rss(21, 10, 9, 8, extra="<ttl>5</ttl>"), SINCE)
+        assert feedparser.parse(body).feed.title == "feed"
+        assert feedparser.parse(body).feed.ttl == "5"
+
+    def test_atom(self):
+        body = scan_new_items(atom(21, 20, 10, 9, 8), SINCE)
+        assert titles(body) == ["t21", "t20"]
+
+    def test_stops_after_consecutive_older_items(self):
+        days = [21] + [10] * SCAN_STOP_AFTER
+        # anything after the stop point is never read, even if malformed
+        body = rss(*days).replace(b"</channel>", b"<item><broken></channel>")
+        assert titles(scan_new_items(body, SINCE)) == ["t21"]
+
+    def test_no_new_items(self):
+        assert titles(scan_new_items(rss(10, 9, 8), SINCE)) == []
+
+    def test_no_items(self):
+        body = rss()
+        assert scan_new_items(body, SINCE) == body
+
+    def test_unsorted_falls_back(self):
+        assert scan_new_items(rss(20, 21, 10), SINCE) is None
+
+    def test_malformed_falls_back(self):
+        assert scan_new_items(b"<rss><channel><item>", SINCE) is None
+
+    def test_unparsable_date_falls_back(self):
+        body = rss(21).replace(b"21 Jan 2024 00:00:00 GMT", b"someday")
+        assert scan_new_items(body, SINCE) is None
+
+    def test_undated_items_kept(self):
+        body = rss(21, 10, 9, 8).replace(
+            b"<item>", b"<item><title>undated</title></item><item>", 1
+        )
+        assert titles(scan_new_items(body, SINCE)) == ["undated", "t21"]
+
+
+class TestReadFeed:
+    def test_rss(self):
+        body = rss(21, 20, extra="<ttl>5</ttl>").replace(
+            b"<title>t21</title>", b"<title>t21</title><link>/posts/21</link>"
+        )
+        document = read_feed(body, {"content-location": "https://example.com/rss"})
+        assert document.feed == {"ttl": "5"}
+        first, second = document.items
+        assert (first.id, first.title, first.link) == (
+            "https://example.com/21",  # resolved like feedparser does
+            "t21",
+            "https://example.com/posts/21",
+        )
+        assert first.published == datetime(2024, 1, 21, tzinfo=timezone.utc)
+        assert second.link == second.id == "https://example.com/20"  # a permalink guid
+
+    def test_guid_not_permalink(self):
+        body = rss(21).replace(b"<guid>", b'<guid isPermaLink="false">')
+        assert read_feed(body).items[0].link is None
+
+    def test_atom(self):
+        body = atom(21).replace(
+            b"<id>",
+            b'<link rel="self" href="/self"/><link href="/posts/21"/>'
+            b"<updated>2024-01-22T10:30:00.5+02:00</updated><id>",
+        )
+        item = read_feed(body, {"content-location": "https://example.com/"}).items[0]
+        assert (item.id, item.title, item.link) == (
+            "https://example.com/21",
+            "t21",
+            "https://example.com/posts/21",
+        )
+        assert item.updated == datetime(2024, 1, 22, 8, 30, tzinfo=timezone.utc)
+
+    def test_agrees_with_feedparser(self):
+        headers = {"content-location": "https://example.com/feed"}
+        for body in (rss(21, 20), atom(21, 20)):
+            expected = feedparser.parse(body, response_headers=headers).entries
+            items = read_feed(body, headers).items
+            assert [i.id for i in items] == [e.id for e in expected]
+            assert [i.link for i in items] == [e.link for e in expected]
+            assert [i.title for i in items] == [e.title for e in expected]
+            assert [i.published.timetuple()[:6] for i in items] == [
+                tuple(e.published_parsed[:6]) for e in expected
+            ]
+
+    def test_non_permalink_guid_agrees_with_feedparser(self):
+        headers = {"content-location": "https://example.com/feed"}
+        body = rss(21, 20).replace(b"<guid>", b'<guid isPermaLink="false">')
+        expected = feedparser.parse(body, response_headers=headers).entries
+        items = read_feed(body, headers).items
+        assert [i.id for i in items] == [e.id for e in expected] == ["21", "20"]
+        assert [i.link for i in items] == [e.get("link") for e in expected]
+
+    def test_element_names_match_case_insensitively(self):
+        for tag in (b"pubdate", b"PubDate"):
+            body = rss(21, 20).replace(b"pubDate>", tag + b">")
+            document = read_feed(body)
+            assert [i.published.day for i in document.candidates(SINCE)] == [21, 20]
+            assert len(feedparser.parse(body).entries) == 2
+            assert titles(scan_new_items(body, SINCE)) == ["t21", "t20"]
+
+    def test_trim(self):
+        document = read_feed(rss(21, 20, 10, 9))
+        body = document.trim(document.candidates(SINCE))
+        assert titles(body) == ["t21", "t20"]
+        assert feedparser.parse(body).feed.title == "feed"
+
+    def test_stops_after_consecutive_older_items(self):
+        days = [21] + [10] * SCAN_STOP_AFTER
+        body = rss(*days).replace(b"</channel>", b"<item><broken></channel>")
+        assert len(read_feed(body, since=SINCE).items) == 1 + SCAN_STOP_AFTER
+
+    def test_unsorted_is_read_in_full(self):
+        days = [10] * SCAN_STOP_AFTER + [21]
+        assert len(read_feed(rss(20, 21, *days), since=SINCE).items) == 6
+
+    def test_left_to_feedparser(self):
+        rdf = b'<rdf:RDF xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#"/>'
+        for body in (
+            b"<rss><channel><item>",  # malformed
+            rss(21).replace(b"<title>t21", b"<title>&nbsp;t21"),  # HTML entity
+            rss(21).replace(b"21 Jan 2024 00:00:00 GMT", b"someday"),
+            rss(21).replace(b"<channel>", b'<channel xml:base="https://a.example/">'),
+            atom(21).replace(
+                b"<title>t21</title>", b'<title type="xhtml"><b/></title>'
+            ),
+            rdf,
+        ):
+            assert read_feed(body) is None
+        headers = {"content-type": "application/rss+xml; charset=windows-1252"}
+        assert read_feed(rss(21), headers) is None
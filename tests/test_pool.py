@@ -0,0 +1,315 @@
+import threading
+from datetime import datetime, timezone
+from unittest.mock import MagicMock, patch
+
+from scoutrss import ScoutPool, ScoutRSS, Shard
+from scoutrss.fetch import Response
+from scoutrss.storage import MemoryStorage
+
+OLD = datetime(2024, 1, 10, 0, 0, 0, tzinfo=timezone.utc)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_scout(url, check=None):
+    storage = MemoryStorage()
+    storage.set_last_seen(url, OLD)
+    scout = ScoutRSS(url, MagicMock(), storage=storage)
+    scout._check = check or MagicMock()
+    return scout
+
+
+def make_pool(**kwargs):
+    pool = ScoutPool(**kwargs)
+    pool._clock = FakeClock()
+    return pool
+
+
+class TestPool:
+    def test_add_and_remove(self):
+        pool = make_pool()
+        scout = make_scout("https://a.example/feed")
+        pool.add(scout)
+        assert len(pool) == 1 and scout.id in pool
+        pool.remove(scout.id)
+        assert len(pool) == 0
+
+    def test_add_many(self):
+        pool = make_pool()
+        scouts = [make_scout(f"https://h{i}.example/feed") for i in range(3)]
+        pool.add_many(scouts, interval=30)
+        assert len(pool) == 3
+        assert pool.tick() == 3
+        pool.stop()
+
+    def test_import_opml(self, tmp_path):
+        path = tmp_path / "feeds.opml"
+        path.write_text(
+            '<opml version="2.0"><body><outline text="News">'
+            '<outline xmlUrl="https://a.example/feed"/>'
+            '<outline xmlUrl="https://b.example/feed"/>'
+            "</outline></body></opml>"
+        )
+        pool = make_pool()
+        scouts = pool.import_opml(str(path), MagicMock(), storage=MemoryStorage())
+        assert [s.id for s in scouts] == [
+            "https://a.example/feed",
+            "https://b.example/feed",
+        ]
+        assert all(s.id in pool for s in scouts)
+
+    def test_tick_runs_due_feeds(self):
+        pool = make_pool()
+        scouts = [make_scout(f"https://h{i}.example/feed") for i in range(3)]
+        for scout in scouts:
+            pool.add(scout)
+        assert pool.tick() == 3
+        pool.stop()
+        for scout in scouts:
+            scout._check.assert_called_once()
+
+    def test_feed_not_due_until_interval_elapses(self):
+        pool = make_pool()
+        scout = make_scout("https://a.example/feed")
+        pool.add(scout, interval=30)
+        pool.tick()
+        pool.stop()
+        assert pool.tick() == 0
+        pool._clock.now += 30
+        assert pool.tick() == 1
+        pool.stop()
+        assert scout._check.call_count == 2
+
+    def test_removed_feed_not_run(self):
+        pool = make_pool()
+        scout = make_scout("https://a.example/feed")
+        pool.add(scout)
+        pool.remove(scout.id)
+        assert pool.tick() == 0
+        pool.stop()
+
+    def test_stop_shuts_down_callback_executors(self):
+        pool = make_pool()
+        scout = make_scout("https://a.example/feed")
+        scout.concurrency = 4
+        scout._callback_executor = executor = MagicMock()
+        shared = make_scout("https://b.example/feed")
+        shared._callback_executor = MagicMock()
+        shared._owns_callback_executor = False  # passed in by the caller
+        pool.add(scout)
+        pool.add(shared)
+        pool.stop()
+        executor.shutdown.assert_called_once()
+        assert scout._callback_executor is None
+        shared._callback_executor.shutdown.assert_not_called()
+
+    def test_check_exception_does_not_stop_feed(self):
+        pool = make_pool()
+        scout = make_scout("https://a.example/feed", MagicMock(side_effect=Exception))
+        pool.add(scout, interval=10)
+        pool.tick()
+        pool.stop()
+        pool._clock.now += 10
+        assert pool.tick() == 1
+        pool.stop()
+
+    def test_state_read_in_bulk(self):
+        pool = make_pool()
+        storage = MemoryStorage()
+        scouts = []
+        for i in range(3):
+            scout = make_scout(f"https://h{i}.example/feed")
+            scout.storage = storage
+            storage.set_last_seen(scout.id, OLD)
+            scouts.append(scout)
+            pool.add(scout)
+        with patch.object(storage, "get_many", wraps=storage.get_many) as get_many:
+            pool.tick()
+            pool.stop()
+        get_many.assert_called_once()
+        for scout in scouts:
+            scout._check.assert_called_once_with(OLD, None)
+
+    def test_bulk_read_failure_falls_back_to_check(self):
+        pool = make_pool()
+        scout = make_scout("https://a.example/feed")
+        scout.check = MagicMock()
+        pool.add(scout)
+        with patch.object(scout.storage, "get_many", side_effect=Exception):
+            pool.tick()
+            pool.stop()
+        scout.check.assert_called_once()
+
+
+class TestPoolShard:
+    def test_pools_split_feeds(self):
+        leases = MemoryStorage()
+        shards = [Shard(leases, worker=w) for w in "ab"]
+        for shard in shards + shards:
+            shard.heartbeat(force=True)
+        scouts = [make_scout(f"https://h{i}.example/feed") for i in range(20)]
+        for shard in shards:
+            pool = make_pool(shard=shard)
+            pool.add_many(scouts)
+            pool.tick()
+            pool.stop()
+        for scout in scouts:
+            scout._check.assert_called_once()
+        assert leases.get_leases("scoutrss/") == {}  # released on stop
+
+    def test_leased_feed_skipped(self):
+        leases = MemoryStorage()
+        leases.acquire_lease("scoutrss/feed/https://a.example/feed", "other", 30)
+        pool = make_pool(shard=Shard(leases, worker="a"))
+        scout = make_scout("https://a.example/feed")
+        pool.add(scout)
+        pool.tick()
+        pool.stop()
+        scout._check.assert_not_called()
+
+
+class TestPoolLimits:
+    def _blocking_check(self, release, started):
+        def check(stored, parse_executor):
+            started.release()
+            release.wait(5)
+
+        return check
+
+    def test_global_limit(self):
+        release, started = threading.Event(), threading.Semaphore(0)
+        pool = make_pool(max_workers=2, max_per_host=10)
+        for i in range(5):
+            pool.add(
+                make_scout(
+                    f"https://h{i}.example/feed",
+                    self._blocking_check(release, started),
+                )
+            )
+        assert pool.tick() == 2
+        assert pool.tick() == 0
+        release.set()
+        pool.stop()
+        assert pool.tick() == 2
+
+    def test_per_host_limit(self):
+        release, started = threading.Event(), threading.Semaphore(0)
+        pool = make_pool(max_workers=10, max_per_host=1)
+        for i in range(3):
+            pool.add(
+                make_scout(
+                    f"https://same.example/feed{i}",
+                    self._blocking_check(release, started),
+                )
+            )
+        pool.add(make_scout("https://other.example/feed"))
+        assert pool.tick() == 2
+        assert pool.tick() == 0
+        release.set()
+        pool.stop()
+        assert pool.tick() == 1
+
+
+class TestPoolScheduling:
+    def test_jitter_spreads_first_runs(self):
+        pool = make_pool(interval=100, jitter=1.0, max_workers=32)
+        pool.add_many(make_scout(f"https://h{i}.example/feed") for i in range(20))
+        runs = [feed.next_run - 1000.0 for feed in pool._feeds.values()]
+        assert all(0 <= run < 100 for run in runs)
+        assert len(set(runs)) == 20
+        assert pool.tick() == 0
+        pool._clock.now += 100
+        assert pool.tick() == 20
+        pool.stop()
+
+    def test_jittered_interval(self):
+        pool = make_pool(interval=100, jitter=0.2)
+        scout = make_scout("https://a.example/feed")
+        pool.add(scout)
+        feed = pool._feeds[scout.id]
+        intervals = set()
+        for _ in range(5):
+            feed.runs += 1
+            intervals.add(pool._next_interval(feed))
+        assert all(90 <= i <= 110 for i in intervals) and len(intervals) == 5
+
+    def test_host_rate(self):
+        pool = make_pool(max_per_host=10, host_rate=1, host_burst=2)
+        for i in range(4):
+            pool.add(make_scout(f"https://same.example/feed{i}"))
+        pool.add(make_scout("https://other.example/feed"))
+        assert pool.tick() == 3
+        assert pool.stats()["throttled"] == 2
+        assert pool.tick() == 0
+        pool._clock.now += 1
+        assert pool.tick() == 1
+        pool._clock.now += 1
+        assert pool.tick() == 1
+        pool.stop()
+
+    def test_stats(self):
+        release, started = threading.Event(), threading.Semaphore(0)
+
+        def check(stored, parse_executor):
+            started.release()
+            release.wait(5)
+
+        pool = make_pool(max_workers=1)
+        for i in range(3):
+            pool.add(make_scout(f"https://h{i}.example/feed", check))
+        pool._clock.now += 5
+        assert pool.tick() == 1
+        assert started.acquire(timeout=5)
+        stats = pool.stats()
+        assert stats["feeds"] == 3 and stats["inflight"] == 1
+        assert stats["due"] == 2
+        assert stats["lag"] == stats["submit_lag"] == 5
+        release.set()
+        pool.stop()
+
+
+class TestPoolListen:
+    def test_listen_and_stop(self):
+        done = threading.Event()
+        pool = ScoutPool(tick=0.01)
+        pool.add(
+            make_scout(
+                "https://a.example/feed",
+                MagicMock(side_effect=lambda *args: done.set()),
+            )
+        )
+        pool.listen()
+        assert done.wait(2)
+        pool.stop()
+        assert pool._thread is None
+
+
+class TestPoolParseWorkers:
+    FEED = (
+        b'<rss version="2.0"><channel><title>t</title><ttl>5</ttl>'
+        b"<item><title>two</title><pubDate>Sun, 21 Jan 2024 00:00:00 GMT</pubDate></item>"
+        b"<item><title>one</title><pubDate>Sat, 20 Jan 2024 00:00:00 GMT</pubDate></item>"
+        b"<item><title>old</title><pubDate>Fri, 05 Jan 2024 00:00:00 GMT</pubDate></item>"
+        b"</channel></rss>"
+    )
+
+    def test_parses_in_processes_and_delivers_in_parent(self):
+        url = "https://a.example/feed"
+        storage = MemoryStorage()
+        storage.set_last_seen(url, OLD)
+        callback = MagicMock(return_value=True)
+        scout = ScoutRSS(url, callback, storage=storage)
+        pool = ScoutPool(parse_workers=1)
+        pool.add(scout)
+        response = Response(200, self.FEED, {}, url)
+        with patch("scoutrss.socutrss.fetch", return_value=response):
+            pool.tick()
+            pool.stop()
+        assert [c.args[0].title for c in callback.call_args_list] == ["one", "two"]
+        assert scout.last_seen == datetime(2024, 1, 21, tzinfo=timezone.utc)
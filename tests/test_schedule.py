@@ -0,0 +1,110 @@
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import pytest
+
+from scoutrss.schedule import (
+    AdaptiveInterval,
+    TokenBucket,
+    jitter_fraction,
+    poll_hint,
+    retry_after,
+)
+
+T0 = datetime(2024, 1, 20, 0, 0, 0, tzinfo=timezone.utc)
+
+
+class TestHints:
+    def test_no_hints(self):
+        assert poll_hint({}, {}) is None
+        assert poll_hint(None) is None
+
+    def test_max_age(self):
+        assert poll_hint({"cache-control": "public, max-age=600"}) == 600
+
+    def test_retry_after_seconds(self):
+        assert retry_after({"retry-after": "120"}) == 120
+
+    def test_retry_after_date(self):
+        when = datetime.now(tz=timezone.utc) + timedelta(minutes=10)
+        delay = retry_after({"Retry-After": format_datetime(when, usegmt=True)})
+        assert 590 <= delay <= 600
+
+    def test_ttl_in_minutes(self):
+        assert poll_hint({}, {"ttl": "30"}) == 1800
+
+    def test_update_period(self):
+        feed = {"sy_updateperiod": "hourly", "sy_updatefrequency": "2"}
+        assert poll_hint({}, feed) == 1800
+
+    def test_longest_hint_wins(self):
+        assert poll_hint({"cache-control": "max-age=60"}, {"ttl": "5"}) == 300
+
+
+class TestAdaptiveInterval:
+    def test_new_feed_starts_at_min(self):
+        policy = AdaptiveInterval(min_interval=60)
+        assert policy.update(None, [])["interval"] == 90  # backed off once
+
+    def test_learns_from_publish_gaps(self):
+        policy = AdaptiveInterval(min_interval=60, max_interval=86400, factor=0.5)
+        published = [T0 + timedelta(hours=i) for i in range(4)]
+        state = policy.update(None, published)
+        assert state["interval"] == 1800
+
+    def test_backs_off_without_new_entries(self):
+        policy = AdaptiveInterval(min_interval=60, backoff=2)
+        state = policy.update({"interval": 100}, [])
+        assert state["interval"] == 200
+
+    def test_backs_off_on_error(self):
+        policy = AdaptiveInterval(backoff=2)
+        state = policy.update({"interval": 100}, [T0], error=True)
+        assert state["interval"] == 200
+
+    @pytest.mark.parametrize("interval,expected", [(10, 60), (10**9, 3600)])
+    def test_clamped(self, interval, expected):
+        policy = AdaptiveInterval(min_interval=60, max_interval=3600, backoff=1)
+        assert policy.update({"interval": interval}, [])["interval"] == expected
+
+    def test_hint_is_a_floor(self):
+        policy = AdaptiveInterval(min_interval=60, max_interval=86400, backoff=1)
+        assert policy.update({"interval": 100}, [], hint=900)["interval"] == 900
+
+    def test_history_bounded(self):
+        policy = AdaptiveInterval(history=3)
+        published = [T0 + timedelta(hours=i) for i in range(10)]
+        assert len(policy.update(None, published)["published"]) == 3
+
+    def test_history_carried_across_updates(self):
+        policy = AdaptiveInterval(min_interval=1, max_interval=86400, factor=1)
+        state = policy.update(None, [T0])
+        state = policy.update(state, [T0 + timedelta(hours=2)])
+        assert state["interval"] == 7200
+
+
+class TestJitter:
+    def test_deterministic_fraction(self):
+        assert jitter_fraction("https://a.example/feed") == jitter_fraction(
+            "https://a.example/feed"
+        )
+        fractions = [jitter_fraction(f"https://h{i}.example/feed") for i in range(100)]
+        assert all(0 <= f < 1 for f in fractions)
+        assert len(set(fractions)) == 100
+        assert 0.3 < sum(fractions) / 100 < 0.7
+
+
+class TestTokenBucket:
+    def test_burst_then_rate(self):
+        bucket = TokenBucket(rate=2, burst=2)
+        assert bucket.take(0) == 0
+        assert bucket.take(0) == 0
+        assert bucket.take(0) == pytest.approx(0.5)
+        assert bucket.take(0.25) == pytest.approx(0.25)
+        assert bucket.take(0.5) == 0
+
+    def test_tokens_capped_at_burst(self):
+        bucket = TokenBucket(rate=1, burst=1)
+        assert bucket.take(0) == 0
+        assert bucket.take(100) == 0
+        assert bucket.take(100) == pytest.approx(1)
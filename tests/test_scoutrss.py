@@ -1,10 +1,21 @@
+import pickle
+import subprocess
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
-from time import strptime
+from time import strptime, tzset
 from unittest.mock import MagicMock, call, patch
 
 import pytest
-
-from scoutrss import ScoutRSS
+from feedparser import FeedParserDict, parse
+
+from scoutrss import CheckResult, ScoutRSS
+from scoutrss.fetch import Response
+from scoutrss.metrics import add_listener, remove_listener
+from scoutrss.schedule import AdaptiveInterval, jitter_fraction
+from scoutrss.seen import SeenIndex
+from scoutrss.socutrss import parse_new_entries
 from scoutrss.storage import MemoryStorage
 
 URL = "https://example.com/feed.rss"
@@ -23,10 +34,17 @@ def make_entry(published: datetime) -> MagicMock:
     return entry
 
 
-def make_parsed(*entries):
-    parsed = MagicMock()
-    parsed.entries = list(entries)
-    return parsed
+def make_parsed(*entries, **fields):
+    return FeedParserDict(entries=list(entries), **fields)
+
+
+@pytest.fixture(autouse=True)
+def fetch():
+    # no network: checks download an empty document unless a test says otherwise
+    with patch(
+        "scoutrss.socutrss.fetch", return_value=Response(200, b"", {}, URL)
+    ) as mock:
+        yield mock
 
 
 class TestInit:
@@ -63,6 +81,58 @@ class TestInit:
         assert scout.last_seen == NEW1
         assert storage.get_last_seen(URL) == NEW1
 
+    def test_stored_last_seen_not_written_back(self):
+        storage = MemoryStorage()
+        storage.set_last_seen(URL, OLD)
+        with patch.object(storage, "set_last_seen") as set_last_seen:
+            ScoutRSS(URL, lambda e: None, storage=storage)
+        set_last_seen.assert_not_called()
+
+    def test_deferred_initialization(self):
+        storage = MemoryStorage()
+        with patch.object(storage, "get_last_seen") as get_last_seen, patch.object(
+            storage, "set_last_seen"
+        ) as set_last_seen:
+            scout = ScoutRSS(URL, lambda e: None, storage=storage, initialize=False)
+        assert scout.last_seen is None
+        get_last_seen.assert_not_called()
+        set_last_seen.assert_not_called()
+
+
+class TestCreateMany:
+    def test_one_bulk_read_and_write(self):
+        storage = MemoryStorage()
+        storage.set_last_seen("known", OLD)
+        feeds = [("https://a.example/feed", "known"), "https://b.example/feed"]
+        with patch.object(
+            storage, "get_many", wraps=storage.get_many
+        ) as get_many, patch.object(
+            storage, "set_many", wraps=storage.set_many
+        ) as set_many, patch.object(storage, "get_last_seen") as get_last_seen:
+            scouts = ScoutRSS.create_many(feeds, lambda e: None, storage=storage)
+        get_many.assert_called_once_with(["known", "https://b.example/feed"])
+        set_many.assert_called_once()
+        assert list(set_many.call_args[0][0]) == ["https://b.example/feed"]
+        get_last_seen.assert_not_called()
+        assert [s.id for s in scouts] == ["known", "https://b.example/feed"]
+        assert scouts[0].last_seen == OLD
+        assert scouts[1].last_seen == storage.get_last_seen("https://b.example/feed")
+
+    def test_no_write_when_all_known(self):
+        storage = MemoryStorage()
+        storage.set_last_seen(URL, OLD)
+        with patch.object(storage, "set_many") as set_many:
+            ScoutRSS.create_many([URL], lambda e: None, storage=storage)
+        set_many.assert_not_called()
+
+    def test_first_check_uses_stored_state(self):
+        storage = MemoryStorage()
+        (scout,) = ScoutRSS.create_many([URL], MagicMock(), storage=storage)
+        storage.set_last_seen(URL, NEW1)
+        with patch("scoutrss.socutrss.parse", return_value=make_parsed()):
+            scout.check()
+        assert scout.last_seen == NEW1
+
 
 class TestStructToDatetime:
     def test_converts_struct_time(self):
@@ -71,6 +141,17 @@ class TestStructToDatetime:
         assert isinstance(result, datetime)
         assert result.tzinfo == timezone.utc
 
+    def test_ignores_the_local_timezone(self, monkeypatch):
+        monkeypatch.setenv("TZ", "America/New_York")
+        tzset()
+        try:
+            struct = strptime("2024-01-15 12:00:00", "%Y-%m-%d %H:%M:%S")
+            result = ScoutRSS._struct_to_datetime(struct)
+        finally:
+            monkeypatch.undo()
+            tzset()
+        assert result == datetime(2024, 1, 15, 12, tzinfo=timezone.utc)
+
 
 class TestCheck:
     def _make_scout(self, callback=None, require_confirmation=False):
@@ -188,6 +269,635 @@ class TestCheck:
         assert scout.last_seen == NEW1
 
 
+class TestBatch:
+    def _make_scout(self, callback=None, **kwargs):
+        storage = MemoryStorage()
+        storage.set_last_seen(URL, OLD)
+        return ScoutRSS(
+            URL,
+            callback or MagicMock(return_value=True),
+            storage=storage,
+            batch=True,
+            **kwargs,
+        )
+
+    def test_callback_receives_list_oldest_first(self):
+        scout = self._make_scout()
+        e1, e2, e3 = make_entry(NEW1), make_entry(NEW2), make_entry(NEW3)
+        with patch("scoutrss.socutrss.parse", return_value=make_parsed(e3, e2, e1)):
+            scout.check()
+        scout.callback.assert_called_once_with([e1, e2, e3])
+        assert scout.last_seen == ScoutRSS._struct_to_datetime(e3.published_parsed)
+
+    def test_single_commit_per_batch(self):
+        scout = self._make_scout()
+        entries = [make_entry(NEW1), make_entry(NEW2), make_entry(NEW3)]
+        with patch.object(scout.storage, "set_last_seen") as set_last_seen:
+            with patch("scoutrss.socutrss.parse", return_value=make_parsed(*entries)):
+                scout.check()
+        set_last_seen.assert_called_once()
+
+    def test_max_batch_size(self):
+        scout = self._make_scout(max_batch_size=2)
+        e1, e2, e3 = make_entry(NEW1), make_entry(NEW2), make_entry(NEW3)
+        with patch("scoutrss.socutrss.parse", return_value=make_parsed(e3, e2, e1)):
+            scout.check()
+        assert scout.callback.call_args_list == [call([e1, e2]), call([e3])]
+
+    def test_no_callback_without_new_entries(self):
+        scout = self._make_scout()
+        with patch("scoutrss.socutrss.parse", return_value=make_parsed()):
+            scout.check()
+        scout.callback.assert_not_called()
+
+    def test_rejected_batch_stops_at_previous_batch(self):
+        scout = self._make_scout(
+            callback=MagicMock(side_effect=[True, False]),
+            require_confirmation=True,
+            max_batch_size=2,
+        )
+        e1, e2, e3 = make_entry(NEW1), make_entry(NEW2), make_entry(NEW3)
+        with patch("scoutrss.socutrss.parse", return_value=make_parsed(e3, e2, e1)):
+            scout.check()
+        assert scout.last_seen == ScoutRSS._struct_to_datetime(e2.published_parsed)
+
+    def test_failed_batch_does_not_update(self):
+        scout = self._make_scout(callback=MagicMock(side_effect=Exception("fail")))
+        with patch(
+            "scoutrss.socutrss.parse",
+            return_value=make_parsed(make_entry(NEW2), make_entry(NEW1)),
+        ):
+            scout.check()
+        assert scout.last_seen == OLD
+
+
+class TestConditionalGet:
+    def _make_scout(self, callback=None):
+        storage = MemoryStorage()
+        storage.set_last_seen(URL, OLD)
+        return ScoutRSS(URL, callback or MagicMock(return_value=True), storage=storage)
+
+    def test_first_request_sends_no_validators(self, fetch):
+        scout = self._make_scout()
+        with patch("scoutrss.socutrss.parse", return_value=make_parsed()):
+            scout.check()
+        fetch.assert_called_once_with(URL, etag=None, modified=None)
+
+    def test_validators_stored_and_sent_on_next_request(self, fetch):
+        scout = self._make_scout()
+        headers = {"etag": '"abc"', "last-modified": "Mon, 01 Jan"}
+        fetch.return_value = Response(200, b"", headers, URL)
+        with patch(
+            "scoutrss.socutrss.parse", return_value=make_parsed(make_entry(NEW1))
+        ):
+            scout.check()
+        assert scout.storage.get_http_cache(URL) == {
+            "etag": '"abc"',
+            "modified": "Mon, 01 Jan",
+        }
+        fetch.reset_mock()
+        with patch("scoutrss.socutrss.parse", return_value=make_parsed()):
+            scout.check()
+        fetch.assert_called_once_with(URL, etag='"abc"', modified="Mon, 01 Jan")
+
+    def test_not_modified_skips_processing(self, fetch):
+        scout = self._make_scout()
+        fetch.return_value = Response(304, b"", {}, URL)
+        with patch("scoutrss.socutrss.parse") as mock_parse:
+            scout.check()
+        mock_parse.assert_not_called()
+        scout.callback.assert_not_called()
+        assert scout.last_seen == OLD
+
+    def test_validators_not_stored_when_processing_stops(self, fetch):
+        scout = self._make_scout(callback=MagicMock(side_effect=Exception("fail")))
+        fetch.return_value = Response(200, b"", {"etag": '"abc"'}, URL)
+        with patch(
+            "scoutrss.socutrss.parse", return_value=make_parsed(make_entry(NEW1))
+        ):
+            scout.check()
+        assert scout.storage.get_http_cache(URL) is None
+
+    def test_custom_fetcher(self, fetch):
+        fetcher = MagicMock()
+        fetcher.fetch.return_value = Response(304, b"", {}, URL)
+        scout = self._make_scout()
+        scout.fetcher = fetcher
+        assert scout.check().not_modified
+        fetcher.fetch.assert_called_once_with(URL, etag=None, modified=None)
+        fetch.assert_not_called()
+
+
+class TestIncremental:
+    FEED = (
+        b'<rss version="2.0"><channel><title>t</title>'
+        b"<item><title>two</title><pubDate>Sun, 21 Jan 2024 00:00:00 GMT</pubDate></item>"
+        b"<item><title>one</title><pubDate>Sat, 20 Jan 2024 00:00:00 GMT</pubDate></item>"
+        b"<item><title>old</title><pubDate>Fri, 05 Jan 2024 00:00:00 GMT</pubDate></item>"
+        b"</channel></rss>"
+    )
+
+    def _make_scout(self):
+        storage = MemoryStorage()
+        storage.set_last_seen(URL, OLD)
+        return ScoutRSS(
+            URL, MagicMock(return_value=True), storage=storage, incremental=True
+        )
+
+    def test_delivers_new_entries(self):
+        scout = self._make_scout()
+        response = Response(200, self.FEED, {"etag": '"v1"'}, URL)
+        with patch("scoutrss.socutrss.fetch", return_value=response) as fetch:
+            scout.check()
+        fetch.assert_called_once_with(URL, etag=None, modified=None)
+        titles = [c.args[0].title for c in scout.callback.call_args_list]
+        assert titles == ["one", "two"]
+        assert scout.storage.get_http_cache(URL) == {"etag": '"v1"'}
+
+    def test_only_new_entries_parsed(self):
+        scout = self._make_scout()
+        response = Response(200, self.FEED, {}, URL)
+        with patch("scoutrss.socutrss.fetch", return_value=response):
+            with patch("scoutrss.socutrss.parse", wraps=parse) as mock_parse:
+                scout.check()
+        assert b"<title>old</title>" not in mock_parse.call_args[0][0]
+
+    def test_not_modified(self):
+        scout = self._make_scout()
+        with patch("scoutrss.socutrss.fetch", return_value=Response(304, b"", {}, URL)):
+            with patch("scoutrss.socutrss.parse") as mock_parse:
+                scout.check()
+        mock_parse.assert_not_called()
+        scout.callback.assert_not_called()
+
+
+class TestContentHash:
+    FEED = (
+        b'<rss version="2.0"><channel><title>t</title>'
+        b"<lastBuildDate>{build}</lastBuildDate>"
+        b"<item><title>one</title><pubDate>Sat, 20 Jan 2024 00:00:00 GMT</pubDate></item>"
+        b"</channel></rss>"
+    )
+
+    def _make_scout(self, callback=None):
+        storage = MemoryStorage()
+        storage.set_last_seen(URL, OLD)
+        return ScoutRSS(
+            URL,
+            callback or MagicMock(return_value=True),
+            storage=storage,
+            content_hash=True,
+        )
+
+    def _response(self, build=b"Mon, 01 Jan 2024 00:00:00 GMT"):
+        return Response(200, self.FEED.replace(b"{build}", build), {}, URL)
+
+    def test_unchanged_body_skips_parsing(self):
+        scout = self._make_scout()
+        with patch("scoutrss.socutrss.fetch", return_value=self._response()):
+            first = scout.check()
+            with patch("scoutrss.socutrss.parse") as mock_parse:
+                second = scout.check()
+        mock_parse.assert_not_called()
+        assert not first.unchanged and first.delivered == 1
+        assert second.unchanged
+        assert second.content_hash == first.content_hash
+        assert scout.storage.get_http_cache(URL) == {"hash": first.content_hash}
+
+    def test_volatile_build_date_ignored(self):
+        scout = self._make_scout()
+        with patch("scoutrss.socutrss.fetch", return_value=self._response()):
+            scout.check()
+        changed = self._response(build=b"Tue, 02 Jan 2024 00:00:00 GMT")
+        with patch("scoutrss.socutrss.fetch", return_value=changed):
+            assert scout.check().unchanged
+
+    def test_hash_not_stored_when_processing_stops(self):
+        scout = self._make_scout(callback=MagicMock(side_effect=Exception("fail")))
+        with patch("scoutrss.socutrss.fetch", return_value=self._response()):
+            result = scout.check()
+        assert result.content_hash and result.delivered == 0
+        assert scout.storage.get_http_cache(URL) is None
+
+
+class TestCheckResult:
+    def test_counts(self):
+        storage = MemoryStorage()
+        storage.set_last_seen(URL, OLD)
+        scout = ScoutRSS(URL, MagicMock(side_effect=[True, Exception]), storage=storage)
+        parsed = make_parsed(make_entry(NEW2), make_entry(NEW1))
+        with patch("scoutrss.socutrss.parse", return_value=parsed):
+            result = scout.check()
+        assert (result.status, result.new, result.delivered) == (200, 2, 1)
+        assert isinstance(result, CheckResult)
+
+    def test_not_modified(self, fetch):
+        storage = MemoryStorage()
+        storage.set_last_seen(URL, OLD)
+        scout = ScoutRSS(URL, MagicMock(), storage=storage)
+        fetch.return_value = Response(304, b"", {}, URL)
+        result = scout.check()
+        assert result.not_modified and result.status == 304
+
+
+class TestAdaptive:
+    def _make_scout(self, storage=None):
+        storage = storage or MemoryStorage()
+        storage.set_last_seen(URL, OLD)
+        return ScoutRSS(
+            URL,
+            MagicMock(return_value=True),
+            storage=storage,
+            adaptive=AdaptiveInterval(min_interval=60, max_interval=86400, factor=1),
+        )
+
+    def test_interval_learned_and_persisted(self):
+        scout = self._make_scout()
+        parsed = make_parsed(make_entry(NEW2), make_entry(NEW1))
+        with patch("scoutrss.socutrss.parse", return_value=parsed):
+            scout.check()
+        assert scout.interval == 86400
+        assert scout.storage.get_schedule(URL)["interval"] == 86400
+
+    def test_state_survives_restart(self, fetch):
+        storage = MemoryStorage()
+        storage.set_schedule(URL, {"interval": 1000, "published": []})
+        scout = self._make_scout(storage)
+        fetch.return_value = Response(304, b"", {}, URL)
+        scout.check()
+        assert scout.interval == 1500
+
+    def test_hint_from_feed(self):
+        scout = self._make_scout()
+        parsed = make_parsed(feed=FeedParserDict(ttl="120"))
+        with patch("scoutrss.socutrss.parse", return_value=parsed):
+            result = scout.check()
+        assert result.hint == 7200
+        assert scout.interval == 7200
+
+    def test_backs_off_on_exception(self, fetch):
+        scout = self._make_scout()
+        scout.storage.set_schedule(URL, {"interval": 100})
+        fetch.side_effect = OSError
+        with pytest.raises(OSError):
+            scout.check()
+        assert scout.interval == 150
+
+    def test_listen_reschedules_job(self, fetch):
+        scout = self._make_scout()
+        mock_scheduler = MagicMock()
+        scout.listen(interval=30, scheduler=mock_scheduler)
+        job = mock_scheduler.add_job.call_args[0][0]
+        fetch.return_value = Response(304, b"", {}, URL)
+        job()
+        mock_scheduler.reschedule_job.assert_called_once_with(
+            f"scoutrss:{URL}", trigger="interval", seconds=90
+        )
+
+
+class TestSeenIndex:
+    def _feed(self, *items):
+        body = "".join(
+            f"<item><guid>{guid}</guid>"
+            + (f"<pubDate>{date}</pubDate>" if date else "")
+            + "</item>"
+            for guid, date in items
+        )
+        return Response(200, f"<rss><channel>{body}</channel></rss>".encode(), {}, URL)
+
+    def _make_scout(self, storage=None, callback=None, **kwargs):
+        storage = storage or MemoryStorage()
+        storage.set_last_seen(URL, OLD)
+        return ScoutRSS(
+            URL,
+            callback or MagicMock(return_value=True),
+            storage=storage,
+            seen=SeenIndex(**kwargs),
+        )
+
+    def _delivered(self, scout):
+        return [c.args[0].id for c in scout.callback.call_args_list]
+
+    def test_undated_entries_after_the_first_check(self, fetch):
+        scout = self._make_scout()
+        fetch.return_value = self._feed(("history", None))
+        scout.check()
+        fetch.return_value = self._feed(("fresh", None), ("history", None))
+        scout.check()
+        scout.check()
+        assert self._delivered(scout) == ["fresh"]
+
+    def test_entries_sharing_a_timestamp(self, fetch):
+        scout = self._make_scout()
+        date = "Sat, 20 Jan 2024 00:00:00 GMT"
+        fetch.return_value = self._feed(("a", date))
+        scout.check()
+        fetch.return_value = self._feed(("b", date), ("a", date))
+        scout.check()
+        assert self._delivered(scout) == ["a", "b"]
+
+    def test_old_entries_not_delivered(self, fetch):
+        scout = self._make_scout()
+        fetch.return_value = self._feed(("old", "Fri, 05 Jan 2024 00:00:00 GMT"))
+        scout.check()
+        assert self._delivered(scout) == []
+
+    def test_enabled_on_a_feed_with_stored_state(self, fetch):
+        date = "Sat, 20 Jan 2024 00:00:00 GMT"
+        storage = MemoryStorage()
+        storage.set_last_seen(URL, datetime(2024, 1, 20, tzinfo=timezone.utc))
+        scout = ScoutRSS(
+            URL, MagicMock(return_value=True), storage=storage, seen=SeenIndex()
+        )
+        fetch.return_value = self._feed(
+            ("e", date), ("d", "Fri, 19 Jan 2024 00:00:00 GMT")
+        )
+        scout.check()
+        scout.check()
+        assert self._delivered(scout) == []
+        fetch.return_value = self._feed(("f", date), ("e", date))
+        scout.check()
+        assert self._delivered(scout) == ["f"]
+
+    def test_index_persisted_once_per_check(self, fetch):
+        storage = MagicMock(wraps=MemoryStorage())
+        scout = self._make_scout(storage)
+        fetch.return_value = self._feed(
+            ("b", "Sun, 21 Jan 2024 00:00:00 GMT"),
+            ("a", "Sat, 20 Jan 2024 00:00:00 GMT"),
+        )
+        scout.check()
+        assert storage.set_seen.call_count == 1
+        scout.check()
+        assert storage.set_seen.call_count == 1
+
+        restarted = self._make_scout(storage)
+        restarted.check()
+        assert self._delivered(restarted) == []
+
+    def test_failed_entry_retried(self, fetch):
+        scout = self._make_scout(callback=MagicMock(side_effect=[Exception, True]))
+        fetch.return_value = self._feed(("a", None))
+        scout.check()  # primes the index with "a"
+        fetch.return_value = self._feed(("b", None), ("a", None))
+        scout.check()
+        scout.check()
+        assert self._delivered(scout) == ["b", "b"]
+
+    def test_updates(self, fetch):
+        scout = self._make_scout(updates=True)
+        fetch.return_value = Response(
+            200,
+            b"<feed xmlns='http://www.w3.org/2005/Atom'><entry><id>a</id>"
+            b"<published>2024-01-20T00:00:00Z</published>"
+            b"<updated>2024-01-20T00:00:00Z</updated></entry></feed>",
+            {},
+            URL,
+        )
+        scout.check()
+        fetch.return_value = Response(
+            200,
+            fetch.return_value.body.replace(
+                b"<updated>2024-01-20", b"<updated>2024-01-25"
+            ),
+            {},
+            URL,
+        )
+        scout.check()
+        assert self._delivered(scout) == ["a", "a"]
+
+
+class TestFields:
+    def _make_scout(self, **kwargs):
+        storage = MemoryStorage()
+        storage.set_last_seen(URL, OLD)
+        return ScoutRSS(
+            URL,
+            MagicMock(return_value=True),
+            storage=storage,
+            fields=("title", "published"),
+            **kwargs,
+        )
+
+    def test_callback_gets_records(self, fetch):
+        scout = self._make_scout()
+        fetch.return_value = Response(200, TestIncremental.FEED, {}, URL)
+        result = scout.check()
+        records = [c.args[0] for c in scout.callback.call_args_list]
+        assert [r.title for r in records] == ["one", "two"]
+        assert records[0]._asdict() == {"title": "one", "published": NEW1}
+        assert scout.last_seen == NEW2
+        assert result.published == [NEW1, NEW2]
+
+    def test_records_with_seen_index(self, fetch):
+        scout = self._make_scout(seen=SeenIndex())
+        fetch.return_value = Response(
+            200,
+            b"<rss><channel><item><guid>a</guid><title>undated</title></item>"
+            b"</channel></rss>",
+            {},
+            URL,
+        )
+        scout.check()  # primes the index
+        fetch.return_value = Response(
+            200,
+            b"<rss><channel><item><guid>b</guid><title>new</title></item>"
+            b"<item><guid>a</guid><title>undated</title></item></channel></rss>",
+            {},
+            URL,
+        )
+        scout.check()
+        scout.check()
+        records = [c.args[0] for c in scout.callback.call_args_list]
+        assert [(r.title, r.published) for r in records] == [("new", None)]
+
+    def test_invalid_field(self):
+        with pytest.raises(ValueError):
+            ScoutRSS(URL, print, storage=MemoryStorage(), fields=("not valid",))
+
+
+class TestInstrumentation:
+    FEED = TestIncremental.FEED
+
+    def _make_scout(self, **kwargs):
+        storage = MemoryStorage()
+        storage.set_last_seen(URL, OLD)
+        return ScoutRSS(URL, MagicMock(return_value=True), storage=storage, **kwargs)
+
+    def test_result_breakdown(self, fetch):
+        fetch.return_value = Response(200, self.FEED, {}, URL, 0.25)
+        result = self._make_scout().check()
+        assert result.bytes == len(self.FEED)
+        assert (result.parsed, result.new, result.delivered) == (3, 2, 2)
+        assert set(result.timings) == {
+            "connect",
+            "fetch",
+            "parse",
+            "deliver",
+            "storage",
+        }
+        assert result.timings["connect"] == 0.25
+        # last_seen and http cache reads, two commits; no validators to store
+        assert result.storage_calls == 4
+        assert result.duration >= sum(
+            result.timings[p] for p in ("fetch", "parse", "deliver")
+        )
+
+    def test_filter_timed_separately_with_seen_index(self, fetch):
+        fetch.return_value = Response(200, self.FEED, {}, URL)
+        result = self._make_scout(seen=SeenIndex()).check()
+        assert result.parsed == 3
+        assert "filter" in result.timings
+
+    def test_listeners(self, fetch):
+        listener = MagicMock()
+        scout = self._make_scout(listeners=[listener])
+        result = scout.check()
+        listener.assert_called_once_with(result, None)
+
+    def test_listener_gets_error(self, fetch):
+        error = OSError("unreachable")
+        fetch.side_effect = error
+        listener = MagicMock()
+        scout = self._make_scout(listeners=[listener])
+        with pytest.raises(OSError):
+            scout.check()
+        result, raised = listener.call_args[0]
+        assert raised is error
+        assert "fetch" in result.timings
+
+    def test_global_listener(self, fetch):
+        listener = MagicMock()
+        add_listener(listener)
+        try:
+            self._make_scout().check()
+        finally:
+            remove_listener(listener)
+        self._make_scout().check()
+        listener.assert_called_once()
+
+    def test_listener_error_does_not_fail_check(self, fetch):
+        scout = self._make_scout(listeners=[MagicMock(side_effect=Exception)])
+        assert scout.check().status == 200
+
+
+class TestConcurrency:
+    def _make_scout(self, callback, **kwargs):
+        storage = MemoryStorage()
+        storage.set_last_seen(URL, OLD)
+        return ScoutRSS(URL, callback, storage=storage, concurrency=3, **kwargs)
+
+    def _entries(self):
+        return make_entry(NEW3), make_entry(NEW2), make_entry(NEW1)
+
+    def test_callbacks_overlap(self):
+        barrier = threading.Barrier(3, timeout=5)
+        scout = self._make_scout(lambda entry: barrier.wait())
+        with patch(
+            "scoutrss.socutrss.parse", return_value=make_parsed(*self._entries())
+        ):
+            result = scout.check()
+        assert result.delivered == 3 and not result.failed
+        assert scout.last_seen == NEW3
+
+    def test_commits_up_to_watermark(self):
+        e3, e2, e1 = self._entries()
+        barrier = threading.Barrier(3, timeout=5)
+
+        def callback(entry):
+            barrier.wait()  # all three run before any result is seen
+            if entry is e2:
+                raise ValueError("fail")
+
+        scout = self._make_scout(callback)
+        with patch("scoutrss.socutrss.parse", return_value=make_parsed(e3, e2, e1)):
+            result = scout.check()
+        assert result.succeeded == [e1, e3]
+        assert result.failed == [e2]
+        assert result.delivered == 1
+        assert scout.last_seen == NEW1
+        assert scout.storage.get_last_seen(URL) == NEW1
+
+    def test_unconfirmed_entry_stops_new_work(self):
+        e3, e2, e1 = self._entries()
+        storage = MemoryStorage()
+        storage.set_last_seen(URL, OLD)
+        callback = MagicMock(side_effect=[False, True, True])
+        scout = ScoutRSS(
+            URL,
+            callback,
+            storage=storage,
+            concurrency=2,
+            require_confirmation=True,
+            callback_executor=ThreadPoolExecutor(max_workers=1),
+        )
+        with patch("scoutrss.socutrss.parse", return_value=make_parsed(e3, e2, e1)):
+            result = scout.check()
+        # e1 fails and e2 was already running; e3 is never started
+        assert callback.call_count == 2
+        assert result.failed == [e1] and result.succeeded == [e2]
+        assert scout.last_seen == OLD
+
+    def test_sequential_results(self):
+        e3, e2, e1 = self._entries()
+        scout = ScoutRSS(
+            URL, MagicMock(side_effect=[True, Exception]), storage=MemoryStorage()
+        )
+        scout.last_seen = OLD
+        with patch("scoutrss.socutrss.parse", return_value=make_parsed(e3, e2, e1)):
+            result = scout._check(OLD)
+        assert result.succeeded == [e1] and result.failed == [e2]
+
+
+class TestParseNewEntries:
+    def test_returns_hints_and_new_entries_only(self):
+        response = Response(
+            200,
+            TestIncremental.FEED.replace(
+                b"<title>t</title>", b"<title>t</title><ttl>5</ttl>"
+            ),
+            {},
+            URL,
+        )
+        feed, entries = parse_new_entries(response, OLD)
+        assert feed == {"ttl": "5", "parsed": 3}
+        assert [e.title for e in entries] == ["one", "two"]
+
+    def test_reads_fields_without_feedparser(self):
+        response = Response(200, TestIncremental.FEED, {}, URL)
+        with patch("scoutrss.socutrss.parse", side_effect=AssertionError):
+            feed, entries = parse_new_entries(response, OLD, fields=("title",))
+        assert feed == {"parsed": 3}
+        assert [e.title for e in entries] == ["one", "two"]
+
+    def test_no_new_entries_skips_feedparser(self):
+        response = Response(200, TestIncremental.FEED, {}, URL)
+        latest = datetime(2030, 1, 1, tzinfo=timezone.utc)
+        with patch("scoutrss.socutrss.parse", side_effect=AssertionError):
+            assert parse_new_entries(response, latest) == ({"parsed": 3}, [])
+
+    def test_result_is_picklable(self):
+        response = Response(200, TestIncremental.FEED, {}, URL)
+        feed, entries = pickle.loads(pickle.dumps(parse_new_entries(response, OLD)))
+        assert entries[0].title == "one"
+
+    def test_check_with_parse_executor(self):
+        storage = MemoryStorage()
+        storage.set_last_seen(URL, OLD)
+        scout = ScoutRSS(URL, MagicMock(return_value=True), storage=storage)
+        executor = MagicMock()
+        executor.submit.side_effect = lambda fn, *args: MagicMock(
+            result=MagicMock(return_value=fn(*args))
+        )
+        response = Response(200, TestIncremental.FEED, {}, URL)
+        with patch("scoutrss.socutrss.fetch", return_value=response):
+            result = scout._check(OLD, executor)
+        executor.submit.assert_called_once_with(
+            parse_new_entries, response, OLD, False, None
+        )
+        assert result.delivered == 2
+
+
 class TestListen:
     def _make_scout(self):
         storage = MemoryStorage()
@@ -217,6 +927,16 @@ class TestListen:
         assert call_kwargs[1]["seconds"] == 30
         assert call_kwargs[1]["id"] == f"scoutrss:{URL}"
 
+    def test_jitter_delays_first_run(self):
+        scout = self._make_scout()
+        mock_scheduler = MagicMock()
+        before = datetime.now(tz=timezone.utc)
+        scout.listen(interval=600, scheduler=mock_scheduler, jitter=1.0)
+        first = mock_scheduler.add_job.call_args[1]["next_run_time"]
+        delay = (first - before).total_seconds()
+        assert 0 <= delay < 601
+        assert delay == pytest.approx(600 * jitter_fraction(URL), abs=1)
+
     def test_prefixed_job_id(self):
         scout = self._make_scout()
         mock_scheduler = MagicMock()
@@ -266,3 +986,29 @@ class TestStop:
         scout.stop()
         mock_scheduler.remove_job.assert_called_once_with(f"scoutrss:{URL}")
         mock_scheduler.shutdown.assert_not_called()
+
+    def test_flushes_storage(self):
+        storage = MemoryStorage()
+        storage.set_last_seen(URL, OLD)
+        scout = ScoutRSS(URL, MagicMock(), storage=storage)
+        scout._scheduler = MagicMock()
+        scout._should_shutdown_scheduler = False
+        with patch.object(storage, "flush") as flush:
+            scout.stop()
+        flush.assert_called_once()
+
+
+def test_import_is_light():
+    code = (
+        "import sys, scoutrss; "
+        "print(sorted({'asyncio', 'concurrent.futures.process', 'feedparser'}"
+        " & set(sys.modules)))"
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    ).stdout
+    assert out.strip() == "[]"
+    import scoutrss
+
+    assert scoutrss.AsyncScoutRSS.__module__ == "scoutrss.aio"
+    assert scoutrss.ScoutPool.__module__ == "scoutrss.pool"
@@ -0,0 +1,122 @@
+from scoutrss.seen import SeenIndex
+
+
+def key(index, i):
+    return index.key({"id": f"entry-{i}"})
+
+
+class TestKey:
+    def test_prefers_id_over_link(self):
+        index = SeenIndex()
+        assert index.key({"id": "a", "link": "b"}) == index.key({"id": "a"})
+        assert index.key({"link": "b"}) != index.key({"id": "a"})
+
+    def test_no_identity(self):
+        assert SeenIndex().key({"title": "t"}) is None
+
+    def test_updates(self):
+        plain, updates = SeenIndex(), SeenIndex(updates=True)
+        entry = {"id": "a", "updated": "2024-01-01"}
+        edited = {"id": "a", "updated": "2024-01-02"}
+        assert plain.key(entry) == plain.key(edited)
+        assert updates.key(entry) != updates.key(edited)
+
+
+class TestRecentIds:
+    def test_evicts_least_recently_seen(self):
+        index = SeenIndex(size=3)
+        ids = index.load(None)
+        for i in range(3):
+            ids.add(key(index, i))
+        ids.add(key(index, 0))  # touched
+        ids.add(key(index, 3))
+        assert key(index, 0) in ids
+        assert key(index, 1) not in ids
+        assert key(index, 3) in ids
+
+    def test_round_trip(self):
+        index = SeenIndex(size=10)
+        ids = index.load(None)
+        assert not ids.primed
+        for i in range(5):
+            ids.add(key(index, i))
+        assert ids.dirty
+        restored = index.load(ids.dump())
+        assert restored.primed
+        assert all(key(index, i) in restored for i in range(5))
+        assert key(index, 5) not in restored
+
+    def test_wrapped_round_trip(self):
+        index = SeenIndex(size=4)
+        ids = index.load(None)
+        for i in range(10):
+            ids.add(key(index, i))
+        restored = index.load(ids.dump())
+        assert [key(index, i) in restored for i in range(10)] == [False] * 6 + [
+            True
+        ] * 4
+        restored.add(key(index, 10))
+        assert key(index, 6) not in restored
+        assert key(index, 7) in restored
+
+    def test_seen_again_is_not_a_change(self):
+        index = SeenIndex(size=3)
+        ids = index.load(None)
+        ids.add(key(index, 0))
+        ids.dirty = False
+        ids.add(key(index, 0))
+        assert not ids.dirty
+
+    def test_entries_still_in_the_feed_are_kept(self):
+        index = SeenIndex(size=10)
+        ids = index.load(None)
+        for i in range(100):
+            ids.add(key(index, i))
+            ids.add(key(index, 0))  # in the feed at every check
+        assert key(index, 0) in ids
+        assert all(key(index, i) in ids for i in range(91, 100))
+
+    def test_memory_grows_with_the_ids_held(self):
+        index = SeenIndex(size=1000)
+        ids = index.load(None)
+        for i in range(3):
+            ids.add(key(index, i))
+        assert len(ids._ring) == len(ids._sorted) == 3
+
+    def test_compact(self):
+        index = SeenIndex(size=1000)
+        ids = index.load(None)
+        for i in range(1000):
+            ids.add(key(index, i))
+        assert len(ids.dump()["ids"]) <= 1000 * 8 * 4 // 3 + 4
+
+
+class TestBloomIds:
+    def test_membership(self):
+        index = SeenIndex(size=1000, bloom=True)
+        ids = index.load(None)
+        for i in range(1000):
+            ids.add(key(index, i))
+        assert all(key(index, i) in ids for i in range(1000))
+        false_positives = sum(key(index, i) in ids for i in range(1000, 11000))
+        assert false_positives < 50
+
+    def test_older_generation_dropped(self):
+        index = SeenIndex(size=10, bloom=True)
+        ids = index.load(None)
+        for i in range(30):
+            ids.add(key(index, i))
+        assert all(key(index, i) in ids for i in range(20, 30))
+        assert sum(key(index, i) in ids for i in range(10)) < 3
+
+    def test_round_trip(self):
+        index = SeenIndex(size=100, bloom=True)
+        ids = index.load(None)
+        ids.add(key(index, 1))
+        restored = index.load(ids.dump())
+        assert restored.primed and key(index, 1) in restored
+        assert len(ids.dump()["filters"][0]) < 250
+
+    def test_type_change_starts_over(self):
+        recent = SeenIndex().load(None).dump()
+        assert not SeenIndex(bloom=True).load(recent).primed
@@ -0,0 +1,97 @@
+from scoutrss.shard import Shard
+from scoutrss.storage import MemoryStorage
+
+IDS = [f"https://h{i}.example/feed" for i in range(300)]
+
+
+def owned(shard):
+    return {id for id in IDS if shard.owns(id)}
+
+
+def test_single_worker_owns_everything():
+    shard = Shard(MemoryStorage(), worker="a")
+    shard.heartbeat()
+    assert shard.workers == ["a"]
+    assert owned(shard) == set(IDS)
+
+
+def test_feeds_split_between_workers():
+    storage = MemoryStorage()
+    shards = [Shard(storage, worker=w) for w in "abc"]
+    for shard in shards:
+        shard.heartbeat()
+    for shard in shards:
+        shard.heartbeat(force=True)
+    parts = [owned(shard) for shard in shards]
+    assert all(shard.workers == ["a", "b", "c"] for shard in shards)
+    assert set().union(*parts) == set(IDS)
+    assert sum(len(p) for p in parts) == len(IDS)
+    assert all(len(p) > len(IDS) / 6 for p in parts)
+
+
+def test_join_moves_only_a_share():
+    storage = MemoryStorage()
+    a, b = Shard(storage, worker="a"), Shard(storage, worker="b")
+    a.heartbeat()
+    before = owned(a)
+    b.heartbeat()
+    assert a.heartbeat(force=True)
+    after = owned(a)
+    assert after < before
+    assert owned(b) == before - after
+
+
+def test_leave_hands_feeds_back():
+    storage = MemoryStorage()
+    a, b = Shard(storage, worker="a"), Shard(storage, worker="b")
+    a.heartbeat()
+    b.heartbeat()
+    a.heartbeat(force=True)
+    b.leave()
+    assert a.heartbeat(force=True)
+    assert owned(a) == set(IDS)
+
+
+def test_heartbeat_rate_limited():
+    shard = Shard(MemoryStorage(), worker="a", ttl=30)
+    shard._clock = lambda: 100.0
+    assert shard.heartbeat()
+    shard.storage.acquire_lease("scoutrss/worker/b", "b", 30)
+    assert not shard.heartbeat()
+    assert shard.workers == ["a"]
+    shard._clock = lambda: 111.0
+    assert shard.heartbeat()
+    assert shard.workers == ["a", "b"]
+
+
+def test_claim_respects_feed_lease():
+    storage = MemoryStorage()
+    shard = Shard(storage, worker="a")
+    shard.heartbeat()
+    storage.acquire_lease("scoutrss/feed/x", "b", 30)
+    assert not shard.claim("x")
+    storage.release_lease("scoutrss/feed/x", "b")
+    assert shard.claim("x")
+    assert storage.get_leases("scoutrss/feed/") == {"scoutrss/feed/x": "a"}
+
+
+def test_moved_feed_lease_released():
+    storage = MemoryStorage()
+    a, b = Shard(storage, worker="a"), Shard(storage, worker="b")
+    a.heartbeat()
+    for id in IDS:
+        a.claim(id)
+    b.heartbeat()
+    a.heartbeat(force=True)
+    held = set(storage.get_leases("scoutrss/feed/"))
+    assert held == {f"scoutrss/feed/{id}" for id in owned(a)}
+    assert all(b.claim(id) for id in owned(b))
+
+
+def test_groups_are_independent():
+    storage = MemoryStorage()
+    a = Shard(storage, worker="a", group="one")
+    b = Shard(storage, worker="b", group="two")
+    a.heartbeat()
+    b.heartbeat()
+    assert owned(a) == owned(b) == set(IDS)
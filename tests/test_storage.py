@@ -1,12 +1,48 @@
+import atexit
+import gc
 import json
-from datetime import datetime, timezone
+import os
+import threading
+import weakref
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock
 
-from scoutrss.storage import FileStorage, MemoryStorage
+import pytest
+
+from scoutrss.storage import (
+    CachedStorage,
+    FileStorage,
+    MemoryStorage,
+    MongoStorage,
+    SqliteStorage,
+)
 
 DT = datetime(2024, 1, 15, 12, 0, 0, tzinfo=timezone.utc)
 DT2 = datetime(2024, 2, 20, 8, 30, 0, tzinfo=timezone.utc)
 
 
+def assert_leases(storage):
+    assert storage.acquire_lease("g/feed/a", "w1", 30)
+    assert not storage.acquire_lease("g/feed/a", "w2", 30)
+    assert storage.acquire_lease("g/feed/a", "w1", 30)  # renewal
+    assert storage.acquire_lease("g/feed/b", "w2", -1)  # already expired
+    assert storage.acquire_lease("g/feed/b", "w1", 30)
+    assert storage.acquire_lease("other/feed/a", "w3", 30)
+    assert storage.get_leases("g/") == {"g/feed/a": "w1", "g/feed/b": "w1"}
+    storage.release_lease("g/feed/a", "w2")  # not the owner
+    assert not storage.acquire_lease("g/feed/a", "w2", 30)
+    storage.release_lease("g/feed/a", "w1")
+    assert storage.acquire_lease("g/feed/a", "w2", 30)
+
+
+def assert_advance_last_seen(storage):
+    storage.advance_last_seen("feed1", DT2)
+    storage.advance_last_seen("feed1", DT)
+    assert storage.get_last_seen("feed1") in (DT2, DT2.replace(tzinfo=None))
+    storage.set_last_seen("feed1", DT)  # plain writes may go back
+    assert storage.get_last_seen("feed1") in (DT, DT.replace(tzinfo=None))
+
+
 class TestMemoryStorage:
     def test_get_returns_none_for_unknown_id(self):
         storage = MemoryStorage()
@@ -30,6 +66,159 @@ class TestMemoryStorage:
         assert storage.get_last_seen("feed1") == DT
         assert storage.get_last_seen("feed2") == DT2
 
+    def test_http_cache(self):
+        storage = MemoryStorage()
+        assert storage.get_http_cache("feed1") is None
+        storage.set_http_cache("feed1", {"etag": '"abc"'})
+        assert storage.get_http_cache("feed1") == {"etag": '"abc"'}
+
+    def test_schedule(self):
+        storage = MemoryStorage()
+        assert storage.get_schedule("feed1") is None
+        storage.set_schedule("feed1", {"interval": 60})
+        assert storage.get_schedule("feed1") == {"interval": 60}
+
+    def test_seen(self):
+        storage = MemoryStorage()
+        assert storage.get_seen("feed1") is None
+        storage.set_seen("feed1", {"type": "recent", "ids": ""})
+        assert storage.get_seen("feed1") == {"type": "recent", "ids": ""}
+
+    def test_get_many_and_set_many(self):
+        storage = MemoryStorage()
+        storage.set_many({"feed1": DT, "feed2": DT2})
+        assert storage.get_many(["feed1", "feed2", "feed3"]) == {
+            "feed1": DT,
+            "feed2": DT2,
+            "feed3": None,
+        }
+
+    def test_advance_last_seen(self):
+        assert_advance_last_seen(MemoryStorage())
+
+    def test_leases(self):
+        assert_leases(MemoryStorage())
+
+
+class TestCachedStorage:
+    def test_reads_once(self, mocker):
+        inner = MemoryStorage()
+        inner.set_last_seen("feed1", DT)
+        storage = CachedStorage(inner)
+        spy = mocker.spy(inner, "get_last_seen")
+        assert storage.get_last_seen("feed1") == DT
+        assert storage.get_last_seen("feed1") == DT
+        assert storage.get_last_seen("unknown") is None
+        assert storage.get_last_seen("unknown") is None
+        assert spy.call_count == 2
+        assert (storage.hits, storage.misses) == (2, 2)
+
+    def test_writes_through(self, mocker):
+        inner = MemoryStorage()
+        storage = CachedStorage(inner)
+        spy = mocker.spy(inner, "get_http_cache")
+        storage.set_last_seen("feed1", DT)
+        storage.set_http_cache("feed1", {"etag": '"v1"'})
+        storage.set_schedule("feed1", {"interval": 60})
+        storage.set_seen("feed1", {"ids": ""})
+        assert inner.get_last_seen("feed1") == DT
+        assert inner.get_http_cache("feed1") == {"etag": '"v1"'}
+        assert storage.get_http_cache("feed1") == {"etag": '"v1"'}
+        assert storage.get_schedule("feed1") == {"interval": 60}
+        assert storage.get_seen("feed1") == {"ids": ""}
+        assert spy.call_count == 1  # only the direct read above
+
+    def test_ttl(self):
+        inner = MemoryStorage()
+        storage = CachedStorage(inner, ttl=10)
+        storage._clock = lambda: now
+        now = 0.0
+        storage.set_last_seen("feed1", DT)
+        inner.set_last_seen("feed1", DT2)  # another writer
+        assert storage.get_last_seen("feed1") == DT
+        now = 10.0
+        assert storage.get_last_seen("feed1") == DT2
+
+    def test_invalidate(self):
+        inner = MemoryStorage()
+        storage = CachedStorage(inner)
+        storage.set_last_seen("feed1", DT)
+        storage.set_last_seen("feed2", DT)
+        inner.set_many({"feed1": DT2, "feed2": DT2})
+        storage.invalidate("feed1")
+        assert storage.get_many(["feed1", "feed2"]) == {"feed1": DT2, "feed2": DT}
+        storage.invalidate()
+        assert storage.get_last_seen("feed2") == DT2
+
+    def test_get_many_reads_only_misses(self, mocker):
+        inner = MemoryStorage()
+        inner.set_many({"feed1": DT, "feed2": DT2})
+        storage = CachedStorage(inner)
+        storage.get_last_seen("feed1")
+        spy = mocker.spy(inner, "get_many")
+        assert storage.get_many(["feed1", "feed2", "feed3"]) == {
+            "feed1": DT,
+            "feed2": DT2,
+            "feed3": None,
+        }
+        spy.assert_called_once_with(["feed2", "feed3"])
+        storage.get_many(["feed2", "feed3"])
+        spy.assert_called_once()
+
+    def test_advance_last_seen(self):
+        assert_advance_last_seen(CachedStorage(MemoryStorage()))
+        storage = CachedStorage(MemoryStorage())
+        storage.get_last_seen("feed1")
+        storage.advance_last_seen("feed1", DT2)
+        storage.advance_last_seen("feed1", DT)
+        assert storage.get_last_seen("feed1") == DT2
+        assert storage.misses == 1
+
+    def test_advance_compares_naive_values(self, mocker):
+        inner = MemoryStorage()
+        mocker.patch.object(inner, "advance_last_seen")  # e.g. MongoStorage
+        storage = CachedStorage(inner)
+        storage.set_last_seen("feed1", DT.replace(tzinfo=None))
+        storage.advance_last_seen("feed1", DT2)
+        assert storage.get_last_seen("feed1") == DT2
+
+    def test_write_during_read_is_kept(self, mocker):
+        inner = MemoryStorage()
+        inner.set_http_cache("feed1", {"etag": '"old"'})
+        inner.set_last_seen("feed1", DT)
+        storage = CachedStorage(inner)
+        reading, release = threading.Semaphore(0), threading.Event()
+
+        def blocking(read):
+            def wrapper(*args):
+                value = read(*args)
+                reading.release()
+                release.wait(5)
+                return value
+
+            return wrapper
+
+        mocker.patch.object(inner, "get_http_cache", blocking(inner.get_http_cache))
+        mocker.patch.object(inner, "get_many", blocking(inner.get_many))
+        threads = [
+            threading.Thread(target=storage.get_http_cache, args=("feed1",)),
+            threading.Thread(target=storage.get_many, args=(["feed1"],)),
+        ]
+        for thread in threads:
+            thread.start()
+        for _ in threads:
+            assert reading.acquire(timeout=5)
+        storage.set_http_cache("feed1", {"etag": '"new"'})
+        storage.set_last_seen("feed1", DT2)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+        assert storage.get_http_cache("feed1") == {"etag": '"new"'}
+        assert storage.get_last_seen("feed1") == DT2
+
+    def test_leases(self):
+        assert_leases(CachedStorage(MemoryStorage()))
+
 
 class TestFileStorage:
     def test_get_returns_none_for_unknown_id(self, tmp_path):
@@ -74,3 +263,347 @@ class TestFileStorage:
         storage.set_last_seen("feed2", DT2)
         assert storage.get_last_seen("feed1") == DT
         assert storage.get_last_seen("feed2") == DT2
+
+    def test_http_cache(self, tmp_path):
+        storage = FileStorage(tmp_path / "data.json")
+        assert storage.get_http_cache("feed1") is None
+        storage.set_http_cache("feed1", {"etag": '"abc"'})
+        assert storage.get_http_cache("feed1") == {"etag": '"abc"'}
+
+    def test_http_cache_does_not_clobber_last_seen(self, tmp_path):
+        storage = FileStorage(tmp_path / "data.json")
+        storage.set_last_seen("feed1", DT)
+        storage.set_http_cache("feed1", {"etag": '"abc"'})
+        storage.set_last_seen("feed1", DT2)
+        assert storage.get_last_seen("feed1") == DT2
+        assert storage.get_http_cache("feed1") == {"etag": '"abc"'}
+
+    def test_schedule(self, tmp_path):
+        storage = FileStorage(tmp_path / "data.json")
+        assert storage.get_schedule("feed1") is None
+        storage.set_last_seen("feed1", DT)
+        storage.set_schedule("feed1", {"interval": 60})
+        assert storage.get_schedule("feed1") == {"interval": 60}
+        assert storage.get_last_seen("feed1") == DT
+
+    def test_seen(self, tmp_path):
+        storage = FileStorage(tmp_path / "data.json")
+        assert storage.get_seen("feed1") is None
+        storage.set_seen("feed1", {"type": "recent", "ids": ""})
+        reopened = FileStorage(tmp_path / "data.json")
+        assert reopened.get_seen("feed1") == {"type": "recent", "ids": ""}
+
+    def test_http_cache_only_entry_has_no_last_seen(self, tmp_path):
+        storage = FileStorage(tmp_path / "data.json")
+        storage.set_http_cache("feed1", {"etag": '"abc"'})
+        assert storage.get_last_seen("feed1") is None
+
+    def test_set_many_writes_once(self, tmp_path, mocker):
+        storage = FileStorage(tmp_path / "data.json")
+        spy = mocker.spy(storage, "_write")
+        storage.set_many({"feed1": DT, "feed2": DT2})
+        spy.assert_called_once()
+        assert storage.get_many(["feed1", "feed2", "feed3"]) == {
+            "feed1": DT,
+            "feed2": DT2,
+            "feed3": None,
+        }
+
+    def test_write_is_atomic(self, tmp_path):
+        path = tmp_path / "data.json"
+        storage = FileStorage(path)
+        storage.set_last_seen("feed1", DT)
+        assert sorted(p.name for p in tmp_path.iterdir()) == [
+            "data.json",
+            "data.json.lock",
+        ]
+
+    def test_advance_last_seen(self, tmp_path):
+        assert_advance_last_seen(FileStorage(tmp_path / "data.json"))
+
+    def test_leases(self, tmp_path):
+        assert_leases(FileStorage(tmp_path / "data.json"))
+
+    def test_instances_on_one_path_keep_each_others_fields(self, tmp_path):
+        path = tmp_path / "data.json"
+        first, second = FileStorage(path), FileStorage(path)
+
+        def write(storage, key):
+            for i in range(20):
+                storage.set_http_cache(f"{key}{i}", {"etag": key})
+
+        threads = [
+            threading.Thread(target=write, args=(first, "a")),
+            threading.Thread(target=write, args=(second, "b")),
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        reader = FileStorage(path)
+        for i in range(20):
+            assert reader.get_http_cache(f"a{i}") == {"etag": "a"}
+            assert reader.get_http_cache(f"b{i}") == {"etag": "b"}
+
+    def test_batch_writes_once(self, tmp_path, mocker):
+        path = tmp_path / "data.json"
+        storage = FileStorage(path)
+        storage.set_last_seen("feed1", DT2)
+        spy = mocker.spy(storage, "_write")
+        with storage.batch():
+            storage.set_http_cache("feed1", {"etag": '"abc"'})
+            storage.advance_last_seen("feed1", DT)
+            storage.set_last_seen("feed2", DT)
+            assert storage.get_last_seen("feed2") == DT
+            assert json.loads(path.read_text()) == {
+                "feed1": {"last_seen_at": DT2.isoformat()}
+            }
+        spy.assert_called_once()
+        reader = FileStorage(path)
+        assert reader.get_last_seen("feed1") == DT2
+        assert reader.get_http_cache("feed1") == {"etag": '"abc"'}
+        assert reader.get_last_seen("feed2") == DT
+
+    def test_fsync_can_be_disabled(self, tmp_path, mocker):
+        spy = mocker.spy(os, "fsync")
+        storage = FileStorage(tmp_path / "data.json", fsync=False)
+        storage.set_last_seen("feed1", DT)
+        spy.assert_not_called()
+        assert FileStorage(tmp_path / "data.json").get_last_seen("feed1") == DT
+
+    def test_leases_shared_between_instances(self, tmp_path):
+        FileStorage(tmp_path / "data.json").acquire_lease("a", "w1", 30)
+        other = FileStorage(tmp_path / "data.json")
+        assert not other.acquire_lease("a", "w2", 30)
+        assert other.get_leases("") == {"a": "w1"}
+
+
+class TestFileStorageCache:
+    def test_writes_buffered_until_flush(self, tmp_path):
+        path = tmp_path / "data.json"
+        storage = FileStorage(path, cache=True, flush_interval=60)
+        storage.set_last_seen("feed1", DT)
+        assert storage.get_last_seen("feed1") == DT
+        assert json.loads(path.read_text()) == {}
+        storage.flush()
+        assert FileStorage(path).get_last_seen("feed1") == DT
+
+    def test_flushes_on_interval(self, tmp_path):
+        path = tmp_path / "data.json"
+        storage = FileStorage(path, cache=True, flush_interval=0.01)
+        storage.set_last_seen("feed1", DT)
+        storage._timer.join(1)
+        assert FileStorage(path).get_last_seen("feed1") == DT
+
+    def test_close_flushes_and_unregisters_exit_hook(self, tmp_path, mocker):
+        path = tmp_path / "data.json"
+        unregister = mocker.spy(atexit, "unregister")
+        storage = FileStorage(path, cache=True, flush_interval=60)
+        hook = storage._atexit
+        storage.set_last_seen("feed1", DT)
+        storage.close()
+        unregister.assert_called_once_with(hook)
+        assert FileStorage(path).get_last_seen("feed1") == DT
+
+    def test_exit_hook_does_not_keep_storage_alive(self, tmp_path):
+        storage = FileStorage(tmp_path / "data.json", cache=True)
+        ref = weakref.ref(storage)
+        hook = storage._atexit
+        del storage
+        gc.collect()
+        assert ref() is None
+        hook()
+
+    def test_does_not_reread_unchanged_file(self, tmp_path, mocker):
+        storage = FileStorage(tmp_path / "data.json", cache=True)
+        storage.get_last_seen("feed1")
+        spy = mocker.spy(json, "loads")
+        storage.get_last_seen("feed1")
+        storage.get_last_seen("feed2")
+        spy.assert_not_called()
+
+    def test_reloads_when_file_changes(self, tmp_path):
+        path = tmp_path / "data.json"
+        storage = FileStorage(path, cache=True)
+        assert storage.get_last_seen("feed1") is None
+        FileStorage(path).set_last_seen("feed1", DT)
+        assert storage.get_last_seen("feed1") == DT
+
+    def test_pending_writes_survive_reload(self, tmp_path):
+        path = tmp_path / "data.json"
+        storage = FileStorage(path, cache=True, flush_interval=60)
+        storage.set_last_seen("feed1", DT)
+        FileStorage(path).set_last_seen("feed2", DT2)
+        storage.flush()
+        reader = FileStorage(path)
+        assert reader.get_last_seen("feed1") == DT
+        assert reader.get_last_seen("feed2") == DT2
+
+    def test_flush_merges_fields_into_the_file(self, tmp_path):
+        path = tmp_path / "data.json"
+        FileStorage(path).set_last_seen("feed1", DT)
+        cached = FileStorage(path, cache=True, flush_interval=60)
+        assert cached.get_last_seen("feed1") == DT
+        FileStorage(path).advance_last_seen("feed1", DT2)
+        cached.set_http_cache("feed1", {"etag": '"abc"'})
+        cached.flush()
+        reader = FileStorage(path)
+        assert reader.get_last_seen("feed1") == DT2
+        assert reader.get_http_cache("feed1") == {"etag": '"abc"'}
+
+    def test_flush_does_not_move_last_seen_backwards(self, tmp_path):
+        path = tmp_path / "data.json"
+        cached = FileStorage(path, cache=True, flush_interval=60)
+        cached.advance_last_seen("feed1", DT)
+        FileStorage(path).advance_last_seen("feed1", DT2)
+        assert cached.get_last_seen("feed1") == DT2
+        cached.flush()
+        assert FileStorage(path).get_last_seen("feed1") == DT2
+
+
+class TestSqliteStorage:
+    def test_get_returns_none_for_unknown_id(self, tmp_path):
+        storage = SqliteStorage(tmp_path / "data.db")
+        assert storage.get_last_seen("unknown") is None
+        assert storage.get_http_cache("unknown") is None
+
+    def test_set_and_get(self, tmp_path):
+        storage = SqliteStorage(tmp_path / "data.db")
+        storage.set_last_seen("feed1", DT)
+        storage.set_last_seen("feed1", DT2)
+        storage.set_http_cache("feed1", {"etag": '"abc"'})
+        assert storage.get_last_seen("feed1") == DT2
+        assert storage.get_http_cache("feed1") == {"etag": '"abc"'}
+
+    def test_get_many_and_set_many(self, tmp_path):
+        storage = SqliteStorage(tmp_path / "data.db")
+        ids = [f"feed{i}" for i in range(1200)]
+        storage.set_many(dict.fromkeys(ids, DT))
+        result = storage.get_many(ids + ["unknown"])
+        assert result["unknown"] is None
+        assert all(result[id] == DT for id in ids)
+
+    def test_schedule(self, tmp_path):
+        storage = SqliteStorage(tmp_path / "data.db")
+        assert storage.get_schedule("feed1") is None
+        storage.set_last_seen("feed1", DT)
+        storage.set_schedule("feed1", {"interval": 60})
+        storage.set_schedule("feed1", {"interval": 90})
+        assert storage.get_schedule("feed1") == {"interval": 90}
+        assert storage.get_last_seen("feed1") == DT
+
+    def test_seen(self, tmp_path):
+        storage = SqliteStorage(tmp_path / "data.db")
+        assert storage.get_seen("feed1") is None
+        storage.set_schedule("feed1", {"interval": 60})
+        storage.set_seen("feed1", {"type": "recent", "ids": ""})
+        assert storage.get_seen("feed1") == {"type": "recent", "ids": ""}
+        assert storage.get_schedule("feed1") == {"interval": 60}
+
+    def test_uses_wal(self, tmp_path):
+        storage = SqliteStorage(tmp_path / "data.db")
+        mode = storage._conn().execute("PRAGMA journal_mode").fetchone()[0]
+        assert mode == "wal"
+
+    def test_persists_across_instances(self, tmp_path):
+        SqliteStorage(tmp_path / "data.db").set_last_seen("feed1", DT)
+        assert SqliteStorage(tmp_path / "data.db").get_last_seen("feed1") == DT
+
+    def test_batch_commits_once_on_exit(self, tmp_path):
+        path = tmp_path / "data.db"
+        storage = SqliteStorage(path)
+        other = SqliteStorage(path)
+        with storage.batch():
+            storage.set_last_seen("feed1", DT)
+            storage.set_last_seen("feed2", DT2)
+            assert storage.get_last_seen("feed1") == DT
+            assert other.get_last_seen("feed1") is None
+        assert other.get_last_seen("feed1") == DT
+        assert other.get_last_seen("feed2") == DT2
+
+    def test_connection_per_thread(self, tmp_path):
+        storage = SqliteStorage(tmp_path / "data.db")
+        storage.set_last_seen("feed1", DT)
+        result = []
+        thread = threading.Thread(
+            target=lambda: result.append(storage.get_last_seen("feed1"))
+        )
+        thread.start()
+        thread.join()
+        assert result == [DT]
+
+    def test_advance_last_seen(self, tmp_path):
+        assert_advance_last_seen(SqliteStorage(tmp_path / "data.db"))
+
+    def test_advance_last_seen_compares_offsets(self, tmp_path):
+        storage = SqliteStorage(tmp_path / "data.db")
+        storage.set_last_seen("feed1", DT)
+        earlier = DT.astimezone(timezone(timedelta(hours=5))) - timedelta(seconds=1)
+        storage.advance_last_seen("feed1", earlier)
+        assert storage.get_last_seen("feed1") == DT
+
+    def test_advance_last_seen_in_batch(self, tmp_path):
+        path = tmp_path / "data.db"
+        storage = SqliteStorage(path)
+        SqliteStorage(path).set_last_seen("feed1", DT2)
+        with storage.batch():
+            storage.advance_last_seen("feed1", DT)
+            storage.set_last_seen("feed2", DT)
+            storage.advance_last_seen("feed2", DT2)
+        assert storage.get_many(["feed1", "feed2"]) == {"feed1": DT2, "feed2": DT2}
+
+    def test_leases(self, tmp_path):
+        assert_leases(SqliteStorage(tmp_path / "data.db"))
+
+
+class TestMongoStorage:
+    @pytest.fixture
+    def storage(self):
+        mongomock = pytest.importorskip("mongomock")
+        return MongoStorage(mongomock.MongoClient()["db"]["rss"])
+
+    def test_set_and_get(self, storage):
+        assert storage.get_last_seen("feed1") is None
+        storage.set_last_seen("feed1", DT)
+        assert storage.get_last_seen("feed1") == DT.replace(tzinfo=None)
+
+    def test_http_cache(self, storage):
+        storage.set_http_cache("feed1", {"etag": '"abc"'})
+        assert storage.get_http_cache("feed1") == {"etag": '"abc"'}
+        assert storage.get_last_seen("feed1") is None
+
+    def test_schedule(self, storage):
+        storage.set_schedule("feed1", {"interval": 60})
+        assert storage.get_schedule("feed1") == {"interval": 60}
+
+    def test_seen(self, storage):
+        storage.set_seen("feed1", {"type": "recent", "ids": ""})
+        assert storage.get_seen("feed1") == {"type": "recent", "ids": ""}
+
+    def test_get_many(self, storage):
+        storage.set_last_seen("feed1", DT)
+        assert storage.get_many(["feed1", "feed2"]) == {
+            "feed1": DT.replace(tzinfo=None),
+            "feed2": None,
+        }
+
+    def test_set_many_uses_bulk_write(self):
+        pymongo = pytest.importorskip("pymongo")
+        collection = MagicMock()
+        MongoStorage(collection).set_many({"feed1": DT, "feed2": DT2})
+        collection.bulk_write.assert_called_once()
+        requests = collection.bulk_write.call_args[0][0]
+        assert requests == [
+            pymongo.UpdateOne(
+                {"_id": "feed1"}, {"$set": {"last_seen_at": DT}}, upsert=True
+            ),
+            pymongo.UpdateOne(
+                {"_id": "feed2"}, {"$set": {"last_seen_at": DT2}}, upsert=True
+            ),
+        ]
+
+    def test_advance_last_seen(self, storage):
+        assert_advance_last_seen(storage)
+
+    def test_leases(self, storage):
+        assert_leases(storage)